@@ -24,6 +24,8 @@ DEPENDENCIES: This library heavily depends on the py_expression_eval module
               by Vera Mazhuga. Which can be downloaded from:
               https://github.com/Axiacore/py-expression-eval
               Further, we only need regular expressions from re.
+              Alternative representations of words (ropes and run-length encoded
+              words) are in LSystems_words.py.
 
 OVERVIEW:     This module consists of the classes: Module, Rule and LSystem.
               Module is used to store modules (a letter/symbol and its parameters)
@@ -40,8 +42,20 @@ OVERVIEW:     This module consists of the classes: Module, Rule and LSystem.
 """
 
 import re     
-from py_expression_eval import Parser
-from random import random
+import gzip
+import json
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from queue import Queue, Empty, Full
+from py_expression_eval import Parser, Expression, Token, TNUMBER, TOP1, TOP2, TVAR
+from random import random, getstate, setstate
+from LSystems_words import Rope, RunLengthWord, moduleKey, ropeFromChunks, ropeFromList, runLengthEncode, ROPE_CHUNK_SIZE
 
 ########################################
 #               CLASSES                #
@@ -60,6 +74,69 @@ class Module:
         self.param = param
 
 
+class Memo:
+    """Memo is a bounded least-recently-used cache that keeps hit/miss statistics.
+
+    Keys are tuples of parameter values, size is the maximum number of stored entries.
+    """
+    def __init__(self, size):
+        self.size   = size
+        self.table  = OrderedDict()
+        self.hits   = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """Returns the stored value for key or None if key is not stored."""
+        value = self.table.get(key)
+        if value is None:
+            self.misses = self.misses + 1
+        else:
+            self.hits = self.hits + 1
+            self.table.move_to_end(key)
+        return(value)
+
+    def store(self, key, value):
+        """Stores value under key, evicting the least recently used entry if full."""
+        self.table[key] = value
+        if len(self.table) > self.size:
+            self.table.popitem(last = False)
+
+    def statistics(self):
+        """Returns a dictionary with the hits, misses and current number of entries."""
+        return({"hits": self.hits, "misses": self.misses, "entries": len(self.table), "size": self.size})
+
+
+class ModuleTable:
+    """ModuleTable hash-conses modules: equal modules (same symbol and parameters) share one object.
+
+    The table only holds weak references, a module disappears from the table as soon as 
+    no word uses it anymore. Shared modules (and their parameter lists) should not be modified.
+    """
+    def __init__(self):
+        self.table  = weakref.WeakValueDictionary()
+        self.hits   = 0
+        self.misses = 0
+
+    def intern(self, mod):
+        """Returns the shared module equal to mod (mod itself if it is the first of its kind)."""
+        key = moduleKey(mod)
+        shared = self.table.get(key)
+        if shared is None:
+            self.misses = self.misses + 1
+            self.table[key] = mod
+            return(mod)
+        self.hits = self.hits + 1
+        return(shared)
+
+    def internWord(self, word):
+        """Returns a list in which every module of word is replaced by its shared module."""
+        return([self.intern(mod) for mod in word])
+
+    def statistics(self):
+        """Returns a dictionary with the hits, misses and current number of distinct modules."""
+        return({"hits": self.hits, "misses": self.misses, "entries": len(self.table)})
+
+
 class Rule:
     """Rule represents a replacement rule with its predecessor, condition and successor.
 
@@ -83,31 +160,134 @@ class Rule:
         self.right_context      = right_context
         self.isStochastic       = (probs != []) 
         self.probs              = probs                # if stochastic then this contains a list of the probabilities
+        self.conditionMemo      = None                 # optional memo of condition values, see setMemoSize()
+        self.successorMemo      = None                 # optional memo of successor parameters, see setMemoSize()
+        self.scope              = None                 # common subexpressions computed by the last checkCondition
         # if the condition is non-empty parse it to an expression
         if condition != "":
             self.condition      = self.parser.parse(condition)  # the condition in string form
         else:
             self.condition      = condition
+        self.eliminateCommonSubexpressions()
+
+    def eliminateCommonSubexpressions(self):
+        """Rewrites the condition and successor parameters such that shared subexpressions are computed once.
+
+        Every subexpression that occurs more than once is replaced by a temporary variable.
+        self.temporaries maps these variables to their expressions, conditionTemporaries and
+        successorTemporaries list (in order of evaluation) the temporaries needed by the condition 
+        and by the successor (for stochastic rules a list per successor).
+        """
+        if self.isStochastic:
+            listOfSuccessors = self.successor
+        else:
+            listOfSuccessors = [self.successor]
+        expressions = []
+        if self.condition != "":
+            expressions.append(self.condition)
+        for currentRule in listOfSuccessors:
+            for elem in currentRule:
+                expressions = expressions + elem.param
+        newExpressions, temporaries = eliminateCommonSubexpressions(expressions)
+        self.temporaries = dict(temporaries)
+        order = [item[0] for item in temporaries]
+        # replace the expressions by their rewritten versions
+        i = 0
+        if self.condition != "":
+            self.condition = newExpressions[0]
+            self.conditionTemporaries = requiredTemporaries([self.condition], self.temporaries, order)
+            i = 1
+        else:
+            self.conditionTemporaries = []
+        listOfTemporaries = []
+        for currentRule in listOfSuccessors:
+            for elem in currentRule:
+                elem.param = newExpressions[i:(i + len(elem.param))]
+                i = i + len(elem.param)
+            listOfTemporaries.append(requiredTemporaries([parExpr for elem in currentRule for parExpr in elem.param], self.temporaries, order))
+        if self.isStochastic:
+            self.successorTemporaries = listOfTemporaries
+        else:
+            self.successorTemporaries = listOfTemporaries[0]
+        self.variableNames = set(self.left_context.param + self.symParam + self.right_context.param)
+
+    def setMemoSize(self, size):
+        """Enables (size > 0) or disables (size = 0) memoization of this rule.
+
+        Condition values and successor parameters are then stored per tuple of
+        predecessor and context parameters, in a memo of at most 'size' entries each.
+        Successor parameters are only memoized when they are deterministic, that is
+        for non-stochastic rules whose expressions do not call random.
+        """
+        if size > 0 and self.condition != "":
+            self.conditionMemo = Memo(size)
+        else:
+            self.conditionMemo = None
+        if size > 0 and self.isDeterministic():
+            self.successorMemo = Memo(size)
+        else:
+            self.successorMemo = None
+
+    def isDeterministic(self):
+        """Returns True if the successor parameters only depend on the predecessor and its context."""
+        if self.isStochastic:
+            return(False)
+        for elem in self.successor:
+            for parExpr in elem.param:
+                if "random" in parExpr.symbols():
+                    return(False)
+        return(True)
+
+    def memoStatistics(self):
+        """Returns the hit/miss statistics of the condition and successor memos (None if disabled)."""
+        stats = {"condition": None, "successor": None}
+        if self.conditionMemo is not None:
+            stats["condition"] = self.conditionMemo.statistics()
+        if self.successorMemo is not None:
+            stats["successor"] = self.successorMemo.statistics()
+        return(stats)
+
+    def getVariables(self, left_context, mod, right_context):
+        """Returns the names and values of the variables of the predecessor and its context."""
+        if self.ruleType == self.TYPE_OL:
+            keys = self.symParam
+            values = mod.param 
+        elif self.ruleType == self.TYPE_L1L:
+            keys = self.left_context.param + self.symParam
+            values = left_context.param + mod.param     
+        elif self.ruleType == self.TYPE_R1L:
+            keys = self.symParam + self.right_context.param
+            values =  mod.param + right_context.param
+        elif self.ruleType == self.TYPE_2L:
+            keys = self.left_context.param + self.symParam + self.right_context.param
+            values = left_context.param + mod.param + right_context.param
+        return(keys, values)
             
     def checkCondition(self, left_context, mod, right_context):
         """Checks whether the condition in the rule is true or false"""
         if self.condition == "":
             return(True)
         else:
-            if self.ruleType == self.TYPE_OL:
-                keys = self.symParam
-                values = mod.param 
-            elif self.ruleType == self.TYPE_L1L:
-                keys = self.left_context.param + self.symParam
-                values = left_context.param + mod.param     
-            elif self.ruleType == self.TYPE_R1L:
-                keys = self.symParam + self.right_context.param
-                values =  mod.param + right_context.param
-            elif self.ruleType == self.TYPE_2L:
-                keys = self.left_context.param + self.symParam + self.right_context.param
-                values = left_context.param + mod.param + right_context.param
+            keys, values = self.getVariables(left_context, mod, right_context)
+            if self.conditionMemo is not None:
+                memoKey = tuple(values)
+                result = self.conditionMemo.lookup(memoKey)
+                if result is None:
+                    result = self.evaluateCondition(left_context, mod, right_context, dict(zip(keys, values)))
+                    self.conditionMemo.store(memoKey, result)
+                return(result)
             new_dict = dict(zip(keys,  values))       
-            return(self.condition.evaluate(new_dict))
+            return(self.evaluateCondition(left_context, mod, right_context, new_dict))
+
+    def evaluateCondition(self, left_context, mod, right_context, new_dict):
+        """Evaluates the condition, keeping the shared subexpressions for getReplacement."""
+        if self.conditionTemporaries != []:
+            scope = {}
+            for name in self.conditionTemporaries:
+                new_dict[name] = self.temporaries[name].evaluate(new_dict)
+                scope[name] = new_dict[name]
+            self.scope = (left_context, mod, right_context, scope)
+        return(self.condition.evaluate(new_dict))
  
 
     def isApplicable(self, left_context, mod, right_context):
@@ -135,6 +315,14 @@ class Rule:
                     return(True)
                 else:
                     return(False)               
+
+    def matchesContext(self, left_context, right_context):
+        """Check if the symbols of the context of a module match the context of this rule."""
+        if (self.ruleType == self.TYPE_L1L or self.ruleType == self.TYPE_2L) and self.left_context.symbol != left_context.symbol:
+            return(False)
+        if (self.ruleType == self.TYPE_R1L or self.ruleType == self.TYPE_2L) and self.right_context.symbol != right_context.symbol:
+            return(False)
+        return(True)
                            
     
     def getReplacement(self, left_context, mod, right_context, definitions):
@@ -149,62 +337,810 @@ class Rule:
                     index = i
                     break
             currentRule = self.successor[index]
+            temporaries = self.successorTemporaries[index]
         else:
             currentRule = self.successor
+            temporaries = self.successorTemporaries
+        #generate replacement dictionary
+        keys, values = self.getVariables(left_context, mod, right_context)
+        if definitions != []: #this means there are named variables with a definition in that case we add them to the variables
+            keys = keys + [item[0] for item in definitions]
+            values = values + [item[1] for item in definitions]
+        scope = self.scope
+        self.scope = None
+        if self.successorMemo is not None:
+            memoKey = tuple(values)
+            listOfParams = self.successorMemo.lookup(memoKey)
+            if listOfParams is None:
+                new_dict = self.getScope(left_context, mod, right_context, keys, values, definitions, scope)
+                listOfParams = self.evaluateSuccessor(currentRule, temporaries, new_dict)
+                self.successorMemo.store(memoKey, listOfParams)
+        else:
+            new_dict = self.getScope(left_context, mod, right_context, keys, values, definitions, scope)
+            listOfParams = self.evaluateSuccessor(currentRule, temporaries, new_dict)
         #Now convert the rule into a list of replacement modules
+        for i in range(0, len(currentRule)):
+            replacement.append(Module(currentRule[i].symbol, listOfParams[i]))
+        return(replacement)
+
+    def getScope(self, left_context, mod, right_context, keys, values, definitions, scope):
+        """Returns the replacement dictionary, including the subexpressions already computed by checkCondition."""
+        new_dict = dict(zip(keys,  values))
+        if scope is not None and scope[1] is mod and scope[0] is left_context and scope[2] is right_context:
+            # definitions that shadow a variable would give the subexpressions another value
+            for item in definitions:
+                if item[0] in self.variableNames:
+                    return(new_dict)
+            new_dict.update(scope[3])
+        return(new_dict)
+
+    def evaluateSuccessor(self, currentRule, temporaries, new_dict):
+        """Evaluates the parameter expressions of a successor, returns a list of parameter lists."""
+        for name in temporaries:
+            if name not in new_dict:
+                new_dict[name] = self.temporaries[name].evaluate(new_dict)
+        listOfParams = []
         for elem in currentRule:
-            #generate replacement dictionary
-            if self.ruleType == self.TYPE_OL:
-                keys = self.symParam
-                values = mod.param 
-            elif self.ruleType == self.TYPE_L1L:
-                keys = self.left_context.param + self.symParam
-                values = left_context.param + mod.param     
-            elif self.ruleType == self.TYPE_R1L:
-                keys = self.symParam + self.right_context.param
-                values =  mod.param + right_context.param
-            elif self.ruleType == self.TYPE_2L:
-                keys = self.left_context.param + self.symParam + self.right_context.param
-                values = left_context.param + mod.param + right_context.param
-            if definitions != []: #this means there are named variables with a definition in that case we add them to the variables
-                keys = keys + [item[0] for item in definitions]
-                values = values + [item[1] for item in definitions]
-            new_dict = dict(zip(keys,  values))
             params = []
             for i in range(0, len(elem.param)):
                 parExpr = elem.param[i]
                 params.append(parExpr.evaluate(new_dict))
-            #add to replacement as a module
-            replacement.append(Module(elem.symbol,params))
-        return(replacement)
+            listOfParams.append(params)
+        return(listOfParams)
+
+class BudgetExceeded(Exception):
+    """Raised when the next generation of an L-system does not fit in its module or byte budget.
+
+    generation is the generation that was being computed, modules the number of modules 
+    computed before the budget ran out and limit the budget in number of modules.
+    """
+    def __init__(self, message, generation, modules, limit):
+        Exception.__init__(self, message)
+        self.generation = generation
+        self.modules    = modules
+        self.limit      = limit
+
+    def __reduce__(self):
+        # such that the exception can be passed from a worker process, see GenerationProducer
+        return(BudgetExceeded, (str(self), self.generation, self.modules, self.limit))
+
+
+class GenerationProfile:
+    """GenerationProfile holds the timings and counters of a single generation.
+
+    All times are in seconds. ruleHits and conditionFailures have one entry per 
+    production rule, moduleCounts maps every symbol in the new word to its number of modules.
+    """
+    def __init__(self, generation, nrOfRules):
+        self.generation         = generation
+        self.totalTime          = 0
+        self.contextTime        = 0            # finding left and right context
+        self.matchingTime       = 0            # comparing symbols and contexts of rules (without conditions)
+        self.conditionTime      = 0            # evaluating conditions
+        self.successorTime      = 0            # evaluating successors
+        self.assemblyTime       = 0            # building the new word
+        self.ruleHits           = [0] * nrOfRules
+        self.conditionFailures  = [0] * nrOfRules
+        self.unchanged          = 0            # modules without an applicable rule
+        self.moduleCounts       = {}
+
+    def toDict(self):
+        """Returns the profile as a dictionary (e.g. for JSON export)."""
+        return({"generation": self.generation,
+                "times": {"total": self.totalTime,
+                          "context": self.contextTime,
+                          "matching": self.matchingTime,
+                          "condition": self.conditionTime,
+                          "successor": self.successorTime,
+                          "assembly": self.assemblyTime},
+                "ruleHits": self.ruleHits,
+                "conditionFailures": self.conditionFailures,
+                "unchanged": self.unchanged,
+                "moduleCounts": self.moduleCounts})
+
+
+class Profile:
+    """Profile collects a GenerationProfile for every generation computed while profiling is enabled.
+
+    rules contains the production rules (as strings) in the order used by the counters.
+    """
+    def __init__(self, rules):
+        self.rules       = rules
+        self.generations = []
+
+    def toDict(self):
+        """Returns the profile as a dictionary (e.g. for JSON export)."""
+        return({"rules": self.rules, "generations": [gen.toDict() for gen in self.generations]})
+
+    def toJSON(self, indent = None):
+        """Returns the profile as a JSON string."""
+        return(json.dumps(self.toDict(), indent = indent))
+
+    def save(self, filename):
+        """Writes the profile as JSON to filename."""
+        with open(filename, "w") as f:
+            json.dump(self.toDict(), f, indent = 1)
+
+
+class GenerationProducer:
+    """GenerationProducer computes generations of an L-system in the background, see LSystem.produceGenerations.
+
+    Iterating a producer gives (generation, word) pairs. The worker (a thread or a process) is
+    at most queueSize generations ahead of the consumer. cancel(), or leaving a with block,
+    stops the worker and discards the generations that were not delivered yet.
+    """
+    def __init__(self, system, nrOfGenerations, every = 1, queueSize = 2, mode = "thread"):
+        if mode == "thread":
+            self.queue = Queue(queueSize)
+            self.stop = threading.Event()
+            self.worker = threading.Thread(target = produceGenerations, daemon = True, 
+                                           args = (system, nrOfGenerations, every, self.queue, self.stop))
+        elif mode == "process":
+            self.queue = multiprocessing.Queue(queueSize)
+            self.stop = multiprocessing.Event()
+            self.worker = multiprocessing.Process(target = produceGenerationsInProcess, daemon = True, 
+                                                  args = (system.specification(), system.word, system.generation, getstate(),
+                                                          nrOfGenerations, every, self.queue, self.stop))
+        else:
+            raise ValueError("mode should be 'thread' or 'process', not: " + str(mode))
+        self.mode = mode
+        self.finished = False
+        self.worker.start()
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, excType, excValue, traceback):
+        self.cancel()
+        return(False)
+
+    def get(self):
+        """Waits for the next (generation, word) pair and returns it, returns None after the last one.
+
+        An exception raised by the worker (e.g. BudgetExceeded) is raised again here.
+        """
+        if self.finished:
+            return(None)
+        while True:
+            try:
+                kind, value = self.queue.get(timeout = 0.1)
+                break
+            except Empty:
+                if not self.worker.is_alive() and self.queue.empty():
+                    self.finished = True
+                    raise RuntimeError("the worker stopped without finishing (exit code: " + str(getattr(self.worker, "exitcode", None)) + ")")
+        if kind == "generation":
+            return(value)
+        self.finished = True
+        self.worker.join()
+        if kind == "error":
+            raise value
+        return(None)
+
+    def cancel(self):
+        """Stops the worker, a thread finishes the generation it is computing first."""
+        self.finished = True
+        self.stop.set()
+        if self.mode == "process":
+            self.worker.terminate()
+        while self.worker.is_alive():
+            try:
+                self.queue.get(timeout = 0.05)
+            except Empty:
+                pass
+        self.worker.join()
+
 
 class LSystem:
-    def __init__(self, axiom, productions,ignore = [], definitions = []):
+    def __init__(self, axiom, productions,ignore = [], definitions = [], memoSize = 0, maxModules = None, maxBytes = None, onBudget = "abort", intern = False, representation = "list"):
         self.word = stringToAxiom(axiom)
+        self.axiom = axiom
+        self.productions = productions
         self.productionRules = []
         for line in productions:
             self.productionRules.append(stringToRule(line))
         self.ignore = ignore
         self.definitions = definitions
+        self.generation = 0          # number of generations computed since the axiom
+        self.profile = None          # see enableProfiling()
+        self.checkpointFile = None   # see setCheckpointing()
+        self.checkpointInterval = 0
+        self.setMemoSize(memoSize)
+        # the maximum number of modules a single module can be replaced by
+        self.maxSuccessorLength = {}
+        for rule in self.productionRules:
+            if rule.isStochastic:
+                length = max([len(successor) for successor in rule.successor])
+            else:
+                length = len(rule.successor)
+            self.maxSuccessorLength[rule.predecessorSymbol] = max(length, self.maxSuccessorLength.get(rule.predecessorSymbol, 1))
+        self.setBudget(maxModules, maxBytes, onBudget)
+        self.predecessorSymbols = set([rule.predecessorSymbol for rule in self.productionRules])
+        self.contextual = any([rule.ruleType != rule.TYPE_OL for rule in self.productionRules])
+        # symbols for which a run of equal modules can be rewritten at once, see nextGenerationRunLength()
+        self.runSymbols = set()
+        for symbol in self.predecessorSymbols:
+            rules = [rule for rule in self.productionRules if rule.predecessorSymbol == symbol]
+            if all([rule.ruleType == rule.TYPE_OL and rule.isDeterministic() and 
+                    (rule.condition == "" or "random" not in rule.condition.symbols()) for rule in rules]):
+                self.runSymbols.add(symbol)
+        self.representation = "list"  # see setRepresentation()
+        self.chunkSize = ROPE_CHUNK_SIZE
+        self.moduleTable = None       # see setInterning()
+        self.setInterning(intern)
+        self.setRepresentation(representation)
+        self.setMinimumSize(None)
+        self.setClipping(None)
+
+    def setRepresentation(self, representation, chunkSize = ROPE_CHUNK_SIZE):
+        """Chooses how the words are stored: "list" (a list of modules), "rope" (a Rope) or "rle" (a RunLengthWord).
+
+        A rope is built from chunks of about chunkSize modules. Chunks in which no module has a
+        production rule are shared with the next generation, such that keeping earlier generations 
+        costs less than full copies. A run-length encoded word stores runs of equal modules once,
+        which saves memory and time for words with long runs (e.g. F F F F). See LSystems_words.py.
+        """
+        if representation not in ("list", "rope", "rle"):
+            raise ValueError("representation should be 'list', 'rope' or 'rle', not: " + str(representation))
+        self.representation = representation
+        self.chunkSize = chunkSize
+        self.word = self.makeWord(self.word)
+
+    def makeWord(self, modules):
+        """Returns the modules (any iterable) in the representation of this L-system."""
+        if self.representation == "rope":
+            return(ropeFromList(modules, self.chunkSize))
+        if self.representation == "rle":
+            return(runLengthEncode(modules))
+        return(list(modules))
+
+    def setInterning(self, intern):
+        """Switches the deduplication of modules on (True) or off (False).
+
+        When it is on, equal modules (same symbol and parameters), within and across
+        generations, are the same object (see ModuleTable). This saves memory when many 
+        modules are equal, e.g. !(w), &(a0) and /(137.5) in the branches of a tree.
+        """
+        if intern and self.moduleTable is None:
+            self.moduleTable = ModuleTable()
+            self.word = self.makeWord(self.moduleTable.internWord(self.word))
+        elif not intern:
+            self.moduleTable = None
+
+    def internStatistics(self):
+        """Returns the statistics of the deduplication of modules (None if it is off)."""
+        if self.moduleTable is None:
+            return(None)
+        return(self.moduleTable.statistics())
+
+    def setMinimumSize(self, minimumSize, sizeParameters = {}):
+        """Stops rewriting modules that are smaller than minimumSize (None rewrites all modules).
+
+        sizeParameters maps symbols to the index of the parameter that is their size, e.g. 
+        {"A": 0, "F": 0} for A(s) and F(s). A module of such a symbol whose size is below 
+        minimumSize is kept as it is, such that every branch stops growing at its own depth 
+        instead of after a global number of iterations (see growToMinimumSize).
+        """
+        self.minimumSize = minimumSize
+        self.sizeParameters = dict(sizeParameters)
+
+    def isBelowMinimumSize(self, mod):
+        """Returns True if mod is smaller than the minimum size, see setMinimumSize."""
+        index = self.sizeParameters.get(mod.symbol)
+        return(index is not None and len(mod.param) > index and abs(mod.param[index]) < self.minimumSize)
+
+    def isGrowing(self):
+        """Returns True if the word contains a module with a production rule that is not below the minimum size."""
+        predecessors = self.predecessorSymbols
+        sized = self.minimumSize is not None
+        return(any(mod.symbol in predecessors and not (sized and self.isBelowMinimumSize(mod)) for mod in self.word))
+
+    def growToMinimumSize(self, maxGenerations):
+        """Computes generations until all modules are below the minimum size (see setMinimumSize), at most maxGenerations.
+
+        Returns the word, self.generation is the number of generations that were needed.
+        """
+        for j in range(0, maxGenerations):
+            if self.budgetExceeded or not self.isGrowing():
+                break
+            self.nextGeneration()
+        return(self.word)
+
+    def isKept(self, mod, position):
+        """Returns True if the module at position is not rewritten, see setMinimumSize and setClipping."""
+        if self.minimumSize is not None and self.isBelowMinimumSize(mod):
+            return(True)
+        return(self.frozen is not None and self.frozen[position])
+
+    def setClipping(self, region, delta = 90, initialAngle = 90, distance = 1, mode = "prune"):
+        """Restricts the growth to a region of the plane (None switches clipping off).
+
+        region is a rectangle (xmin, ymin, xmax, ymax) or a function inside(x, y) that returns
+        True for the points of the region. Before every generation the word is interpreted by a 2D
+        turtle (with delta, initialAngle and distance as in turtle_interpretation) and the modules 
+        that lie outside the region are handled according to mode:
+        "prune" cuts the branch from the first module outside the region up to its ] (like
+        pruning a hedge), "stop" keeps the modules outside the region but no longer rewrites them.
+        Only rectangles are part of the specification (and of checkpoints).
+        """
+        if mode not in ("prune", "stop"):
+            raise ValueError("mode should be 'prune' or 'stop', not: " + str(mode))
+        self.clipping = None if region is None else [region, delta, initialAngle, distance, mode]
+        self.frozen = None   # for "stop": True for every position of the word that is not rewritten
+
+    def applyClipping(self):
+        """Prunes the current word or determines which of its modules are not rewritten, see setClipping."""
+        self.frozen = None
+        if self.clipping is None:
+            return
+        region, delta, initialAngle, distance, mode = self.clipping
+        inside = region if callable(region) else insideRectangle(region)
+        if mode == "stop":
+            self.frozen = [not isInside for isInside in turtlePositions(self.word, inside, delta, initialAngle, distance)]
+            return
+        pruned = []
+        cut = None      # the depth of the branch that is cut
+        depth = 0
+        positions = turtlePositions(self.word, inside, delta, initialAngle, distance)
+        for mod, isInside in zip(self.word, positions):
+            if cut is None and not isInside:
+                cut = depth
+            if mod.symbol == "[":
+                depth = depth + 1
+            elif mod.symbol == "]":
+                depth = depth - 1
+                if cut is not None and depth < cut:
+                    cut = None
+            if cut is None:
+                pruned.append(mod)
+        if len(pruned) < len(self.word):
+            self.word = self.makeWord(pruned)
+
+    def setBudget(self, maxModules = None, maxBytes = None, onBudget = "abort"):
+        """Limits the size of the generations to maxModules modules and/or (approximately) maxBytes bytes.
+
+        maxBytes includes the current word, which is kept while the next generation is built.
+
+        onBudget determines what happens when the next generation does not fit:
+        "abort" raises BudgetExceeded, "stop" keeps the last generation that fits (nextGeneration
+        returns it unchanged and self.budgetExceeded becomes True). In both cases a diagnostic
+        is stored in self.budgetDiagnostic. None means no limit.
+        """
+        if onBudget not in ("abort", "stop"):
+            raise ValueError("onBudget should be 'abort' or 'stop', not: " + str(onBudget))
+        self.maxModules = maxModules
+        self.maxBytes = maxBytes
+        self.onBudget = onBudget
+        self.budgetExceeded = False
+        self.budgetDiagnostic = ""
+
+    def estimateNextSize(self):
+        """Returns an upper bound for the number of modules in the next generation.
+
+        The bound assumes every module is replaced by the longest successor of its symbol.
+        """
+        counts = {}
+        for mod in self.word:
+            counts[mod.symbol] = counts.get(mod.symbol, 0) + 1
+        return(sum([counts[symbol] * self.maxSuccessorLength.get(symbol, 1) for symbol in counts]))
+
+    def estimateModuleSize(self, sampleSize = 100):
+        """Returns an estimate of the memory use of a single module in bytes, based on a sample of the word."""
+        step = max(1, len(self.word) // sampleSize)
+        sample = self.word[::step]
+        size = 0
+        for mod in sample:
+            size = size + sys.getsizeof(mod) + sys.getsizeof(mod.__dict__) + sys.getsizeof(mod.param)
+            for par in mod.param:
+                size = size + sys.getsizeof(par)
+        # every module also costs a pointer in the list of the word
+        return(size / max(1, len(sample)) + 8)
+
+    def moduleLimit(self):
+        """Returns the budget for the next generation in modules, None if it surely fits.
+
+        maxBytes bounds the peak memory use while the next generation is built, i.e. the
+        current and the next word together.
+        """
+        limit = self.maxModules
+        if self.maxBytes is not None:
+            moduleSize = self.estimateModuleSize()
+            byteLimit = max(0, int((self.maxBytes - len(self.word) * moduleSize) / moduleSize))
+            if limit is None or byteLimit < limit:
+                limit = byteLimit
+        if limit is None or self.estimateNextSize() <= limit:
+            return(None)
+        return(limit)
+
+    def outOfBudget(self, modules, limit):
+        """Handles a generation that does not fit in the budget, returns the (unchanged) word if onBudget is "stop"."""
+        self.budgetDiagnostic = ("generation " + str(self.generation + 1) + " does not fit in the budget of " + str(limit) + 
+                                 " modules (maxModules = " + str(self.maxModules) + ", maxBytes = " + str(self.maxBytes) + 
+                                 "): " + str(modules) + " modules were computed from " + str(len(self.word)) + 
+                                 " modules, at most " + str(self.estimateNextSize()) + " modules were expected")
+        if self.onBudget == "stop":
+            self.budgetExceeded = True
+            return(self.word)
+        raise BudgetExceeded(self.budgetDiagnostic, self.generation + 1, modules, limit)
+
+    def enableProfiling(self):
+        """Starts recording timings and counters for every following generation, returns the Profile.
+
+        The profile is available as self.profile, see Profile and GenerationProfile.
+        """
+        self.profile = Profile(list(self.productions))
+        return(self.profile)
+
+    def disableProfiling(self):
+        """Stops recording timings and counters, returns the Profile recorded so far."""
+        profile = self.profile
+        self.profile = None
+        return(profile)
+
+    def setMemoSize(self, size):
+        """Enables (size > 0) or disables (size = 0) memoization in all production rules.
+
+        See Rule.setMemoSize, memoization pays off when many modules share the same parameters.
+        """
+        self.memoSize = size
+        for rule in self.productionRules:
+            rule.setMemoSize(size)
+
+    def memoStatistics(self):
+        """Returns a list with the memo statistics of every production rule (in order)."""
+        return([rule.memoStatistics() for rule in self.productionRules])
 
     def nextGeneration(self):
         """Computes and returns the next generation as a list of modules. """
+        if self.profile is not None:
+            return(self.nextGenerationProfiled())
+        if self.representation == "rope":
+            return(self.nextGenerationRope())
+        if self.representation == "rle":
+            return(self.nextGenerationRunLength())
+        if self.budgetExceeded:
+            return(self.word)
+        self.applyClipping()
+        limit = self.moduleLimit()
+        moduleTable = self.moduleTable
+        keeping = self.minimumSize is not None or self.frozen is not None
         new_word = []
         for i in range(0,len(self.word)):
             mod = self.word[i]
+            if keeping and self.isKept(mod, i):
+                new_word.append(mod)
+                continue
             left_context = findLeftContext(self.word, i, self.ignore)
             right_context = findRightContext(self.word, i, self.ignore)
             foundOne = False
             for rule in self.productionRules: #find an applicable rule
                 if rule.isApplicable(left_context, mod, right_context):
-                    new_word = new_word + rule.getReplacement(left_context, mod, right_context,self.definitions)
+                    if moduleTable is None:
+                        new_word.extend(rule.getReplacement(left_context, mod, right_context,self.definitions))
+                    else:
+                        new_word.extend(map(moduleTable.intern, rule.getReplacement(left_context, mod, right_context,self.definitions)))
                     foundOne = True
                     break
             if not foundOne: #then no replacement will occur
-                new_word = new_word + [mod]
+                new_word.append(mod)
+            if limit is not None and len(new_word) > limit:
+                return(self.outOfBudget(len(new_word), limit))
         self.word = new_word 
+        self.generation = self.generation + 1
+        self.checkpointIfDue()
+        return(self.word)
+
+    def nextGenerationProfiled(self):
+        """Same as nextGeneration, but records the timings and counters in self.profile."""
+        if self.budgetExceeded:
+            return(self.word)
+        clock = time.perf_counter
+        stats = GenerationProfile(self.generation + 1, len(self.productionRules))
+        start = clock()
+        self.applyClipping()
+        limit = self.moduleLimit()
+        keeping = self.minimumSize is not None or self.frozen is not None
+        new_word = []
+        for i in range(0,len(self.word)):
+            mod = self.word[i]
+            if keeping and self.isKept(mod, i):
+                new_word.append(mod)
+                stats.unchanged += 1
+                continue
+            t0 = clock()
+            left_context = findLeftContext(self.word, i, self.ignore)
+            right_context = findRightContext(self.word, i, self.ignore)
+            t1 = clock()
+            stats.contextTime += t1 - t0
+            conditionTime = 0
+            replacement = None
+            for r in range(0, len(self.productionRules)): #find an applicable rule
+                rule = self.productionRules[r]
+                if rule.predecessorSymbol != mod.symbol:
+                    continue
+                t2 = clock()
+                condition = rule.checkCondition(left_context, mod, right_context)
+                conditionTime += clock() - t2
+                if not condition:
+                    stats.conditionFailures[r] += 1
+                elif rule.matchesContext(left_context, right_context):
+                    t3 = clock()
+                    stats.matchingTime += t3 - t1 - conditionTime
+                    replacement = rule.getReplacement(left_context, mod, right_context,self.definitions)
+                    t1 = clock()
+                    stats.successorTime += t1 - t3
+                    stats.ruleHits[r] += 1
+                    if self.moduleTable is not None:
+                        replacement = self.moduleTable.internWord(replacement)
+                    break
+            if replacement is None: #then no replacement will occur
+                replacement = [mod]
+                t3 = clock()
+                stats.matchingTime += t3 - t1 - conditionTime
+                t1 = t3
+                stats.unchanged += 1
+            stats.conditionTime += conditionTime
+            new_word.extend(replacement)
+            stats.assemblyTime += clock() - t1
+            if limit is not None and len(new_word) > limit:
+                return(self.outOfBudget(len(new_word), limit))
+        self.word = self.makeWord(new_word)
+        self.generation = self.generation + 1
+        for mod in self.word:
+            stats.moduleCounts[mod.symbol] = stats.moduleCounts.get(mod.symbol, 0) + 1
+        stats.totalTime = clock() - start
+        self.profile.generations.append(stats)
+        self.checkpointIfDue()
+        return(self.word)
+
+    def nextGenerationRope(self):
+        """Same as nextGeneration for words stored as a Rope (see setRepresentation).
+
+        The new word is assembled in chunks, chunks of the current word in which no module 
+        has a production rule are shared instead of copied.
+        """
+        if self.budgetExceeded:
+            return(self.word)
+        self.applyClipping()
+        limit = self.moduleLimit()
+        word = self.word
+        moduleTable = self.moduleTable
+        predecessors = self.predecessorSymbols
+        keeping = self.minimumSize is not None or self.frozen is not None
+        left_context = right_context = None   # only computed when a rule needs context
+        chunks = []
+        new_chunk = []
+        size = 0        # number of modules in chunks
+        position = 0    # position of mod in word
+        for chunk in word.chunks():
+            if not any(mod.symbol in predecessors and not (keeping and self.isKept(mod, position + k)) for k, mod in enumerate(chunk)):
+                if new_chunk != []:
+                    chunks.append(new_chunk)
+                    size = size + len(new_chunk)
+                    new_chunk = []
+                chunks.append(chunk)
+                size = size + len(chunk)
+                position = position + len(chunk)
+                if limit is not None and size > limit:
+                    return(self.outOfBudget(size, limit))
+                continue
+            for mod in chunk:
+                foundOne = False
+                if mod.symbol in predecessors and not (keeping and self.isKept(mod, position)):
+                    if self.contextual:
+                        left_context = findLeftContext(word, position, self.ignore)
+                        right_context = findRightContext(word, position, self.ignore)
+                    for rule in self.productionRules: #find an applicable rule
+                        if rule.isApplicable(left_context, mod, right_context):
+                            if moduleTable is None:
+                                new_chunk.extend(rule.getReplacement(left_context, mod, right_context,self.definitions))
+                            else:
+                                new_chunk.extend(map(moduleTable.intern, rule.getReplacement(left_context, mod, right_context,self.definitions)))
+                            foundOne = True
+                            break
+                if not foundOne: #then no replacement will occur
+                    new_chunk.append(mod)
+                position = position + 1
+                if len(new_chunk) >= self.chunkSize:
+                    chunks.append(new_chunk)
+                    size = size + len(new_chunk)
+                    new_chunk = []
+                if limit is not None and size + len(new_chunk) > limit:
+                    return(self.outOfBudget(size + len(new_chunk), limit))
+        chunks.append(new_chunk)
+        self.word = ropeFromChunks(chunks)
+        self.generation = self.generation + 1
+        self.checkpointIfDue()
         return(self.word)
 
+    def nextGenerationRunLength(self):
+        """Same as nextGeneration for run-length encoded words (see setRepresentation).
+
+        A run of k equal modules is rewritten once if all rules of its symbol are context-free and
+        deterministic, the successor is then repeated k times. Other runs are rewritten module by module.
+        """
+        if self.budgetExceeded:
+            return(self.word)
+        self.applyClipping()
+        limit = self.moduleLimit()
+        word = self.word
+        moduleTable = self.moduleTable
+        predecessors = self.predecessorSymbols
+        left_context = right_context = None   # only computed when a rule needs context
+        sized = self.minimumSize is not None
+        frozen = self.frozen
+        new_word = RunLengthWord()
+        position = 0    # position of mod in word
+        for mod, count in word.runs():
+            if (mod.symbol not in predecessors or (sized and self.isBelowMinimumSize(mod)) or 
+                (frozen is not None and all(frozen[position:(position + count)]))):
+                new_word.append(mod, count)
+            elif mod.symbol in self.runSymbols and (frozen is None or not any(frozen[position:(position + count)])):
+                replacement = [mod]
+                for rule in self.productionRules: #find an applicable rule
+                    if rule.isApplicable(None, mod, None):
+                        replacement = rule.getReplacement(None, mod, None, self.definitions)
+                        if moduleTable is not None:
+                            replacement = moduleTable.internWord(replacement)
+                        break
+                runs = runLengthEncode(replacement)
+                if len(runs.modules) == 1:
+                    new_word.append(runs.modules[0], runs.counts[0] * count)
+                else:
+                    for k in range(0, count):
+                        new_word.extend(runs)
+                        if limit is not None and len(new_word) > limit:
+                            return(self.outOfBudget(len(new_word), limit))
+            else:
+                for k in range(0, count):
+                    if frozen is not None and frozen[position + k]:
+                        new_word.append(mod)
+                        continue
+                    if self.contextual:
+                        left_context = findLeftContext(word, position + k, self.ignore)
+                        right_context = findRightContext(word, position + k, self.ignore)
+                    foundOne = False
+                    for rule in self.productionRules: #find an applicable rule
+                        if rule.isApplicable(left_context, mod, right_context):
+                            for new_mod in rule.getReplacement(left_context, mod, right_context,self.definitions):
+                                if moduleTable is not None:
+                                    new_mod = moduleTable.intern(new_mod)
+                                new_word.append(new_mod)
+                            foundOne = True
+                            break
+                    if not foundOne: #then no replacement will occur
+                        new_word.append(mod)
+            position = position + count
+            if limit is not None and len(new_word) > limit:
+                return(self.outOfBudget(len(new_word), limit))
+        self.word = new_word
+        self.generation = self.generation + 1
+        self.checkpointIfDue()
+        return(self.word)
+
+    def streamNextGeneration(self):
+        """Yields the modules of the next generation one by one, without storing the next generation.
+
+        The L-system is not advanced: self.word remains the current generation. The modules can 
+        be passed directly to a turtle interpretation, such that only the current generation has 
+        to fit in memory. Budgets, profiling and checkpoints do not apply to the streamed generation.
+        """
+        self.applyClipping()
+        word = self.word
+        moduleTable = self.moduleTable
+        predecessors = self.predecessorSymbols
+        left_context = right_context = None   # only computed when a rule needs context
+        keeping = self.minimumSize is not None or self.frozen is not None
+        position = 0    # position of mod in word
+        for mod in word:
+            replacement = [mod]
+            if mod.symbol in predecessors and not (keeping and self.isKept(mod, position)):
+                if self.contextual:
+                    left_context = findLeftContext(word, position, self.ignore)
+                    right_context = findRightContext(word, position, self.ignore)
+                for rule in self.productionRules: #find an applicable rule
+                    if rule.isApplicable(left_context, mod, right_context):
+                        replacement = rule.getReplacement(left_context, mod, right_context,self.definitions)
+                        if moduleTable is not None:
+                            replacement = moduleTable.internWord(replacement)
+                        break
+            for new_mod in replacement:
+                yield new_mod
+            position = position + 1
+
+    def streamGeneration(self, generation):
+        """Computes the generations up to generation - 1 and returns an iterator over the modules of 'generation'.
+
+        The last generation is streamed (see streamNextGeneration), e.g.:
+            turtle_interpretation(system.streamGeneration(nrOfIterations), delta, initial)
+        rewrites and draws the last generation at the same time.
+        """
+        if generation < self.generation:
+            raise ValueError("generation " + str(generation) + " was already computed, the current generation is " + str(self.generation))
+        while self.generation < generation - 1 and not self.budgetExceeded:
+            self.nextGeneration()
+        if generation == self.generation or self.budgetExceeded:
+            return(iter(self.word))
+        return(self.streamNextGeneration())
+
+    def produceGenerations(self, nrOfGenerations, every = 1, queueSize = 2, mode = "thread"):
+        """Computes the next nrOfGenerations generations in the background, returns a GenerationProducer.
+
+        Every 'every'-th generation, starting with the first one, is put in a queue of at most
+        queueSize generations, from which the consumer takes them at its own pace:
+            with system.produceGenerations(200, every = 5) as producer:
+                for generation, word in producer:
+                    visualisation.drawGeneration(word)
+        With mode "thread" the L-system itself computes the generations (the L-system should not be
+        used elsewhere in the meantime). With mode "process" a copy of the L-system is made in another 
+        process, which computes in parallel with the consumer, this L-system is not advanced.
+        """
+        return(GenerationProducer(self, nrOfGenerations, every, queueSize, mode))
+
+    def specification(self):
+        """Returns the grammar and settings of the L-system as a dictionary, see systemFromSpecification."""
+        return({"axiom": self.axiom,
+                "productions": self.productions,
+                "ignore": self.ignore,
+                "definitions": self.definitions,
+                "memoSize": self.memoSize,
+                "intern": self.moduleTable is not None,
+                "representation": [self.representation, self.chunkSize],
+                "budget": [self.maxModules, self.maxBytes, self.onBudget],
+                "minimumSize": [self.minimumSize, self.sizeParameters],
+                "clipping": None if self.clipping is None or callable(self.clipping[0]) else list(self.clipping)})
+
+    def setWord(self, modules, generation):
+        """Replaces the current word by modules (any iterable), e.g. to continue from a saved generation."""
+        if self.moduleTable is not None:
+            modules = self.moduleTable.internWord(modules)
+        self.word = self.makeWord(modules)
+        self.generation = generation
+
+    def setCheckpointing(self, filename, interval):
+        """Saves a checkpoint every 'interval' generations (interval = 0 switches checkpointing off).
+
+        filename may contain '{generation}', which is replaced by the generation number 
+        (e.g. "anabaena_{generation}.ckpt"), otherwise every checkpoint overwrites the previous one.
+        """
+        self.checkpointFile = filename
+        self.checkpointInterval = interval
+
+    def checkpointIfDue(self):
+        """Saves a checkpoint if checkpointing is on and the current generation is a multiple of the interval."""
+        if self.checkpointInterval > 0 and self.generation % self.checkpointInterval == 0:
+            self.saveCheckpoint(self.checkpointFile.format(generation = self.generation))
+
+    def saveCheckpoint(self, filename, chunkSize = 10000):
+        """Saves the full state of the L-system to filename, see loadCheckpoint.
+
+        The state consists of the grammar (axiom, productions, ignore, definitions and settings),
+        the generation counter, the state of the random generator and the current word. 
+        The word is written in chunks of chunkSize modules, such that saving a large word does not
+        need a copy of it in memory. The file is first written under a temporary name, a crash 
+        during saving therefore never damages an earlier checkpoint with the same name.
+        """
+        header = {"format": CHECKPOINT_FORMAT,
+                  "version": CHECKPOINT_VERSION,
+                  "generation": self.generation,
+                  "random": getstate(),
+                  "modules": len(self.word)}
+        header.update(self.specification())
+        tmpFilename = filename + ".tmp"
+        with gzip.open(tmpFilename, "wt", encoding = "utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for start in range(0, len(self.word), chunkSize):
+                chunk = [moduleToJSON(mod) for mod in self.word[start:(start + chunkSize)]]
+                f.write(json.dumps(chunk, separators = (",", ":")) + "\n")
+        os.replace(tmpFilename, filename)
+
 
 
 ########################################
@@ -330,6 +1266,225 @@ def stringToRule(string):
         probs, successor = stringToSuccessor(productionRule[2])
         return(Rule(rule_type, predecessor[0], predecessor[1], predecessor[2], productionRule[1], successor, probs))
 
+########################################
+#     COMMON SUBEXPRESSION ELIMINATION #
+########################################
+def subexpressionSpans(tokens):
+    """Returns (start, end) of every subexpression with an operator in a list of tokens (postfix order).
+
+    Malformed postfix (e.g. from 2^-y, which the parser accepts but cannot evaluate) has no
+    spans, such that its expression is left as it is and fails only when it is evaluated.
+    """
+    stack = []
+    spans = []
+    for i in range(0, len(tokens)):
+        type_ = tokens[i].type_
+        if type_ == TNUMBER or type_ == TVAR:
+            stack.append(i)
+        else:
+            operands = 1 if type_ == TOP1 else 2 # binary operators and function calls take two operands
+            if len(stack) < operands:
+                return([])
+            del stack[len(stack) - operands + 1:]
+            spans.append((stack[-1], i + 1))
+    if len(stack) != 1:
+        return([])
+    return(spans)
+
+def subexpressionKey(tokens, start, end):
+    """Returns a hashable key for tokens[start:end], None if the subexpression may not be shared."""
+    if tokens[end - 1].type_ == TOP2 and tokens[end - 1].index_ == ",": # argument lists are built in place
+        return(None)
+    key = []
+    for i in range(start, end):
+        token = tokens[i]
+        if token.type_ == TVAR and token.index_ == "random":
+            return(None)
+        key.append((token.type_, token.index_, repr(token.number_)))
+    return(tuple(key))
+
+def eliminateCommonSubexpressions(expressions):
+    """Replaces subexpressions that occur more than once in a list of expressions by temporary variables.
+
+    Returns the list of rewritten expressions and a list of [name, expression] for the temporaries.
+    The largest shared subexpression is replaced first, therefore the temporaries can be evaluated
+    in reverse order. The returned list of temporaries is in that (evaluation) order.
+    """
+    listOfTokens = [list(expr.tokens) for expr in expressions]
+    temporaries = []
+    while True:
+        counts = {}
+        for tokens in listOfTokens + [item[1] for item in temporaries]:
+            for start, end in subexpressionSpans(tokens):
+                key = subexpressionKey(tokens, start, end)
+                if key is not None:
+                    counts[key] = counts.get(key, 0) + 1
+        repeated = [key for key in counts if counts[key] > 1]
+        if repeated == []:
+            break
+        shared = max(repeated, key = len)
+        name = "#" + str(len(temporaries))
+        definition = None
+        for tokens in listOfTokens + [item[1] for item in temporaries]:
+            # identical subexpressions never overlap, so replace from right to left
+            # and skip the spans inside a part that has just been replaced
+            limit = len(tokens)
+            for start, end in reversed(subexpressionSpans(tokens)):
+                if end <= limit and end - start == len(shared) and subexpressionKey(tokens, start, end) == shared:
+                    definition = tokens[start:end]
+                    tokens[start:end] = [Token(TVAR, name, 0, 0)]
+                    limit = start
+        temporaries.append([name, definition])
+    parser = Parser()
+    newExpressions = []
+    for i in range(0, len(expressions)):
+        newExpressions.append(Expression(listOfTokens[i], expressions[i].ops1, expressions[i].ops2, expressions[i].functions))
+    listOfTemporaries = []
+    for name, tokens in reversed(temporaries):
+        listOfTemporaries.append([name, Expression(tokens, parser.ops1, parser.ops2, parser.functions)])
+    return(newExpressions, listOfTemporaries)
+
+def requiredTemporaries(expressions, temporaries, order):
+    """Returns the names of the temporaries needed to evaluate a list of expressions, in evaluation order."""
+    required = set()
+    todo = list(expressions)
+    while todo != []:
+        expr = todo.pop()
+        for name in expr.symbols():
+            if name in temporaries and name not in required:
+                required.add(name)
+                todo.append(temporaries[name])
+    return([name for name in order if name in required])
+
+########################################
+#             CHECKPOINTS              #
+########################################
+CHECKPOINT_FORMAT  = "LSystems checkpoint"
+CHECKPOINT_VERSION = 1
+
+def moduleToJSON(mod):
+    """Returns a module as a JSON compatible object: the symbol, or [symbol, parameters] if it has parameters."""
+    if mod.param != []:
+        return([mod.symbol, mod.param])
+    else:
+        return(mod.symbol)
+
+def moduleFromJSON(obj):
+    """Inverse of moduleToJSON."""
+    if isinstance(obj, list):
+        return(Module(obj[0], obj[1]))
+    else:
+        return(Module(obj, []))
+
+def loadCheckpoint(filename, restoreRandom = True):
+    """Returns the L-system saved with LSystem.saveCheckpoint in filename.
+
+    If restoreRandom is True the state of the random generator is restored as well,
+    such that the following generations are identical to those of the saved L-system.
+    Checkpointing and profiling are not restored.
+    """
+    with gzip.open(filename, "rt", encoding = "utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != CHECKPOINT_FORMAT:
+            raise ValueError(filename + " is not an L-system checkpoint")
+        if header["version"] > CHECKPOINT_VERSION:
+            raise ValueError(filename + " has checkpoint version " + str(header["version"]) + 
+                             ", this module only reads up to version " + str(CHECKPOINT_VERSION))
+        system = systemFromSpecification(header)
+        word = []
+        for line in f:
+            word.extend([moduleFromJSON(obj) for obj in json.loads(line)])
+    if len(word) != header["modules"]:
+        raise ValueError(filename + " is incomplete: " + str(len(word)) + " of " + str(header["modules"]) + " modules")
+    system.setWord(word, header["generation"])
+    if restoreRandom:
+        version, internalState, gaussNext = header["random"]
+        setstate((version, tuple(internalState), gaussNext))
+    return(system)
+
+def systemFromSpecification(specification):
+    """Returns a new L-system (at the axiom) with the grammar and settings of LSystem.specification()."""
+    maxModules, maxBytes, onBudget = specification["budget"]
+    system = LSystem(specification["axiom"], specification["productions"], specification["ignore"], specification["definitions"], 
+                     specification["memoSize"], maxModules, maxBytes, onBudget, specification.get("intern", False))
+    representation, chunkSize = specification.get("representation", ["list", ROPE_CHUNK_SIZE])
+    system.setRepresentation(representation, chunkSize)
+    system.setMinimumSize(*specification.get("minimumSize", [None, {}]))
+    if specification.get("clipping") is not None:
+        system.setClipping(*specification["clipping"])
+    return(system)
+
+########################################
+#        BACKGROUND GENERATIONS        #
+########################################
+def produceGenerations(system, nrOfGenerations, every, queue, stop):
+    """Computes generations and puts them in queue until stop is set, the worker of GenerationProducer."""
+    try:
+        for j in range(0, nrOfGenerations):
+            word = system.nextGeneration()
+            if j % every == 0:
+                if not putUnlessStopped(queue, ("generation", (system.generation, word)), stop):
+                    return
+            if stop.is_set():
+                return
+        putUnlessStopped(queue, ("done", None), stop)
+    except Exception as error:
+        putUnlessStopped(queue, ("error", error), stop)
+
+def produceGenerationsInProcess(specification, word, generation, randomState, nrOfGenerations, every, queue, stop):
+    """Same as produceGenerations for a copy of an L-system in another process."""
+    system = systemFromSpecification(specification)
+    system.setWord(word, generation)
+    setstate(randomState)
+    produceGenerations(system, nrOfGenerations, every, queue, stop)
+
+def putUnlessStopped(queue, item, stop):
+    """Puts item in queue, waiting while the queue is full. Returns False if stop is set before that."""
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout = 0.1)
+            return(True)
+        except Full:
+            pass
+    return(False)
+
+########################################
+#               CLIPPING               #
+########################################
+def turtlePositions(word, inside, delta = 90, initialAngle = 90, distance = 1):
+    """Interprets the word with a 2D turtle and yields for every module whether it lies inside the region.
+
+    A move (F or f) lies inside if the point where it ends does, other modules if the
+    current position of the turtle does. See setClipping in LSystem.
+    """
+    x = 0.0
+    y = 0.0
+    heading = initialAngle
+    stack = []
+    isInside = inside(x, y)
+    for mod in word:
+        symbol = mod.symbol
+        if symbol[0] == "F" or symbol == "f":
+            step = distance if mod.param == [] else float(mod.param[0])
+            angle = math.radians(heading % 360)
+            x = x + step * math.cos(angle)
+            y = y + step * math.sin(angle)
+            isInside = inside(x, y)
+        elif symbol == "+":
+            heading = heading + (delta if mod.param == [] else mod.param[0])
+        elif symbol == "-":
+            heading = heading - (delta if mod.param == [] else mod.param[0])
+        elif symbol == "[":
+            stack.append((x, y, heading, isInside))
+        elif symbol == "]" and stack != []:
+            x, y, heading, isInside = stack.pop()
+        yield isInside
+
+def insideRectangle(rectangle):
+    """Returns a function inside(x, y) for the rectangle (xmin, ymin, xmax, ymax)."""
+    xmin, ymin, xmax, ymax = rectangle
+    return(lambda x, y: xmin <= x <= xmax and ymin <= y <= ymax)
+
 ########################################
 #             FIND CONTEXT             #
 ########################################
@@ -342,15 +1497,16 @@ def findLeftContext(tree, start, ignore):
     nrOfOpeningBrs = 0
     firstPass = True
     for currentIndex in range(start-1,-1,-1):
-        if tree[currentIndex].symbol in ignore:
+        mod = tree[currentIndex]   # a single lookup, tree can also be a Rope or RunLengthWord
+        if mod.symbol in ignore:
             continue
-        elif tree[currentIndex].symbol == "[":
+        elif mod.symbol == "[":
             if not firstPass:
                 nrOfOpeningBrs = nrOfOpeningBrs + 1
-        elif tree[currentIndex].symbol == "]":
+        elif mod.symbol == "]":
             nrOfClosingBrs = nrOfClosingBrs + 1
         elif nrOfClosingBrs == nrOfOpeningBrs:
-            return(tree[currentIndex])
+            return(mod)
         firstPass = False
     return(emptyModule())
 
@@ -369,17 +1525,18 @@ def findRightContext(tree,start,ignore):
     firstPass = True
     if start+1 < len(tree):
         for currentIndex in range(start+1,len(tree)):
-            if tree[currentIndex].symbol in ignore:
+            mod = tree[currentIndex]   # a single lookup, tree can also be a Rope or RunLengthWord
+            if mod.symbol in ignore:
                 continue
-            elif tree[currentIndex].symbol == "]":
+            elif mod.symbol == "]":
                 if firstPass:
                     return(emptyModule())
                 else:
                     nrOfClosingBrs = nrOfClosingBrs + 1
-            elif tree[currentIndex].symbol == "[":
+            elif mod.symbol == "[":
                 nrOfOpeningBrs = nrOfClosingBrs + 1
             elif nrOfOpeningBrs == nrOfClosingBrs:
-                return tree[currentIndex]
+                return mod
             firstPass = False
     else:
         return(emptyModule())
@@ -400,14 +1557,18 @@ def printListOfMods(tree):
 def printGeneration(tree):
     """Prints the modules of a tree one after the other on the same line.
 
-    INPUT: list of modules
+    The line is printed at once. To write a generation to a file (in a form that
+    can be read back) use writeGeneration in LSystems_io.py.
+
+    INPUT: list (or any iterable) of modules
     """
+    pieces = []
     for mod in tree:
         if mod.param != []:
-            print(str(mod.symbol) + str(mod.param).replace("[","(").replace("]",")"),end="")
+            pieces.append(str(mod.symbol) + str(mod.param).replace("[","(").replace("]",")"))
         else:
-            print(str(mod.symbol),end="")
-    print("")
+            pieces.append(str(mod.symbol))
+    print("".join(pieces))
 
 def emptyModule():
     """ Returns an empty module."""
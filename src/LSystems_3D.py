@@ -14,18 +14,57 @@ to see a few cases (trees and shrubs).
 INSTALLATION: Put this file somewhere where Python can see it (e.g. in the 
               working directory.)
 
-DEPENDENCIES: This module depends on LSystems.py and VPython.
+DEPENDENCIES: This module depends on LSystems.py, LSystems_grammars.py, LSystems_cache.py 
+              and VPython.
               VPython: https://vpython.org/ 
               
 
 OVERVIEW:     This module contains a few examples that illustrate the use of a 
-              3D turtle graphics class applied to L-systems.
+              3D turtle graphics class applied to L-systems. The turtle records its
+              curves and polygons in a Geometry3D, which is drawn afterwards and can
+              be kept in a GeometryCache (see LSystems_cache.py) to draw it again.
 """
 from vpython import vertex, vector, curve, triangle, canvas, cross, norm, mag, radians, box, color, distant_light
 from LSystems import LSystem
+from LSystems_grammars import EXAMPLES_3D
+from LSystems_cache import isCacheable
 import os
+import sys
+
+class Geometry3D:
+    """Geometry3D holds what a Turtle3D draws: curves, triangles and the bounding box of the moves.
+
+    Every curve is a list of points, a point is a dictionary with its pos, color and radius.
+    Every triangle is a list of three (pos, color) pairs. bounds is (xmin, ymin, zmin, xmax,
+    ymax, zmax) of the positions after every F.
+    """
+    def __init__(self):
+        self.curves    = []
+        self.triangles = []
+        self.bounds    = (0, 0, 0, 0, 0, 0)
+
+    def size(self):
+        """Returns the memory use in bytes (see GeometryCache), objects that are shared (e.g. colors) are counted once."""
+        objects = {}
+        for points in self.curves:
+            objects[id(points)] = points
+            for point in points:
+                objects[id(point)] = point
+                for value in point.values():
+                    objects[id(value)] = value
+        for corners in self.triangles:
+            objects[id(corners)] = corners
+            for corner in corners:
+                objects[id(corner)] = corner
+                for value in corner:
+                    objects[id(value)] = value
+        size = sys.getsizeof(self.curves) + sys.getsizeof(self.triangles)
+        for obj in objects.values():
+            size = size + sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, "__dict__") else 0)
+        return(size)
 
 class Turtle3D:
+    """A 3D turtle, its curves and polygons are recorded in self.geometry (a Geometry3D), see draw_geometry_3D."""
     def __init__(self, pos=vector(0,0,0), heading = vector(0,1,0), leftDirection = vector(-1,0,0), upDirection = vector(0,0,1), width = 1):
         self.position        = pos
         self.heading         = heading
@@ -39,9 +78,10 @@ class Turtle3D:
         self.width           = width
         self.polygon         = False
         self.currentColor    = vector(151/255,75/255,0)
+        self.geometry        = Geometry3D()
         keys = ['pos', 'color' ,'radius']
         values = [self.position, self.currentColor, self.width]
-        self.c               = curve(dict(zip(keys, values)))
+        self.c               = self.newCurve(dict(zip(keys, values)))
         
     def forward(self, distance = 1):
         self.position = self.position + distance * norm(self.heading)
@@ -95,7 +135,13 @@ class Turtle3D:
         keys = ['pos', 'color' ,'radius']
         values = [self.position, self.currentColor, self.width]
         new_pos = dict(zip(keys, values))
-        self.c = curve(new_pos)
+        self.c = self.newCurve(new_pos)
+
+    def newCurve(self, point):
+        """Starts a new curve at point (a dictionary with pos, color and radius) and returns it."""
+        points = [point]
+        self.geometry.curves.append(points)
+        return(points)
     
     def setHeading(self,heading):
         self.heading       = heading[0]
@@ -119,7 +165,7 @@ class Turtle3D:
         keys = ['pos', 'color', 'radius']
         values = [self.position, self.currentColor, self.width]
         new_pos = dict(zip(keys, values))
-        self.c = curve(new_pos)
+        self.c = self.newCurve(new_pos)
     
     def popCurve(self):
         self.c = self.curveStack.pop(0)
@@ -144,9 +190,9 @@ class Turtle3D:
         """
         self.polygon = False
         for i in range(2,len(self.listOfVectors)):
-            triangle(vs = [vertex(pos = self.listOfVectors[0], color = self.currentColor), 
-                           vertex(pos = self.listOfVectors[i-1],color = self.currentColor), 
-                           vertex(pos = self.listOfVectors[i],color = self.currentColor)])
+            self.geometry.triangles.append([(self.listOfVectors[0], self.currentColor), 
+                                            (self.listOfVectors[i-1], self.currentColor), 
+                                            (self.listOfVectors[i], self.currentColor)])
         self.listOfVectors = []
         
     def setColor(self, rgb):
@@ -156,12 +202,32 @@ class Turtle3D:
         correction = tropismStrength * cross(norm(self.heading),tropismVec)
         self.heading +=  self.heading.rotate(mag(correction),correction)
 
-    def drawGround(self, size):
+    @staticmethod
+    def drawGround(size):
         box(pos=vector(0,0,0), length=size, height=-size/100, width=size, color = vector(10/255,85/255,0))
     
 
-def turtle_interpretation_3D(scene, instructions, delta = 22.5, width = 0.3, widthScaling = 0.7, tropismVec = vector(0,0,0), tropismStrength = 0):
-    """Interprets a set of instructions for a turtle to draw a tree in 3D. """    
+def turtle_interpretation_3D(scene, instructions, delta = 22.5, width = 0.3, widthScaling = 0.7, tropismVec = vector(0,0,0), tropismStrength = 0, cache = None):
+    """Interprets a set of instructions for a turtle to draw a tree in 3D.
+
+    instructions can be any iterable of modules, e.g. a generation or LSystem.streamGeneration().
+    With a cache (a GeometryCache, see LSystems_cache.py) the geometry of a word (not a stream)
+    is stored, such that drawing the same word with the same parameters again skips the turtle.
+    """
+    geometry = None
+    key = None
+    if cache is not None and isCacheable(instructions):
+        key = cache.geometryKey(instructions, "3D", delta, width, widthScaling, (tropismVec.x, tropismVec.y, tropismVec.z), tropismStrength)
+        geometry = cache.lookup(key)
+    if geometry is None:
+        geometry = turtle_geometry_3D(instructions, delta, width, widthScaling, tropismVec, tropismStrength)
+        if key is not None:
+            cache.store(key, geometry, geometry.size())
+    draw_geometry_3D(scene, geometry)
+    return 0
+
+def turtle_geometry_3D(instructions, delta = 22.5, width = 0.3, widthScaling = 0.7, tropismVec = vector(0,0,0), tropismStrength = 0):
+    """Interprets a set of instructions for a 3D turtle and returns what it draws as a Geometry3D."""
     ############ INITIALIZATION #############
     bob = Turtle3D(width = width)
     
@@ -248,14 +314,25 @@ def turtle_interpretation_3D(scene, instructions, delta = 22.5, width = 0.3, wid
             bob.endPolygon()
         elif mod.symbol == "'":
             bob.setColor(mod.param)
-    
+    bob.geometry.bounds = (turtleXmin, turtleYmin, turtleZmin, turtleXmax, turtleYmax, turtleZmax)
+    return(bob.geometry)
+
+def draw_geometry_3D(scene, geometry):
+    """Draws a Geometry3D (see turtle_geometry_3D) with a ground plane and lights in scene."""
+    for points in geometry.curves:
+        c = curve(points[0])
+        for point in points[1:]:
+            c.append(point)
+    for corners in geometry.triangles:
+        triangle(vs = [vertex(pos = pos, color = rgb) for pos, rgb in corners])
+    turtleXmin, turtleYmin, turtleZmin, turtleXmax, turtleYmax, turtleZmax = geometry.bounds
     #point the camera to the center of our drawing
     xcenter = 0
     ycenter = (turtleYmax+turtleYmin)/2
     zcenter = 0
     scene.center=vector(xcenter,ycenter,zcenter)
     # draw a ground plane
-    bob.drawGround(max(turtleXmax,turtleZmax)*2)
+    Turtle3D.drawGround(max(turtleXmax,turtleZmax)*2)
     # set lighting
     scene.lights = [] # reset default lighting
     scene.ambient=color.gray(0.3)
@@ -263,7 +340,6 @@ def turtle_interpretation_3D(scene, instructions, delta = 22.5, width = 0.3, wid
     distant_light(direction=vector(-0.88, -0.22, -0.44), color=color.gray(0.3))
     distant_light(direction=vector(-0.22, -0.44, -0.88), color=color.gray(0.7))
     distant_light(direction=vector(0.88, 0.22, 0.44), color=color.gray(0.3))
-    return 0
 
 if __name__ == "__main__":
     print("")
@@ -289,64 +365,15 @@ if __name__ == "__main__":
         except ValueError:
             print("That is not a valid choice, try again: ")
             continue #start again at the top of the while loop
-        if choice == 0: #shrub with leaves
-            axiom = "A"    
-            productions = ["A?'(151,75,0) [ & F L ! A ] / / / / / '(151,75,0) [ & F L ! A ] / / / / / / / '(151,75,0) [ & F L ! A ]", 
-                       "F?S / / / / / F",
-                       "S?F L",
-                       "L?[ '(12,102,0) ^ ^ { - f + f + f - | - f + f + f } ]"]
-            nrOfIterations = 7
-            width = 1
-            definitions = []
-            tropismVector   = vector(0,0,0)
-            tropismStrength = 0
-        elif choice == 1: #simple tree 1
-            axiom = "A(10,1)"
-            productions = ["A(l,w)?!(w) F(l) [ &(a0) B(l*r2,w*wr) ] /(137.5) A(l*r1,w*wr)", 
-                       "B(l,w)?!(w) F(l) [ -(a2) $ C(l*r2,w*wr) ] C(l*r1,w*wr)",
-                       "C(l,w)?!(w) F(l) [ +(a2) $ B(l*r2,w*wr) ] B(l*r1,w*wr)"] 
-            nrOfIterations = 10
-            width = 1
-            definitions = [['r1', 0.9],
-                          ['r2', 0.6],
-                          ['a0', 45],
-                          ['a2', 45],
-                          ['d', 137.5],
-                          ['wr', 0.707]
-                          ]
-            tropismVector   = vector(0,0,0)
-            tropismStrength = 0
-        elif choice == 2: #simple tree 2
-            axiom = "A(10,1)"
-            productions = ["A(l,w)?!(w) F(l) [ &(a0) B(l*r2,w*wr) ] /(d) A(l*r1,w*wr)", 
-                       "B(l,w)?!(w) F(l) [ -(a2) $ C(l*r2,w*wr) ] C(l*r1,w*wr)",
-                       "C(l,w)?!(w) F(l) [ +(a2) $ B(l*r2,w*wr) ] B(l*r1,w*wr)"] 
-            nrOfIterations = 10
-            width = 1
-            definitions = [['r1', 0.9],
-                          ['r2', 0.7],
-                          ['a0', 30],
-                          ['a2', -30],
-                          ['d', 137.5],
-                          ['wr', 0.707]
-                          ]
-            tropismVector   = vector(0,0,0)
-            tropismStrength = 0
-        elif choice == 3: #phototropism
-            axiom = "!(1) F(200) /(45) A"
-            productions = ["A?!(vr) F(50) [ &(a) F(50) A ] /(d1) [ &(a) F(50) A ] /(d2) [ &(a) F(50) A ]", 
-                           "F(l)?F(l*lr)",
-                           "!(w)?!(w*vr)"] 
-            nrOfIterations = 6
-            width = 1 * 1.732 ** (nrOfIterations + 0.5)
-            definitions = [['d1', 180],
-                          ['d2', 252],
-                          ['a', 36],
-                          ['lr', 1.07],
-                          ['vr', 1.732],
-                          ] 
-            tropismVector   = vector(0.61,0.77,-0.19)
-            tropismStrength = 0.4
+        if choice in EXAMPLES_3D: # the cases are specified in LSystems_grammars.py
+            case = EXAMPLES_3D[choice]
+            axiom           = case["axiom"]
+            productions     = case["productions"]
+            nrOfIterations  = case["nrOfIterations"]
+            width           = case["width"]
+            definitions     = case["definitions"]
+            tropismVector   = vector(*case["tropismVector"])
+            tropismStrength = case["tropismStrength"]
         else:
             print("That is not a valid choice, try again: ")
             continue
@@ -357,9 +384,8 @@ if __name__ == "__main__":
         scene = canvas(width = 1280, height = 720) #Make screen ready for visualisation	
         system = LSystem(axiom,productions, definitions = definitions) #Setup L-system
 
-        # Compute the generations
-        for i in range(nrOfIterations):
-            tree = system.nextGeneration()
+        # Compute the generations, the last generation is streamed: it is rewritten while it is drawn
+        tree = system.streamGeneration(nrOfIterations)
 
         #visualise the result
         turtle_interpretation_3D(scene, tree, delta = 22.5, width = width, widthScaling = 0.57, tropismVec = tropismVector, tropismStrength = tropismStrength)
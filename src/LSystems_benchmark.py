@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_benchmark.py times the computation of the example L-systems.
+All 2D examples (run_test), Anabaena catenula (run_Anabaena) and the 3D examples
+are run without any visualisation. For every generation we measure the time, the
+number of modules, the number of modules per second and the peak memory use.
+
+The results are printed as a table and can be written to a JSON file, such that
+the results of different versions of LSystems.py can be compared:
+
+    python LSystems_benchmark.py --repeat 5 --output new.json --compare old.json
+
+Run 'python LSystems_benchmark.py --help' for all options.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: This module depends on LSystems.py and LSystems_grammars.py.
+
+OVERVIEW:     benchmarkCase times a single L-system, runBenchmarks times a list of
+              L-systems and compareResults compares the results with earlier results
+              (generation by generation, for runs with the same settings).
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from LSystems import LSystem
+from LSystems_grammars import EXAMPLES_2D, ANABAENA, EXAMPLES_3D
+
+# settings of a run that have to be equal to compare the times of two runs
+COMPARED_SETTINGS = ("seed", "memoSize", "representation")
+
+########################################
+#                CASES                 #
+########################################
+def benchmarkCases():
+    """Returns a dictionary with all example L-systems, the keys are used on the command line."""
+    cases = {}
+    for choice in EXAMPLES_2D:
+        cases["2D-" + str(choice)] = EXAMPLES_2D[choice]
+    cases["anabaena"] = ANABAENA
+    for choice in EXAMPLES_3D:
+        cases["3D-" + str(choice)] = EXAMPLES_3D[choice]
+    return(cases)
+
+########################################
+#              BENCHMARKS              #
+########################################
+def benchmarkCase(case, nrOfIterations, repeat = 3, seed = 1, memoSize = 0, representation = "list"):
+    """Times nrOfIterations generations of an L-system 'repeat' times.
+
+    Returns a dictionary with for every generation the number of modules, the time
+    statistics (over the repeats), the modules per second and the peak memory (in bytes).
+    The random generator is seeded with 'seed' before every run, such that stochastic
+    L-systems compute the same generations every time. representation is passed to LSystem
+    (see LSystem.setRepresentation).
+    """
+    times = [[] for j in range(nrOfIterations)]
+    modules = [0] * nrOfIterations
+    for r in range(repeat):
+        random.seed(seed)
+        gc.collect()
+        system = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], memoSize, representation = representation)
+        for j in range(nrOfIterations):
+            t0 = time.perf_counter()
+            gen = system.nextGeneration()
+            times[j].append(time.perf_counter() - t0)
+            modules[j] = len(gen)
+    # the memory is measured in a separate run, since tracing slows down the computation
+    random.seed(seed)
+    gc.collect()
+    peaks = []
+    tracemalloc.start()
+    system = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], memoSize, representation = representation)
+    for j in range(nrOfIterations):
+        tracemalloc.reset_peak()
+        system.nextGeneration()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    generations = []
+    for j in range(nrOfIterations):
+        median = statistics.median(times[j])
+        generations.append({"generation": j + 1,
+                            "modules": modules[j],
+                            "time": {"min": min(times[j]),
+                                     "median": median,
+                                     "mean": statistics.mean(times[j]),
+                                     "stdev": statistics.stdev(times[j]) if repeat > 1 else 0},
+                            "modulesPerSecond": modules[j] / median if median > 0 else None,
+                            "peakMemory": peaks[j]})
+    return({"name": case["name"],
+            "nrOfIterations": nrOfIterations,
+            "totalTime": sum(gen["time"]["median"] for gen in generations),
+            "generations": generations})
+
+def runBenchmarks(names, repeat = 3, nrOfIterations = None, extraIterations = 0, seed = 1, memoSize = 0, representation = "list", verbose = True):
+    """Runs benchmarkCase for every case in names, returns the results as a dictionary.
+
+    By default every case is run for its own number of iterations (see LSystems_grammars.py),
+    nrOfIterations replaces this number and extraIterations is added to it.
+    """
+    cases = benchmarkCases()
+    results = {"python": platform.python_version(),
+               "platform": platform.platform(),
+               "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "repeat": repeat,
+               "seed": seed,
+               "memoSize": memoSize,
+               "representation": representation,
+               "cases": {}}
+    for name in names:
+        case = cases[name]
+        iterations = (nrOfIterations or case["nrOfIterations"]) + extraIterations
+        result = benchmarkCase(case, iterations, repeat, seed, memoSize, representation)
+        results["cases"][name] = result
+        if verbose:
+            printResult(name, result)
+    return(results)
+
+def compareResults(old, new, force = False):
+    """Prints the speedup (old/new) for every case present in both results.
+
+    Only the generations that both runs computed with the same number of modules are compared,
+    the speedup is that of the sum of their median times. Runs with a different seed, memoSize or
+    representation are not compared (unless force = True), since their times are not comparable.
+    Returns a dictionary with for every compared case the old and new time, the speedup and
+    the number of compared generations.
+    """
+    differences = [key for key in COMPARED_SETTINGS if old.get(key) != new.get(key)]
+    if differences != []:
+        print("Warning: the runs differ in " + ", ".join(["{} ({} and {})".format(key, old.get(key), new.get(key)) for key in differences]))
+        if not force:
+            print("Nothing compared, use force = True (--force) to compare anyway.")
+            return({})
+    comparison = {}
+    print("")
+    print("{:<10} {:>12} {:>12} {:>9} {:>6}".format("case", "old (s)", "new (s)", "speedup", "gens"))
+    for name in new["cases"]:
+        if name not in old["cases"]:
+            continue
+        oldGenerations = {gen["generation"]: gen for gen in old["cases"][name]["generations"]}
+        pairs = [(oldGenerations[gen["generation"]], gen) for gen in new["cases"][name]["generations"]
+                 if gen["generation"] in oldGenerations and oldGenerations[gen["generation"]]["modules"] == gen["modules"]]
+        if pairs == []:
+            print("{:<10} no generations in common".format(name))
+            continue
+        oldTime = sum(oldGen["time"]["median"] for oldGen, newGen in pairs)
+        newTime = sum(newGen["time"]["median"] for oldGen, newGen in pairs)
+        speedup = oldTime / newTime if newTime > 0 else None
+        comparison[name] = {"old": oldTime, "new": newTime, "speedup": speedup, "generations": len(pairs)}
+        print("{:<10} {:>12.6f} {:>12.6f} {:>9} {:>6}".format(name, oldTime, newTime, "-" if speedup is None else "{:.2f}x".format(speedup),
+              "{}/{}".format(len(pairs), max(len(oldGenerations), len(new["cases"][name]["generations"])))))
+    return(comparison)
+
+########################################
+#          AUXILIARY FUNCTIONS         #
+########################################
+def printResult(name, result):
+    """Prints the scaling of an L-system (time and memory per generation) as a table."""
+    print("")
+    print(name + ": " + result["name"])
+    print("{:>5} {:>10} {:>12} {:>10} {:>14} {:>12}".format("gen", "modules", "median (s)", "stdev (s)", "modules/s", "peak (kB)"))
+    for gen in result["generations"]:
+        rate = gen["modulesPerSecond"]
+        print("{:>5} {:>10} {:>12.6f} {:>10.6f} {:>14} {:>12.1f}".format(gen["generation"], gen["modules"],
+              gen["time"]["median"], gen["time"]["stdev"], "-" if rate is None else "{:.0f}".format(rate), gen["peakMemory"]/1024))
+
+
+if __name__ == "__main__":
+    cases = benchmarkCases()
+    argParser = argparse.ArgumentParser(description = "Times the example L-systems without visualisation.")
+    argParser.add_argument("cases", nargs = "*", default = list(cases), help = "cases to run (default: all), choose from: " + ", ".join(cases))
+    argParser.add_argument("--repeat", type = int, default = 3, help = "number of runs per case (default: 3)")
+    argParser.add_argument("--iterations", type = int, default = None, help = "number of generations for every case (default: that of the example)")
+    argParser.add_argument("--extra", type = int, default = 0, help = "number of generations added to that of every case")
+    argParser.add_argument("--seed", type = int, default = 1, help = "seed for the stochastic L-systems (default: 1)")
+    argParser.add_argument("--memo", type = int, default = 0, help = "memoSize passed to LSystem (default: 0, no memoization)")
+    argParser.add_argument("--representation", default = "list", choices = ["list", "rope", "rle"], help = "representation of the words (default: list)")
+    argParser.add_argument("--output", default = None, help = "write the results as JSON to this file")
+    argParser.add_argument("--compare", default = None, help = "compare with results in this JSON file")
+    argParser.add_argument("--force", action = "store_true", help = "compare even if the seed, memo or representation differ")
+    args = argParser.parse_args()
+    for name in args.cases:
+        if name not in cases:
+            sys.exit("Unknown case: " + name + ", choose from: " + ", ".join(cases))
+    results = runBenchmarks(args.cases, args.repeat, args.iterations, args.extra, args.seed, args.memo, args.representation)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent = 1)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compareResults(json.load(f), results, args.force)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_cache.py contains a cache for the geometry of turtle interpretations, such that
+a word that is drawn again with the same interpretation parameters (e.g. after a change
+of the camera or the colours) does not have to be interpreted again.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: None
+
+OVERVIEW:     GeometryCache is a least-recently-used cache whose size is limited by the
+              memory use of the stored geometry. GeometryCache.geometryKey computes the key of a word
+              and the parameters of its interpretation, wordDigest a digest of the content
+              of a word.
+"""
+
+import hashlib
+import weakref
+from array import array
+from collections import OrderedDict
+from itertools import chain, islice
+
+########################################
+#                CACHE                 #
+########################################
+class GeometryCache:
+    """GeometryCache is a least-recently-used cache of geometry, limited to maxBytes bytes.
+
+    Every entry is stored with its size in bytes, entries are evicted (least recently used
+    first) until the total size fits. An entry larger than maxBytes is not stored.
+    """
+    def __init__(self, maxBytes = 256 * 2**20):
+        self.maxBytes  = maxBytes
+        self.table     = OrderedDict()  # key: (value, size)
+        self.bytes     = 0
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self.lastWord  = (None, None)   # (weak reference, digest) of the last word, see geometryKey
+
+    def lookup(self, key):
+        """Returns the stored geometry for key or None if key is not stored."""
+        entry = self.table.get(key)
+        if entry is None:
+            self.misses = self.misses + 1
+            return(None)
+        self.hits = self.hits + 1
+        self.table.move_to_end(key)
+        return(entry[0])
+
+    def store(self, key, value, size):
+        """Stores value (of size bytes) under key, evicting the least recently used entries if full."""
+        if key in self.table:
+            self.bytes = self.bytes - self.table.pop(key)[1]
+        if size > self.maxBytes:
+            return
+        self.table[key] = (value, size)
+        self.bytes = self.bytes + size
+        while self.bytes > self.maxBytes:
+            oldKey, (oldValue, oldSize) = self.table.popitem(last = False)
+            self.bytes = self.bytes - oldSize
+            self.evictions = self.evictions + 1
+
+    def clear(self):
+        """Removes all entries."""
+        self.table.clear()
+        self.bytes = 0
+        self.lastWord = (None, None)
+
+    def statistics(self):
+        """Returns a dictionary with the hits, misses, evictions, current number of entries and bytes."""
+        return({"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.table), "bytes": self.bytes, "maxBytes": self.maxBytes})
+
+    def geometryKey(self, word, *parameters):
+        """Returns the key of a word (see wordDigest) and the parameters that determine its geometry.
+
+        For words that can be weakly referenced (e.g. a Rope or WordFile, not a list) the digest
+        of the last word is remembered, so drawing the same word object again does not read it 
+        again. Such words should therefore not be modified after they were drawn.
+        """
+        lastWord, digest = self.lastWord
+        if lastWord is None or lastWord() is not word:
+            digest = wordDigest(word)
+            try:
+                self.lastWord = (weakref.ref(word), digest)
+            except TypeError:
+                self.lastWord = (None, None)
+        return((digest, len(word)) + tuple(parameters))
+
+########################################
+#                 KEYS                 #
+########################################
+def wordDigest(word, chunkSize = 65536):
+    """Returns a digest (BLAKE2b, 16 bytes) of the symbols and parameters of the modules of a word.
+
+    Parameters are compared as numbers (1 and 1.0 give the same digest), as the turtle
+    interprets them. A RunLengthWord (see LSystems_words.py) is read run by run.
+    """
+    digest = hashlib.blake2b(digest_size = 16)
+    runs = hasattr(word, "runs")
+    digest.update(b"runs" if runs else b"modules")
+    items = iter(word.runs() if runs else word)
+    while True:
+        chunk = list(islice(items, chunkSize))
+        if chunk == []:
+            break
+        if runs:
+            digest.update(array("q", [count for mod, count in chunk]).tobytes())
+            chunk = [mod for mod, count in chunk]
+        digest.update("\0".join([mod.symbol for mod in chunk]).encode())
+        digest.update(array("q", [len(mod.param) for mod in chunk]).tobytes())
+        digest.update(array("d", chain.from_iterable([mod.param for mod in chunk])).tobytes())
+    return(digest.digest())
+
+def isCacheable(instructions):
+    """Returns True if instructions is a word that can be hashed without consuming it (not a stream)."""
+    return(hasattr(instructions, "__len__") and hasattr(instructions, "__getitem__"))
+
+
+if __name__ == "__main__":
+    print("For examples refer to: LSystems_examples.py")
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_export.py writes the 2D turtle interpretation of an L-system to an image file
+(SVG or PNG) without a display, e.g. to render many L-systems on a server.
+
+The modules are read as a stream (see TurtleStream in LSystems_geometry.py), so the
+word can be a generator such as LSystem.streamGeneration() and the memory use does not
+grow with the size of the drawing: the drawing is kept in a temporary file until its
+bounding box (and therefore the viewBox or image size) is known.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: This module depends on LSystems_geometry.py, LSystems_raster.py and
+              LSystems_io.py, and thereby on NumPy.
+
+OVERVIEW:     writeSVG writes an SVG file in which every unbroken path is a polyline,
+              writePNG rasterizes the drawing and writes a PNG file.
+"""
+
+import tempfile
+import numpy as np
+from LSystems_geometry import TurtleStream, Segments, polylines, simplifySegments
+from LSystems_raster import newCoverage, worldToPixels, toPixels, lineWidths, drawSegments, composite, savePNG, savePNGRows, renderChunks, TILE_SIZE
+from LSystems_io import copyFile
+
+########################################
+#                 SVG                  #
+########################################
+def writeSVG(instructions, file, delta = 90, initialAngle = 90, distance = 1, width = 1, size = 1000,
+             color = "black", background = None, margin = 0.02, chunkSize = 65536, tolerance = None):
+    """Writes the turtle interpretation of modules (any iterable) as SVG to file (a filename or text file).
+
+    The drawing gets a viewBox that fits its bounding box plus a margin (a fraction of its largest
+    side), which is shown as size pixels. width is the line width in pixels, background a fill
+    color (None for transparent). With a tolerance (in the units of the drawing) the paths are
+    simplified such that no point moves more than tolerance, see LSystems_geometry.simplifySegments.
+    Returns the bounds of the drawing.
+    """
+    if isinstance(file, str):
+        with open(file, "w") as f:
+            return(writeSVG(instructions, f, delta, initialAngle, distance, width, size, color, background, margin, chunkSize, tolerance))
+    stream = TurtleStream(instructions, delta, initialAngle, distance, chunkSize)
+    with tempfile.TemporaryFile("w+") as paths:
+        for segments in stream:
+            if tolerance is not None:
+                segments = simplifySegments(segments, tolerance)
+            data = []
+            for line in polylines(segments):
+                # SVG has its y axis downwards
+                coordinates = ["{:.7g} {:.7g}".format(x, -y) for x, y in line.tolist()]
+                data.append("M" + coordinates[0] + " L" + " ".join(coordinates[1:]))
+            if data != []:
+                paths.write('<path d="' + " ".join(data) + '"/>\n')
+        xmin, ymin, xmax, ymax = stream.bounds
+        extent = max(xmax - xmin, ymax - ymin)
+        if extent <= 0:
+            extent = 1.0
+        border = margin * extent
+        viewBox = (xmin - border, -ymax - border, xmax - xmin + 2 * border, ymax - ymin + 2 * border)
+        scale = size / (extent + 2 * border)
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<svg xmlns="http://www.w3.org/2000/svg" width="{:.0f}" height="{:.0f}" viewBox="{:.7g} {:.7g} {:.7g} {:.7g}">\n'.format(
+                   viewBox[2] * scale, viewBox[3] * scale, *viewBox))
+        if background is not None:
+            file.write('<rect x="{:.7g}" y="{:.7g}" width="{:.7g}" height="{:.7g}" fill="{}"/>\n'.format(*viewBox, background))
+        file.write('<g fill="none" stroke="{}" stroke-width="{:.7g}" stroke-linecap="round" stroke-linejoin="round">\n'.format(color, width / scale))
+        copyFile(paths, file)
+        file.write("</g>\n</svg>\n")
+    return(stream.bounds)
+
+########################################
+#                 PNG                  #
+########################################
+def writePNG(instructions, file, delta = 90, initialAngle = 90, distance = 1, width = 1, size = 1000,
+             color = (0, 0, 0), background = (255, 255, 255), margin = 0.02, antialias = True, chunkSize = 65536,
+             processes = 1, tileSize = TILE_SIZE, simplify = False):
+    """Writes the turtle interpretation of modules (any iterable) as PNG to file (a filename or binary file).
+
+    The largest side of the drawing gets size pixels plus a margin (a fraction of that side),
+    width is the line width in pixels or a list with a width per branch depth (see 
+    LSystems_raster.drawSegments). The drawn segments are kept in a temporary file until
+    the bounds are known. Returns the bounds of the drawing.
+
+    With processes other than 1 the image is drawn in tiles of tileSize pixels by a pool of
+    processes (None for all cores), see LSystems_raster.renderChunks. This is meant for very
+    large images (posters): the segments are copied from the temporary file to shared memory
+    chunk by chunk and only one row of tiles is kept in memory.
+
+    With simplify = True the paths are simplified within half a pixel before drawing, see
+    LSystems_geometry.levelOfDetail. Paths are simplified per chunk of chunkSize segments.
+    """
+    stream = TurtleStream(instructions, delta, initialAngle, distance, chunkSize)
+    with tempfile.TemporaryFile() as spool:
+        nrOfSegments = 0
+        for segments in stream:
+            drawn = segments.drawn()
+            np.column_stack((drawn.start, drawn.end, drawn.depth)).tofile(spool)
+            nrOfSegments = nrOfSegments + len(drawn)
+        spool.seek(0)
+        (columns, rows), transformation = worldToPixels(stream.bounds, size, margin)
+        chunks = spooledSegments(spool, nrOfSegments, stream.bounds, transformation, simplify, chunkSize)
+        if processes != 1:
+            lines = ((toPixels(segments.start, transformation), toPixels(segments.end, transformation), lineWidths(segments.depth, width))
+                     for segments in chunks)
+            bands = renderChunks(lines, nrOfSegments, columns, rows, antialias, color, background, tileSize, processes)
+            savePNGRows((band for row, band in bands), columns, rows, 3, file)
+            return(stream.bounds)
+        coverage = newCoverage(columns, rows)
+        for segments in chunks:
+            drawSegments(coverage, segments, transformation, width, antialias)
+    savePNG(composite(coverage, color, background), file)
+    return(stream.bounds)
+
+def spooledSegments(spool, nrOfSegments, bounds, transformation, simplify, chunkSize):
+    """Reads the segments written by writePNG from spool, yields them as Segments of at most chunkSize segments."""
+    for first in range(0, nrOfSegments, chunkSize):
+        chunk = np.fromfile(spool, dtype = float, count = 5 * min(chunkSize, nrOfSegments - first)).reshape(-1, 5)
+        segments = Segments(chunk[:, 0:2], chunk[:, 2:4], np.ones(len(chunk), dtype = bool), chunk[:, 4].astype(np.int64), bounds)
+        if simplify:
+            segments = simplifySegments(segments, 0.5 / transformation[0])
+        yield(segments)
+
+
+if __name__ == "__main__":
+    print("For examples refer to: LSystems_examples.py")
@@ -0,0 +1,555 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_geometry.py interprets L-systems as turtle graphics without a display.
+Instead of moving a turtle on the screen one module at a time, a word is turned into
+arrays of line segments, which can be rendered or exported afterwards.
+
+The interpretation is the same as that of turtle_interpretation in LSystems_visualise.py:
+F (and every symbol starting with F) draws, f moves without drawing, + and - turn
+left and right, [ and ] push and pop the position and heading of the turtle.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: This module depends on NumPy (https://numpy.org).
+
+OVERVIEW:     turtle_segments interprets a word (any iterable of modules) and returns
+              a Segments object with the start and end points, pen state and branch
+              depth of every move of the turtle and the bounding box of the drawing.
+
+              polylines merges the drawn segments into unbroken paths.
+
+              TurtleStream interprets the modules one by one and yields the moves in
+              chunks, for words that are streamed or too large to interpret at once.
+
+              simplifySegments and levelOfDetail reduce the number of segments of a drawing,
+              such that no point moves more than a given tolerance (e.g. half a pixel).
+              growToResolution grows an L-system until its branches are smaller than a pixel.
+
+              When all angles are multiples of 360/k with k = 3, 4 or 6 (e.g. 60 or 90 degrees)
+              both interpreters use a lattice: the heading is one of k directions and the positions are exact
+              integer combinations of these directions, see latticeOrder and latticeDirections.
+"""
+
+from fractions import Fraction
+from itertools import chain
+from math import cos, sin, radians, pi, lcm
+import numpy as np
+
+# kinds of instructions, see turtle_segments
+DRAW = 0
+MOVE = 1
+TURN = 2
+PUSH = 3
+POP  = 4
+
+MAX_LATTICE_ORDER = 360     # the largest number of directions of a lattice, see latticeOrder
+PLANAR_LATTICES   = (1, 2, 3, 4, 6)   # the lattices with (at most) two integer coordinates
+
+########################################
+#               SEGMENTS               #
+########################################
+class Segments:
+    """Segments holds the moves of a 2D turtle as NumPy arrays.
+
+    start and end are (n, 2) arrays with the end points of the moves, pen is True for
+    drawn segments (F) and False for moves with the pen up (f) and depth is the branch
+    depth (the number of open brackets). bounds is (xmin, ymin, xmax, ymax) of all
+    positions the turtle visited, including the origin.
+    """
+    def __init__(self, start, end, pen, depth, bounds):
+        self.start  = start
+        self.end    = end
+        self.pen    = pen
+        self.depth  = depth
+        self.bounds = bounds
+
+    def __len__(self):
+        return(len(self.start))
+
+    def select(self, mask):
+        """Returns the segments for which mask (a boolean or index array) is True, the bounds are kept."""
+        return(Segments(self.start[mask], self.end[mask], self.pen[mask], self.depth[mask], self.bounds))
+
+    def drawn(self):
+        """Returns only the segments that are drawn (pen down)."""
+        return(self.select(self.pen))
+
+    def nbytes(self):
+        """Returns the memory use of the arrays in bytes (see LSystems_cache.py)."""
+        return(self.start.nbytes + self.end.nbytes + self.pen.nbytes + self.depth.nbytes)
+
+########################################
+#               LATTICES               #
+########################################
+def latticeOrder(angles):
+    """Returns the smallest k such that all angles (in degrees) are multiples of 360 / k.
+
+    Returns None if there is no such k up to MAX_LATTICE_ORDER, e.g. for 25.7 degrees.
+    """
+    k = 1
+    for angle in angles:
+        try:
+            k = lcm(k, (Fraction(angle) / 360).denominator)
+        except (TypeError, ValueError, OverflowError):
+            return(None)
+        if k > MAX_LATTICE_ORDER:
+            return(None)
+    return(k)
+
+def cyclotomic(k):
+    """Returns the coefficients (lowest degree first) of the k-th cyclotomic polynomial."""
+    polynomial = [-1] + [0] * (k - 1) + [1]     # x^k - 1
+    for d in range(1, k):
+        if k % d == 0:
+            divisor = cyclotomic(d)
+            # exact division by a monic polynomial
+            quotient = [0] * (len(polynomial) - len(divisor) + 1)
+            for i in range(len(quotient) - 1, -1, -1):
+                quotient[i] = polynomial[i + len(divisor) - 1]
+                for j, c in enumerate(divisor):
+                    polynomial[i + j] = polynomial[i + j] - quotient[i] * c
+            polynomial = quotient
+    return(polynomial)
+
+def latticeDirections(k):
+    """Returns the k unit directions of a lattice with k directions as integer coordinates, and the basis.
+
+    The direction at an angle of 360 * j / k degrees is zeta^j, with zeta = exp(2 pi i / k).
+    Every power of zeta is an integer combination of 1, zeta, ..., zeta^(m - 1), with m the 
+    degree of the k-th cyclotomic polynomial, so sums of directions are exact integer vectors. 
+    Returns the (k, m) integer coordinates of the directions and the (m, 2) basis vectors. For 
+    k = 4 these are the integer lattice, for k = 3 and 6 the Eisenstein integers.
+    """
+    polynomial = cyclotomic(k)
+    m = len(polynomial) - 1
+    directions = []
+    power = [1] + [0] * (m - 1)
+    for j in range(k):
+        directions.append(power)
+        # multiply by zeta, zeta^m = -(c_0 + c_1 zeta + ... + c_(m-1) zeta^(m-1))
+        power = [0] + power[:-1]
+        if m > 0:
+            top = directions[-1][-1]
+            power = [p - top * c for p, c in zip(power, polynomial[:-1])]
+    basis = np.array([unitVector(360 * i / k) for i in range(m)])
+    return(np.array(directions, dtype = np.int64), basis)
+
+def unitVector(angle):
+    """Returns (cos, sin) of an angle in degrees, with 0, 1/2 and 1 exact (e.g. cos(90) is not 0 in floating point)."""
+    vector = [cos(radians(angle % 360)), sin(radians(angle % 360))]
+    for i in range(2):
+        exact = round(2 * vector[i]) / 2
+        if abs(vector[i] - exact) < 1e-15:
+            vector[i] = exact
+    return(tuple(vector))
+
+def latticeSteps(lengths, distance):
+    """Returns the lengths as integer multiples of distance, or None if they are not."""
+    steps = np.asarray(lengths, dtype = float) / distance
+    if np.all(steps == np.round(steps)) and np.all(np.abs(steps) < 2**31):
+        return(np.round(steps).astype(np.int64))
+    return(None)
+
+########################################
+#            INTERPRETATION            #
+########################################
+def turtle_segments(instructions, delta = 90, initialAngle = 90, distance = 1, lattice = True):
+    """Interprets modules (any iterable) as turtle instructions and returns the moves as Segments.
+
+    The modules are read once to list the moves, turns and brackets. The headings and positions
+    are then computed with cumulative sums: at every ] the turns and moves since the matching [
+    are undone by a correction, such that no turtle state has to be copied for the branches.
+    With lattice = True and all turns multiples of 360/k and all lengths multiples of distance,
+    the headings and positions are computed exactly with integers (see latticeDirections), only
+    the conversion to coordinates (rotated by initialAngle) is rounded. This is only done for
+    lattices with two coordinates (k = 1, 2, 3, 4 or 6, e.g. 60 or 90 degrees), other lattices
+    need many more coordinates and are much slower than floats (e.g. 96 for 23 degrees);
+    lattice = "any" uses them anyway.
+    """
+    kinds = []
+    values = []
+    scopes = []     # the bracket pair that directly contains the instruction (0 for none)
+    pairs = []      # the bracket pair closed by a ], 0 otherwise
+    depths = []
+    stack = [0]
+    nrOfPairs = 0
+    for mod in instructions:
+        symbol = mod.symbol
+        if symbol[0] == "F":
+            kinds.append(DRAW)
+            values.append(distance if mod.param == [] else float(mod.param[0]))
+        elif symbol == "f":
+            kinds.append(MOVE)
+            values.append(distance if mod.param == [] else float(mod.param[0]))
+        elif symbol == "+":
+            kinds.append(TURN)
+            values.append(delta if mod.param == [] else mod.param[0])
+        elif symbol == "-":
+            kinds.append(TURN)
+            values.append(-delta if mod.param == [] else -mod.param[0])
+        elif symbol == "[":
+            kinds.append(PUSH)
+            values.append(0)
+            scopes.append(stack[-1])
+            pairs.append(0)
+            depths.append(len(stack) - 1)
+            nrOfPairs = nrOfPairs + 1
+            stack.append(nrOfPairs)
+            continue
+        elif symbol == "]":
+            if len(stack) == 1:
+                raise ValueError("unbalanced brackets: ] without [")
+            kinds.append(POP)
+            values.append(0)
+            pairs.append(stack.pop())
+            scopes.append(stack[-1])
+            depths.append(len(stack) - 1)
+            continue
+        else:
+            continue
+        scopes.append(stack[-1])
+        pairs.append(0)
+        depths.append(len(stack) - 1)
+    kinds = np.array(kinds, dtype = np.int8)
+    values = np.array(values, dtype = float)
+    scopes = np.array(scopes, dtype = np.int64)
+    pairs = np.array(pairs, dtype = np.int64)
+    depths = np.array(depths, dtype = np.int64)
+    pops = np.nonzero(kinds == POP)[0]
+    moving = (kinds == DRAW) | (kinds == MOVE)
+    turning = kinds == TURN
+    k = latticeOrder(np.unique(values[turning]).tolist()) if lattice else None
+    if k is not None and lattice != "any" and k not in PLANAR_LATTICES:
+        k = None
+    steps = latticeSteps(values[moving], distance) if k is not None else None
+    if steps is not None:
+        # headings are indices into the k directions (relative to the initial angle), positions integer coordinates
+        directions, basis = latticeDirections(k)
+        turns = np.zeros(len(kinds), dtype = np.int64)
+        turns[turning] = np.round(values[turning] * k / 360).astype(np.int64)
+        headings = np.mod(undoBranches(turns, scopes, pairs, pops, nrOfPairs), k)
+        increments = np.zeros((len(kinds), directions.shape[1]), dtype = np.int64)
+        increments[moving] = directions[headings[moving]] * steps[:, None]
+        coordinates = undoBranches(increments, scopes, pairs, pops, nrOfPairs)
+        c, s = unitVector(initialAngle)
+        basis = basis @ np.array([[c, s], [-s, c]]) * distance
+        positions = coordinates @ basis
+        x = positions[:, 0]
+        y = positions[:, 1]
+    else:
+        # headings: at a ] the turns directly inside its brackets are undone (nested brackets undo their own turns)
+        turns = np.where(turning, values, 0.0)
+        headings = np.radians(np.mod(initialAngle + undoBranches(turns, scopes, pairs, pops, nrOfPairs), 360))
+        # positions: at a ] the moves directly inside its brackets are undone
+        steps = np.where(moving, values, 0.0)
+        x = undoBranches(steps * np.cos(headings), scopes, pairs, pops, nrOfPairs)
+        y = undoBranches(steps * np.sin(headings), scopes, pairs, pops, nrOfPairs)
+    moves = np.nonzero(moving)[0]
+    end = np.column_stack((x[moves], y[moves]))
+    # the start of a move is the position after the previous instruction, such that connected moves match exactly
+    start = np.column_stack((np.concatenate(([0.0], x))[moves], np.concatenate(([0.0], y))[moves]))
+    if len(moves) > 0:
+        bounds = (min(0.0, float(end[:, 0].min()), float(start[:, 0].min())),
+                  min(0.0, float(end[:, 1].min()), float(start[:, 1].min())),
+                  max(0.0, float(end[:, 0].max()), float(start[:, 0].max())),
+                  max(0.0, float(end[:, 1].max()), float(start[:, 1].max())))
+    else:
+        bounds = (0.0, 0.0, 0.0, 0.0)
+    return(Segments(start, end, kinds[moves] == DRAW, depths[moves], bounds))
+
+def undoBranches(increments, scopes, pairs, pops, nrOfPairs):
+    """Returns the cumulative sum of increments (per instruction, see turtle_segments), where every ] undoes its branch.
+
+    The increment of a ] is set to minus the sum of the increments directly inside its brackets
+    (nested brackets undo their own increments). Integer increments are summed exactly.
+    """
+    if increments.dtype.kind == "f":
+        sums = np.bincount(scopes, weights = increments, minlength = nrOfPairs + 1)
+    elif np.abs(increments).sum() < 2**53:
+        # the sums of integers are exact in floating point as long as they fit in 53 bits
+        columns = increments.reshape(len(increments), -1).T
+        sums = np.column_stack([np.bincount(scopes, weights = column, minlength = nrOfPairs + 1) for column in columns])
+        sums = sums.astype(np.int64).reshape((nrOfPairs + 1,) + increments.shape[1:])
+    else:
+        sums = np.zeros((nrOfPairs + 1,) + increments.shape[1:], dtype = increments.dtype)
+        np.add.at(sums, scopes, increments)
+    increments[pops] = -sums[pairs[pops]]
+    return(np.cumsum(increments, axis = 0))
+
+def polylines(segments):
+    """Merges the drawn segments into polylines, returns a list of (k + 1, 2) arrays with the points of every unbroken path.
+
+    A path is broken where the turtle moves with the pen up or jumps back at a ].
+    """
+    drawn = segments.drawn()
+    n = len(drawn)
+    if n == 0:
+        return([])
+    breaks = np.nonzero(np.any(drawn.start[1:] != drawn.end[:-1], axis = 1))[0] + 1
+    firsts = np.concatenate(([0], breaks))
+    lasts = np.concatenate((breaks, [n]))
+    return([np.vstack((drawn.start[first:(first + 1)], drawn.end[first:last])) for first, last in zip(firsts, lasts)])
+
+class TurtleStream:
+    """TurtleStream interprets modules one by one and yields the moves of the turtle as Segments, in chunks.
+
+    Only the bracket stack and one chunk of chunkSize moves are kept in memory, so instructions
+    can be a stream of modules (e.g. LSystem.streamGeneration()). bounds is updated with every 
+    chunk and is complete after the last one. The interpretation is the same as that of turtle_segments.
+    With lattice = True and delta a multiple of 90 or 60 degrees, the positions are computed 
+    exactly with integers (see latticeDirections), until a turn or move is found that does 
+    not fit the lattice.
+    """
+    def __init__(self, instructions, delta = 90, initialAngle = 90, distance = 1, chunkSize = 65536, lattice = True):
+        self.instructions = instructions
+        self.delta        = delta
+        self.initialAngle = initialAngle
+        self.distance     = distance
+        self.chunkSize    = chunkSize
+        self.lattice      = lattice
+        self.bounds       = (0.0, 0.0, 0.0, 0.0)
+
+    def __iter__(self):
+        self.bounds = (0.0, 0.0, 0.0, 0.0)
+        modules = iter(self.instructions)
+        k = latticeOrder([self.delta]) if self.lattice else None
+        if k is not None and k in PLANAR_LATTICES:
+            state = yield from self.walkLattice(modules, k)
+            if state is None:
+                return
+        else:
+            state = (modules, 0.0, 0.0, self.initialAngle, [], [], [], [])
+        yield from self.walk(*state)
+
+    def walk(self, modules, x, y, heading, stack, points, pens, depths):
+        """Interprets the modules from the given state of the turtle and the moves of the current chunk."""
+        delta = self.delta
+        distance = self.distance
+        xmin, ymin, xmax, ymax = self.bounds
+        for mod in modules:
+            symbol = mod.symbol
+            if symbol[0] == "F" or symbol == "f":
+                step = distance if mod.param == [] else float(mod.param[0])
+                angle = radians(heading % 360)
+                nx = x + step * cos(angle)
+                ny = y + step * sin(angle)
+                points.extend((x, y, nx, ny))
+                pens.append(symbol != "f")
+                depths.append(len(stack))
+                x = nx
+                y = ny
+                if x < xmin:
+                    xmin = x
+                elif x > xmax:
+                    xmax = x
+                if y < ymin:
+                    ymin = y
+                elif y > ymax:
+                    ymax = y
+                if len(pens) >= self.chunkSize:
+                    self.bounds = (xmin, ymin, xmax, ymax)
+                    yield(self.chunk(points, pens, depths))
+                    points = []
+                    pens = []
+                    depths = []
+            elif symbol == "+":
+                heading = heading + (delta if mod.param == [] else mod.param[0])
+            elif symbol == "-":
+                heading = heading - (delta if mod.param == [] else mod.param[0])
+            elif symbol == "[":
+                stack.append((x, y, heading))
+            elif symbol == "]":
+                if stack == []:
+                    raise ValueError("unbalanced brackets: ] without [")
+                x, y, heading = stack.pop()
+        self.bounds = (xmin, ymin, xmax, ymax)
+        if pens != []:
+            yield(self.chunk(points, pens, depths))
+
+    def walkLattice(self, modules, k):
+        """Interprets the modules on a lattice with k directions and at most two integer coordinates (a, b).
+
+        The heading is an index into the directions. Returns None when all modules are interpreted,
+        or the state for walk when a module does not fit the lattice (that module is interpreted
+        first by walk).
+        """
+        directions, basis = latticeDirections(k)
+        directions = [tuple(d) + (0,) * (2 - len(d)) for d in directions.tolist()]
+        c, s = unitVector(self.initialAngle)
+        basis = (basis @ np.array([[c, s], [-s, c]]) * self.distance).tolist() + [[0.0, 0.0]] * (2 - len(basis))
+        (ax, ay), (bx, by) = basis
+        turn = int(round(self.delta * k / 360))
+        distance = self.distance
+        a = b = 0
+        x = y = 0.0
+        heading = 0
+        stack = []
+        xmin, ymin, xmax, ymax = self.bounds
+        points = []
+        pens = []
+        depths = []
+        for mod in modules:
+            symbol = mod.symbol
+            if symbol[0] == "F" or symbol == "f":
+                if mod.param == []:
+                    da, db = directions[heading]
+                else:
+                    step = float(mod.param[0]) / distance
+                    if step != int(step):
+                        break
+                    da, db = directions[heading]
+                    da = da * int(step)
+                    db = db * int(step)
+                a = a + da
+                b = b + db
+                nx = a * ax + b * bx
+                ny = a * ay + b * by
+                points.extend((x, y, nx, ny))
+                pens.append(symbol != "f")
+                depths.append(len(stack))
+                x = nx
+                y = ny
+                if x < xmin:
+                    xmin = x
+                elif x > xmax:
+                    xmax = x
+                if y < ymin:
+                    ymin = y
+                elif y > ymax:
+                    ymax = y
+                if len(pens) >= self.chunkSize:
+                    self.bounds = (xmin, ymin, xmax, ymax)
+                    yield(self.chunk(points, pens, depths))
+                    points = []
+                    pens = []
+                    depths = []
+            elif symbol == "+" or symbol == "-":
+                if mod.param == []:
+                    steps = turn
+                else:
+                    steps = mod.param[0] * k / 360
+                    if steps != int(steps):
+                        break
+                    steps = int(steps)
+                heading = (heading + steps if symbol == "+" else heading - steps) % k
+            elif symbol == "[":
+                stack.append((a, b, x, y, heading))
+            elif symbol == "]":
+                if stack == []:
+                    raise ValueError("unbalanced brackets: ] without [")
+                a, b, x, y, heading = stack.pop()
+        else:
+            self.bounds = (xmin, ymin, xmax, ymax)
+            if pens != []:
+                yield(self.chunk(points, pens, depths))
+            return(None)
+        # continue without the lattice, starting with the module that does not fit
+        self.bounds = (xmin, ymin, xmax, ymax)
+        stack = [(sx, sy, self.initialAngle + h * 360 / k) for sa, sb, sx, sy, h in stack]
+        return((chain([mod], modules), x, y, self.initialAngle + heading * 360 / k, stack, points, pens, depths))
+
+    def chunk(self, points, pens, depths):
+        """Returns the moves of a chunk as Segments."""
+        points = np.array(points, dtype = float).reshape(-1, 4)
+        return(Segments(points[:, 0:2], points[:, 2:4], np.array(pens, dtype = bool), np.array(depths, dtype = np.int64), self.bounds))
+
+
+########################################
+#            LEVEL OF DETAIL           #
+########################################
+def simplifySegments(segments, tolerance):
+    """Simplifies the paths (connected drawn segments of the same depth) with the Douglas-Peucker algorithm.
+
+    The corners of a path that lie within tolerance of the segment between the corners that are
+    kept are left out, so no point of the drawing moves more than tolerance. Collinear segments are
+    merged and details smaller than tolerance disappear. All paths are simplified at once: every
+    iteration splits all segments that are not yet within tolerance at their farthest corner.
+    Returns the simplified drawn segments.
+    """
+    drawn = segments.drawn()
+    n = len(drawn)
+    if n < 2:
+        return(drawn)
+    connected = np.all(drawn.end[:-1] == drawn.start[1:], axis = 1) & (drawn.depth[:-1] == drawn.depth[1:])
+    # (a, b) replaces the segments a to b by a single segment, the corners are the ends of a to b - 1
+    a = np.nonzero(np.concatenate(([True], ~connected)))[0]
+    b = np.concatenate((a[1:], [n])) - 1
+    firsts = []
+    lasts = []
+    while len(a) > 0:
+        counts = b - a
+        owner = np.repeat(np.arange(len(a)), counts)
+        offsets = np.cumsum(counts) - counts
+        corners = np.arange(len(owner)) - offsets[owner] + a[owner]
+        # the distance of every corner to the segment from the start of a to the end of b
+        start = drawn.start[a][owner]
+        chord = drawn.end[b][owner] - start
+        relative = drawn.end[corners] - start
+        squared = np.einsum("ij,ij->i", chord, chord)
+        t = np.clip(np.einsum("ij,ij->i", relative, chord) / np.where(squared > 0, squared, 1), 0, 1)
+        distance = np.hypot(*(relative - t[:, None] * chord).T)
+        maxima = np.zeros(len(a))
+        maxima[counts > 0] = np.maximum.reduceat(distance, offsets[counts > 0])
+        split = maxima > tolerance
+        firsts.append(a[~split])
+        lasts.append(b[~split])
+        farthest = np.nonzero(distance == maxima[owner])[0]
+        owners, first = np.unique(owner[farthest], return_index = True)
+        middle = np.zeros(len(a), dtype = np.int64)
+        middle[owners] = corners[farthest[first]]
+        a, b = np.concatenate((a[split], middle[split] + 1)), np.concatenate((middle[split], b[split]))
+    firsts = np.concatenate(firsts)
+    lasts = np.concatenate(lasts)
+    order = np.argsort(firsts)
+    firsts = firsts[order]
+    lasts = lasts[order]
+    return(Segments(drawn.start[firsts], drawn.end[lasts], drawn.pen[firsts], drawn.depth[firsts], drawn.bounds))
+
+def pixelSize(bounds, resolution = 1000):
+    """Returns the size of a pixel when the largest side of a drawing with the given bounds gets resolution pixels."""
+    xmin, ymin, xmax, ymax = bounds
+    return(max(xmax - xmin, ymax - ymin) / resolution)
+
+def growToResolution(system, sizeParameters, maxGenerations, delta = 90, initialAngle = 90, distance = 1, resolution = 1000):
+    """Computes generations of an L-system until every module with a size is smaller than a pixel, at most maxGenerations.
+
+    sizeParameters maps symbols to the index of their length parameter (see LSystem.setMinimumSize),
+    e.g. {"A": 0, "F": 0}. Before every generation the drawing of the current word is measured and
+    the minimum size is set to the size of a pixel, so every branch stops growing at its own depth.
+    Returns the word.
+    """
+    for j in range(0, maxGenerations):
+        stream = TurtleStream(system.word, delta, initialAngle, distance)
+        for segments in stream:
+            pass
+        system.setMinimumSize(pixelSize(stream.bounds, resolution), sizeParameters)
+        if system.budgetExceeded or not system.isGrowing():
+            break
+        system.nextGeneration()
+    return(system.word)
+
+def levelOfDetail(segments, resolution = 1000, tolerance = 0.5):
+    """Simplifies the drawing for a resolution of 'resolution' pixels along its largest side (see simplifySegments).
+
+    No point moves more than tolerance pixels. The drawn pixels stay within one pixel of those
+    of the full drawing, but along dense lines single pixels do shift (e.g. 17% of the drawn pixels
+    of the islands and lakes example at 200 pixels). With anti-aliasing dense details are drawn
+    lighter, since less line length is drawn.
+
+    Returns the simplified segments and a report: a dictionary with the number of drawn
+    segments before ("segments") and after ("remaining") and the number of "removed" segments.
+    """
+    drawn = segments.drawn()
+    size = pixelSize(segments.bounds, resolution)
+    if size <= 0 or len(drawn) == 0:
+        return(drawn, {"segments": len(drawn), "removed": 0, "remaining": len(drawn)})
+    simplified = simplifySegments(drawn, tolerance * size)
+    return(simplified, {"segments": len(drawn), "removed": len(drawn) - len(simplified), "remaining": len(simplified)})
+
+if __name__ == "__main__":
+    print("For examples refer to: LSystems_examples.py")
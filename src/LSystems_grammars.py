@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_grammars.py contains the specifications of the example L-systems.
+They are used by LSystems_examples.py and LSystems_3D.py to run the examples
+and by LSystems_benchmark.py to time them. This module has no dependencies on
+graphics, such that the L-systems can also be used without a display.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: None
+
+OVERVIEW:     Every L-system is a dictionary with the keys:
+              name, type, axiom, productions, ignore, definitions and nrOfIterations.
+              2D examples also contain delta and initial (for the turtle interpretation),
+              3D examples contain width and tropismVector/tropismStrength.
+
+              EXAMPLES_2D contains the cases of run_test, ANABAENA the L-system of
+              run_Anabaena and EXAMPLES_3D the cases of LSystems_3D.py.
+"""
+
+########################################
+#             2D EXAMPLES              #
+########################################
+EXAMPLES_2D = {
+    # DOL-systems
+    1: {"name": "Koch's snowflake", "type": "DOL-system",
+        "axiom": "F + + F + + F",
+        "productions": ["F?F - F + + F - F"],
+        "ignore": "", "definitions": [], "nrOfIterations": 5,
+        "delta": 60, "initial": 0},
+    2: {"name": "Dragon curve", "type": "DOL-system",
+        "axiom": "Fl",
+        "productions": ["Fl?Fl + Fr +",
+                        "Fr?- Fl - Fr"],
+        "ignore": "", "definitions": [], "nrOfIterations": 13,
+        "delta": 90, "initial": 0},
+    3: {"name": "Islands and lakes", "type": "DOL-system",
+        "axiom": "F + F + F + F",
+        "productions": ["F?F + f - F F + F + F F + F f + F F - f + F F - F - F F - F f - F F F",
+                        "f?f f f f f f"],
+        "ignore": "", "definitions": [], "nrOfIterations": 3,
+        "delta": 90, "initial": 0},
+    # Bracketed DOL-system
+    4: {"name": "Simple plant", "type": "Bracketed DOL-system",
+        "axiom": "F",
+        "productions": ["F?F F - [ - F + F + F ] + [ + F - F - F ]"],
+        "ignore": "", "definitions": [], "nrOfIterations": 2,
+        "delta": 22.5, "initial": 90},
+    # Parametric DOL-systems
+    5: {"name": "Triangle filling curve", "type": "Para. DOL-system",
+        "axiom": "F(1,0)",
+        "productions": ["F(x,t):t==0?F(x*0.3,2) + F(x*0.458,1) - - F(x*0.458,1) + F(x*0.7,0)",
+                        "F(x,t):t>0?F(x,t-1)"],
+        "ignore": "", "definitions": [], "nrOfIterations": 10,
+        "delta": 86, "initial": 0},
+    6: {"name": "Filling curve (tree)", "type": "Para.Bra. DOL-system",
+        "axiom": "A(1)",
+        "productions": ["A(s)?F(s) [ + A(s/1.456) ] [ - A(s/1.456) ]"],
+        "ignore": "", "definitions": [], "nrOfIterations": 10,
+        "delta": 85, "initial": 90},
+    # Bracketed 2L-system
+    7: {"name": "Plant", "type": "Bracketed 2L-system",
+        "axiom": "F 1 F 1 F 1",
+        "productions": ["0<0>0?1",
+                        "0<0>1?1 [ - F 1 F 1 ]",
+                        "0<1>0?1",
+                        "0<1>1?1",
+                        "1<0>0?0",
+                        "1<0>1?1 F 1",
+                        "1<1>0?1",
+                        "1<1>1?0",
+                        "+?-",
+                        "-?+"],
+        "ignore": "+-F", "definitions": [], "nrOfIterations": 30,
+        "delta": 22.5, "initial": 90},
+    # Stochastic DOL-system
+    8: {"name": "Plant", "type": "Stochastic DOL-system",
+        "axiom": "F",
+        "productions": ["F?0.33;F [ + F ] F [ - F ] F;0.33;F [ + F ] F;0.34;F [ - F ] F"],
+        "ignore": "", "definitions": [], "nrOfIterations": 5,
+        "delta": 23, "initial": 90},
+}
+
+ANABAENA = {"name": "Anabaena catenula", "type": "Parametric 2L-system",
+            "axiom": "F(1,0,900) F(4,1,900) F(1,0,900)",
+            "productions": ["F(s,t,c):t==1 and s>=6?F(s/3*2,2,c) f(1) F(s/3,1,c)",
+                            "F(s,t,c):t==2 and s>=6?F(s/3,2,c) f(1) F(s/3*2,1,c)",
+                            "F(h,i,k)<F(s,t,c)>F(o,p,r):(s>3.9 or c>0.4) and t!=0?F(s+0.1,t,c+0.25*(k+r-3*c))",
+                            "F(h,i,k)<F(s,t,c)>F(o,p,r):s<3.9 and c<0.4 and t!=0?F(1,0,900)",
+                            "F(s,t,c):t==0 and s<=3?F(s*1.1,t,c)"],
+            "ignore": "f ~ H", "definitions": [], "nrOfIterations": 200}
+
+########################################
+#             3D EXAMPLES              #
+########################################
+EXAMPLES_3D = {
+    0: {"name": "Shrub with leaves", "type": "3D",
+        "axiom": "A",
+        "productions": ["A?'(151,75,0) [ & F L ! A ] / / / / / '(151,75,0) [ & F L ! A ] / / / / / / / '(151,75,0) [ & F L ! A ]",
+                        "F?S / / / / / F",
+                        "S?F L",
+                        "L?[ '(12,102,0) ^ ^ { - f + f + f - | - f + f + f } ]"],
+        "ignore": "", "definitions": [], "nrOfIterations": 7,
+        "width": 1, "tropismVector": (0,0,0), "tropismStrength": 0},
+    1: {"name": "Simple tree 1", "type": "3D",
+        "axiom": "A(10,1)",
+        "productions": ["A(l,w)?!(w) F(l) [ &(a0) B(l*r2,w*wr) ] /(137.5) A(l*r1,w*wr)",
+                        "B(l,w)?!(w) F(l) [ -(a2) $ C(l*r2,w*wr) ] C(l*r1,w*wr)",
+                        "C(l,w)?!(w) F(l) [ +(a2) $ B(l*r2,w*wr) ] B(l*r1,w*wr)"],
+        "ignore": "",
+        "definitions": [['r1', 0.9],
+                        ['r2', 0.6],
+                        ['a0', 45],
+                        ['a2', 45],
+                        ['d', 137.5],
+                        ['wr', 0.707]
+                        ],
+        "nrOfIterations": 10,
+        "width": 1, "tropismVector": (0,0,0), "tropismStrength": 0},
+    2: {"name": "Simple tree 2", "type": "3D",
+        "axiom": "A(10,1)",
+        "productions": ["A(l,w)?!(w) F(l) [ &(a0) B(l*r2,w*wr) ] /(d) A(l*r1,w*wr)",
+                        "B(l,w)?!(w) F(l) [ -(a2) $ C(l*r2,w*wr) ] C(l*r1,w*wr)",
+                        "C(l,w)?!(w) F(l) [ +(a2) $ B(l*r2,w*wr) ] B(l*r1,w*wr)"],
+        "ignore": "",
+        "definitions": [['r1', 0.9],
+                        ['r2', 0.7],
+                        ['a0', 30],
+                        ['a2', -30],
+                        ['d', 137.5],
+                        ['wr', 0.707]
+                        ],
+        "nrOfIterations": 10,
+        "width": 1, "tropismVector": (0,0,0), "tropismStrength": 0},
+    3: {"name": "Tree with phototropism", "type": "3D",
+        "axiom": "!(1) F(200) /(45) A",
+        "productions": ["A?!(vr) F(50) [ &(a) F(50) A ] /(d1) [ &(a) F(50) A ] /(d2) [ &(a) F(50) A ]",
+                        "F(l)?F(l*lr)",
+                        "!(w)?!(w*vr)"],
+        "ignore": "",
+        "definitions": [['d1', 180],
+                        ['d2', 252],
+                        ['a', 36],
+                        ['lr', 1.07],
+                        ['vr', 1.732],
+                        ],
+        "nrOfIterations": 6,
+        "width": 1 * 1.732 ** (6 + 0.5), "tropismVector": (0.61,0.77,-0.19), "tropismStrength": 0.4},
+}
+
+
+if __name__ == "__main__":
+    print("For examples refer to: LSystems_examples.py")
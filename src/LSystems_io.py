@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_io.py is a module for writing generations of L-systems to disk and
+reading them back, such that large generations can be handed between programs
+without keeping them in memory or parsing them again.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: This module depends on LSystems.py, further only on the standard library.
+
+OVERVIEW:     Binary word files: writeWord writes the modules of any iterable (e.g. a
+              generation or a generator of modules) to a binary file. The file consists of
+              a header, an array with a symbol id per module, an array with the offsets
+              of the parameters of every module, a buffer with all parameters (as 64 bit
+              floats) and a table with the symbols. The number of parameters of module i
+              is offsets[i+1] - offsets[i].
+              readWord memory-maps such a file and returns a WordFile, a read-only sequence
+              of modules that is only decoded when a module is accessed. A WordFile can be
+              used wherever a list of modules is read, e.g. by the turtle interpretations.
+
+              Text files: writeGeneration writes a generation in the syntax of axioms
+              (e.g. "F(1.0,0.0,900.0) f(1.0) F(4.0,1.0,900.0)", see stringToAxiom) to a
+              file, optionally compressed with gzip or lzma. readGeneration and
+              iterGeneration read such a file back.
+
+              Generation cache: GenerationCache stores generations on disk, keyed by a hash
+              of the L-system, such that a generation that was computed before (by anyone
+              using the same cache directory) does not have to be computed again.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from random import seed as seedRandom
+from LSystems import Module, LSystem, loadCheckpoint
+
+########################################
+#          BINARY WORD FILES           #
+########################################
+WORD_MAGIC     = b"LSWORD\x00\x00"
+WORD_VERSION   = 1
+BYTE_ORDER     = 0x01020304    # written in native byte order, to detect files from other platforms
+# magic, version, byte order, modules, parameters, symbols and the offset and size of the sections
+WORD_HEADER    = struct.Struct("=8sIIQQQQQQQQ")
+
+def writeWord(filename, modules, chunkSize = 65536):
+    """Writes the modules of an iterable to a binary word file, returns the number of modules.
+
+    The modules are written in chunks of chunkSize modules, such that the memory use does
+    not depend on the number of modules (e.g. when modules is a generator).
+    Parameters are stored as 64 bit floats, so they should be numbers.
+    """
+    symbols = {}
+    nrOfModules = 0
+    nrOfParams = 0
+    directory = os.path.dirname(os.path.abspath(filename))
+    with open(filename, "wb") as f, tempfile.TemporaryFile(dir = directory) as offsetFile, tempfile.TemporaryFile(dir = directory) as paramFile:
+        f.write(b"\x00" * WORD_HEADER.size)
+        ids = array("I")
+        offsets = array("Q", [0])
+        params = array("d")
+        for mod in modules:
+            symbolId = symbols.get(mod.symbol)
+            if symbolId is None:
+                symbolId = len(symbols)
+                symbols[mod.symbol] = symbolId
+            ids.append(symbolId)
+            try:
+                params.extend(mod.param)
+            except TypeError:
+                raise ValueError("parameters of module " + str(nrOfModules) + " are not numeric: " + str(mod.symbol) + str(mod.param))
+            nrOfParams = nrOfParams + len(mod.param)
+            offsets.append(nrOfParams)
+            nrOfModules = nrOfModules + 1
+            if len(ids) >= chunkSize:
+                ids.tofile(f)
+                offsets.tofile(offsetFile)
+                params.tofile(paramFile)
+                ids = array("I")
+                offsets = array("Q")
+                params = array("d")
+        ids.tofile(f)
+        offsets.tofile(offsetFile)
+        params.tofile(paramFile)
+        # the offsets and parameters follow the symbol ids, aligned to 8 bytes
+        idsOffset = WORD_HEADER.size
+        f.write(b"\x00" * (-f.tell() % 8))
+        offsetsOffset = f.tell()
+        copyFile(offsetFile, f)
+        paramsOffset = f.tell()
+        copyFile(paramFile, f)
+        symbolsOffset = f.tell()
+        table = [None] * len(symbols)
+        for symbol in symbols:
+            table[symbols[symbol]] = symbol
+        symbolData = json.dumps(table).encode("utf-8")
+        f.write(symbolData)
+        f.seek(0)
+        f.write(WORD_HEADER.pack(WORD_MAGIC, WORD_VERSION, BYTE_ORDER, nrOfModules, nrOfParams, len(symbols),
+                                 idsOffset, offsetsOffset, paramsOffset, symbolsOffset, len(symbolData)))
+    return(nrOfModules)
+
+def readWord(filename):
+    """Memory-maps a binary word file (see writeWord) and returns it as a WordFile."""
+    return(WordFile(filename))
+
+
+class WordView:
+    """WordView is a read-only sequence of modules stored in arrays (e.g. a memory-mapped word file).
+
+    Modules are only created when they are accessed, slicing returns a WordView on
+    the same arrays (no copy). symbolAt(i) returns just the symbol of module i.
+    """
+    def __init__(self, symbols, ids, offsets, params, start, stop):
+        self.symbols = symbols        # list of symbols, indexed by symbol id
+        self.ids     = ids            # symbol id of every module
+        self.offsets = offsets        # offset of the parameters of every module (one extra at the end)
+        self.params  = params         # all parameters
+        self.start   = start
+        self.stop    = stop
+
+    def __len__(self):
+        return(self.stop - self.start)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return([self[i] for i in range(start, stop, step)])
+            return(WordView(self.symbols, self.ids, self.offsets, self.params, self.start + start, self.start + max(start, stop)))
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("word index out of range")
+        i = self.start + index
+        return(Module(self.symbols[self.ids[i]], self.params[self.offsets[i]:self.offsets[i + 1]].tolist()))
+
+    def __iter__(self):
+        symbols = self.symbols
+        ids = self.ids
+        offsets = self.offsets
+        params = self.params
+        for i in range(self.start, self.stop):
+            yield Module(symbols[ids[i]], params[offsets[i]:offsets[i + 1]].tolist())
+
+    def symbolAt(self, index):
+        """Returns the symbol of the module at index (without creating the module)."""
+        return(self.symbols[self.ids[self.start + index]])
+
+
+class WordFile(WordView):
+    """WordFile is a memory-mapped binary word file, see writeWord and WordView.
+
+    Call close() (or use it in a with statement) to release the file, slices
+    (views) obtained from it may not be used afterwards.
+    """
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        (magic, version, byteOrder, nrOfModules, nrOfParams, nrOfSymbols, idsOffset, offsetsOffset,
+         paramsOffset, symbolsOffset, symbolsSize) = WORD_HEADER.unpack_from(self.map, 0)
+        if magic != WORD_MAGIC:
+            self.close()
+            raise ValueError(filename + " is not a binary word file")
+        if version > WORD_VERSION:
+            self.close()
+            raise ValueError(filename + " has version " + str(version) + ", this module only reads up to version " + str(WORD_VERSION))
+        if byteOrder != BYTE_ORDER:
+            self.close()
+            raise ValueError(filename + " was written on a platform with another byte order")
+        self.view = memoryview(self.map)
+        symbols = json.loads(bytes(self.view[symbolsOffset:(symbolsOffset + symbolsSize)]).decode("utf-8"))
+        ids = self.view[idsOffset:(idsOffset + 4*nrOfModules)].cast("I")
+        offsets = self.view[offsetsOffset:(offsetsOffset + 8*(nrOfModules + 1))].cast("Q")
+        params = self.view[paramsOffset:(paramsOffset + 8*nrOfParams)].cast("d")
+        WordView.__init__(self, symbols, ids, offsets, params, 0, nrOfModules)
+
+    def close(self):
+        """Releases the memory map and closes the file."""
+        if hasattr(self, "view"):
+            for buffer in (self.ids, self.offsets, self.params, self.view):
+                buffer.release()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args):
+        self.close()
+
+########################################
+#              TEXT FILES              #
+########################################
+def writeGeneration(word, file, floatFormat = None, compression = None, chunkSize = 65536):
+    """Writes a generation as text (modules separated by spaces) to file, returns the number of modules.
+
+    file is a filename or a file object (text or binary). The text can be read back by 
+    readGeneration or stringToAxiom. floatFormat is a format specification for the 
+    parameters (e.g. ".6g") or a function that converts a parameter to a string, by default
+    parameters are written exactly (repr). compression is None, "gzip" or "lzma"; for 
+    filenames ending on .gz, .xz or .lzma it is chosen automatically.
+    The modules are converted in chunks of chunkSize modules, every chunk is written at once.
+    """
+    if floatFormat is None:
+        fmt = repr
+    elif callable(floatFormat):
+        fmt = floatFormat
+    else:
+        fmt = lambda x: format(x, floatFormat)
+    f, finish = openTextFile(file, "w", compression)
+    try:
+        pieces = []
+        separator = ""
+        nrOfModules = 0
+        for mod in word:
+            if mod.param != []:
+                pieces.append(mod.symbol + "(" + ",".join(map(fmt, mod.param)) + ")")
+            else:
+                pieces.append(mod.symbol)
+            if len(pieces) >= chunkSize:
+                f.write(separator + " ".join(pieces))
+                nrOfModules = nrOfModules + len(pieces)
+                separator = " "
+                pieces = []
+        if pieces != []:
+            f.write(separator + " ".join(pieces))
+            nrOfModules = nrOfModules + len(pieces)
+        f.write("\n")
+    finally:
+        finish()
+    return(nrOfModules)
+
+def iterGeneration(file, compression = None, bufferSize = 1 << 20):
+    """Reads a generation written by writeGeneration (or any axiom) from file and yields its modules.
+
+    file is a filename or a file object, see writeGeneration for compression. The file is 
+    read in blocks of bufferSize characters, so the whole text is never in memory.
+    """
+    f, finish = openTextFile(file, "r", compression)
+    try:
+        rest = ""
+        while True:
+            data = f.read(bufferSize)
+            if not data:
+                break
+            data = rest + data
+            # a module may continue in the next block
+            end = max(data.rfind(" "), data.rfind("\n"), data.rfind("\t"))
+            rest = data[(end + 1):]
+            yield from parseModules(data[:(end + 1)].split())
+        yield from parseModules(rest.split())
+    finally:
+        finish()
+
+def readGeneration(file, compression = None):
+    """Reads a generation written by writeGeneration from file and returns it as a list of modules."""
+    return(list(iterGeneration(file, compression)))
+
+def parseModules(strings):
+    """Parses a list of strings with a single module each (like stringToMod), returns a list of modules.
+
+    Only a string of the form symbol(parameters), with a single pair of brackets, has parameters,
+    any other string (e.g. "a)") is a symbol without parameters. The speed (about 400000 modules
+    per second on a single core) is bound by the creation of the Module objects.
+    """
+    modules = []
+    append = modules.append
+    for string in strings:
+        if string[-1] == ")":
+            i = string.find("(")
+            if i > 0 and string.find(")") == len(string) - 1 and string.find("(", i + 1) < 0:
+                append(Module(string[:i], list(map(float, string[(i + 1):-1].split(",")))))
+                continue
+        append(Module(string, []))
+    return(modules)
+
+def openTextFile(file, mode, compression):
+    """Opens a filename or wraps a file object as a text file for mode "r" or "w".
+
+    Returns the text file and a function that has to be called when done, this closes
+    what was opened here but never a file object that was passed in.
+    """
+    if isinstance(file, (str, bytes, os.PathLike)):
+        if compression is None:
+            name = os.fspath(file)
+            if isinstance(name, bytes):
+                name = name.decode()
+            if name.endswith(".gz"):
+                compression = "gzip"
+            elif name.endswith(".xz") or name.endswith(".lzma"):
+                compression = "lzma"
+        if compression == "gzip":
+            f = gzip.open(file, mode + "t", encoding = "utf-8")
+        elif compression == "lzma":
+            f = lzma.open(file, mode + "t", encoding = "utf-8")
+        elif compression is None:
+            f = open(file, mode, encoding = "utf-8", buffering = 1 << 20)
+        else:
+            raise ValueError("unknown compression: " + str(compression))
+        return(f, f.close)
+    if compression is not None:
+        if compression == "gzip":
+            binary = gzip.GzipFile(fileobj = file, mode = mode + "b")
+        elif compression == "lzma":
+            binary = lzma.LZMAFile(file, mode + "b")
+        else:
+            raise ValueError("unknown compression: " + str(compression))
+        f = io.TextIOWrapper(binary, encoding = "utf-8")
+        return(f, f.close)  # closes the compressed stream, not the file object itself
+    if isinstance(file, io.TextIOBase):
+        return(file, file.flush if mode == "w" else (lambda: None))
+    f = io.TextIOWrapper(file, encoding = "utf-8")
+    def finish():
+        f.flush()
+        f.detach()
+    return(f, finish)
+
+########################################
+#           GENERATION CACHE           #
+########################################
+CACHE_VERSION = 1    # increase when changes to LSystems.py change the generations
+
+class GenerationCache:
+    """GenerationCache stores generations of L-systems on disk, keyed by a hash of the L-system.
+
+    Every entry is a checkpoint (see LSystem.saveCheckpoint) stored as 
+    directory/<hash of the L-system>/<generation>.ckpt. If the entries take more than 
+    maxBytes bytes, the least recently used entries are removed.
+    Stochastic L-systems are only cached when a seed for the random generator is given.
+    """
+    def __init__(self, directory, maxBytes = 1 << 30):
+        self.directory = directory
+        self.maxBytes  = maxBytes
+        os.makedirs(directory, exist_ok = True)
+
+    def key(self, axiom, productions, ignore = [], definitions = [], seed = None):
+        """Returns the hash of an L-system (and the seed of the random generator)."""
+        grammar = {"version": CACHE_VERSION, "axiom": axiom, "productions": list(productions),
+                   "ignore": ignore, "definitions": definitions, "seed": seed}
+        return(hashlib.sha256(json.dumps(grammar, sort_keys = True, separators = (",", ":")).encode("utf-8")).hexdigest())
+
+    def deepest(self, key, generation):
+        """Returns the deepest cached generation of key that is at most 'generation', None if there is none."""
+        directory = os.path.join(self.directory, key)
+        if not os.path.isdir(directory):
+            return(None)
+        cached = [int(name[:-5]) for name in os.listdir(directory) if name.endswith(".ckpt") and name[:-5].isdigit()]
+        cached = [gen for gen in cached if gen <= generation]
+        if cached == []:
+            return(None)
+        return(max(cached))
+
+    def filename(self, key, generation):
+        """Returns the name of the file of a cache entry."""
+        return(os.path.join(self.directory, key, str(generation) + ".ckpt"))
+
+    def computeGeneration(self, generation, axiom, productions, ignore = [], definitions = [], seed = None, memoSize = 0, store = True):
+        """Returns an LSystem whose word is the requested generation, starting from the deepest cached generation.
+
+        For stochastic L-systems the random generator is seeded with 'seed' before the first
+        generation (or restored to its state at the cached generation), without a seed they
+        are computed without the cache. If store is True every computed generation is cached.
+        """
+        system = LSystem(axiom, productions, ignore, definitions, memoSize)
+        deterministic = isDeterministic(system)
+        if not deterministic and seed is None:
+            for j in range(generation):
+                system.nextGeneration()
+            return(system)
+        if deterministic:
+            seed = None  # the seed has no influence on the generations
+        key = self.key(axiom, productions, ignore, definitions, seed)
+        cached = self.deepest(key, generation)
+        if cached is not None:
+            filename = self.filename(key, cached)
+            try:
+                system = loadCheckpoint(filename, restoreRandom = not deterministic)
+                system.setMemoSize(memoSize)
+                os.utime(filename)  # mark as recently used
+            except (OSError, ValueError, EOFError):
+                cached = None       # damaged or removed by another process
+        if cached is None:
+            system = LSystem(axiom, productions, ignore, definitions, memoSize)
+            if seed is not None:
+                seedRandom(seed)
+        while system.generation < generation:
+            system.nextGeneration()
+            if store:
+                os.makedirs(os.path.join(self.directory, key), exist_ok = True)
+                system.saveCheckpoint(self.filename(key, system.generation))
+        if store:
+            self.evict()
+        return(system)
+
+    def size(self):
+        """Returns the total size of all cache entries in bytes."""
+        return(sum([entry[2] for entry in self.entries()]))
+
+    def entries(self):
+        """Returns a list of [time of last use, filename, size] for every cache entry."""
+        entries = []
+        for key in os.listdir(self.directory):
+            directory = os.path.join(self.directory, key)
+            if os.path.isdir(directory):
+                for name in os.listdir(directory):
+                    if name.endswith(".ckpt"):
+                        filename = os.path.join(directory, name)
+                        try:
+                            info = os.stat(filename)
+                        except OSError:
+                            continue
+                        entries.append([info.st_mtime, filename, info.st_size])
+        return(entries)
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in maxBytes, returns the number removed."""
+        entries = sorted(self.entries())
+        total = sum([entry[2] for entry in entries])
+        removed = 0
+        for lastUse, filename, size in entries:
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            total = total - size
+            removed = removed + 1
+        return(removed)
+
+    def clear(self):
+        """Removes all cache entries."""
+        for lastUse, filename, size in self.entries():
+            os.remove(filename)
+
+########################################
+#          AUXILIARY FUNCTIONS         #
+########################################
+def isDeterministic(system):
+    """Returns True if the generations of an L-system do not depend on the random generator."""
+    for rule in system.productionRules:
+        if not rule.isDeterministic():
+            return(False)
+        if rule.condition != "" and "random" in rule.condition.symbols():
+            return(False)
+        for temporary in rule.temporaries.values():
+            if "random" in temporary.symbols():
+                return(False)
+    return(True)
+
+def copyFile(source, destination, bufferSize = 1 << 20):
+    """Copies the contents of the open file source (from the start) to the open file destination."""
+    source.seek(0)
+    while True:
+        data = source.read(bufferSize)
+        if not data:
+            break
+        destination.write(data)
+
+
+if __name__ == "__main__":
+    print("For examples refer to: LSystems_examples.py")
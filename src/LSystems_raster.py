@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_raster.py draws line segments (e.g. from turtle_segments in LSystems_geometry.py)
+into an image (a NumPy array) and writes images as PNG files. PNG files are written with
+zlib from the standard library, no imaging package is needed.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: This module depends on NumPy (https://numpy.org).
+
+OVERVIEW:     Segments are drawn into a coverage: an array with for every pixel how much
+              of it is covered (from 0 to 1). newCoverage creates one, drawLines draws
+              lines in pixel coordinates into it and drawSegments draws Segments (with
+              an optional line width per branch depth). composite turns a coverage into
+              an RGB image and savePNG writes an image to a file. worldToPixels computes
+              the image size and transformation that fit a bounding box, rasterize does
+              all of this at once.
+
+              For large images rasterizeTiled and saveTiledPNG split the image into
+              tiles, which are drawn in parallel by a pool of processes that share
+              the segments through shared memory (see renderBands). renderChunks does
+              the same for segments that are given in chunks, e.g. read from a file.
+"""
+
+import struct
+import zlib
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+MAX_SAMPLES = 1 << 22   # maximum number of samples drawn at once by drawLines
+TILE_SIZE   = 1024      # default width and height of the tiles, see renderBands
+
+########################################
+#                IMAGES                #
+########################################
+def worldToPixels(bounds, size, margin = 0.02):
+    """Returns the image size (width, height) and a transformation for a drawing with the given bounds.
+
+    The largest side of the drawing gets size pixels (plus a margin on every side, as a fraction
+    of that side). The transformation is (scale, xoffset, yoffset): the pixel coordinates of a
+    point (x, y) are (x * scale + xoffset, yoffset - y * scale), since rows run downwards.
+    """
+    xmin, ymin, xmax, ymax = bounds
+    extent = max(xmax - xmin, ymax - ymin)
+    if extent <= 0:
+        extent = 1.0
+    scale = size / (extent * (1 + 2 * margin))
+    border = margin * extent * scale
+    width = int(np.ceil((xmax - xmin) * scale + 2 * border)) + 1
+    height = int(np.ceil((ymax - ymin) * scale + 2 * border)) + 1
+    return((width, height), (scale, border - xmin * scale, border + ymax * scale))
+
+def toPixels(points, transformation):
+    """Returns the pixel coordinates of an (n, 2) array of points, see worldToPixels."""
+    scale, xoffset, yoffset = transformation
+    pixels = np.empty(points.shape, dtype = float)
+    pixels[:, 0] = points[:, 0] * scale + xoffset
+    pixels[:, 1] = yoffset - points[:, 1] * scale
+    return(pixels)
+
+########################################
+#              RASTERIZING             #
+########################################
+def newCoverage(columns, rows):
+    """Returns an empty coverage: a (rows, columns) float32 array, drawing adds coverage (1 is fully covered)."""
+    return(np.zeros((rows, columns), dtype = np.float32))
+
+def drawLines(coverage, start, end, width = 1, antialias = False, origin = (0, 0)):
+    """Draws lines into a coverage, start and end are (n, 2) arrays with pixel coordinates.
+
+    Every line is sampled once per pixel along its major axis (x or y, whichever changes most).
+    At every sample the pen covers 'width' pixels perpendicular to the line. With antialias
+    the pixels at the edges of the pen get a partial coverage, otherwise a pixel is covered
+    when its center is. origin is the pixel (column, row) of the first pixel of the coverage,
+    such that a coverage can be a tile of a larger image. Parts outside the coverage are left out.
+    """
+    delta = np.abs(end - start)
+    xMajor = delta[:, 0] >= delta[:, 1]
+    yMajor = ~xMajor
+    drawMajor(coverage, start[xMajor, 0], start[xMajor, 1], end[xMajor, 0], end[xMajor, 1], width, antialias, True, origin)
+    drawMajor(coverage, start[yMajor, 1], start[yMajor, 0], end[yMajor, 1], end[yMajor, 0], width, antialias, False, origin)
+    return(coverage)
+
+def drawMajor(coverage, a0, b0, a1, b1, width, antialias, xMajor, origin = (0, 0)):
+    """Draws lines from (a0, b0) to (a1, b1), a is the major axis: x if xMajor, else y."""
+    rows, columns = coverage.shape
+    if xMajor:
+        majorSize, minorSize, majorOrigin, minorOrigin = columns, rows, origin[0], origin[1]
+    else:
+        majorSize, minorSize, majorOrigin, minorOrigin = rows, columns, origin[1], origin[0]
+    pixels = coverage.reshape(-1)
+    m0 = np.rint(a0)
+    m1 = np.rint(a1)
+    span = a1 - a0
+    slope = np.divide(b1 - b0, span, out = np.zeros(len(span)), where = span != 0)
+    # half the width of the pen along the minor axis
+    half = 0.5 * width * np.sqrt(1 + slope * slope)
+    # only the samples within the coverage are drawn
+    lowest = np.maximum(np.minimum(m0, m1), majorOrigin)
+    highest = np.minimum(np.maximum(m0, m1), majorOrigin + majorSize - 1)
+    samples = np.maximum(highest - lowest + 1, 0).astype(np.int64)
+    total = np.cumsum(samples)
+    first = 0
+    while first < len(samples):
+        # draw in batches of at most MAX_SAMPLES samples
+        offset = total[first] - samples[first]
+        last = max(first + 1, int(np.searchsorted(total, offset + MAX_SAMPLES, side = "right")))
+        n = samples[first:last]
+        index = np.repeat(np.arange(first, last), n)
+        first = last
+        if len(index) == 0:
+            continue
+        m = lowest[index] + (np.arange(len(index)) - np.repeat(np.cumsum(n) - n, n))
+        c = b0[index] + (m - a0[index]) * slope[index]
+        lo = c - half[index]
+        hi = c + half[index]
+        p0 = np.floor(lo + 0.5)
+        major = (m - majorOrigin).astype(np.int64)
+        for k in range(0, int(np.max(np.floor(hi + 0.5) - p0)) + 1):
+            p = p0 + k
+            if antialias:
+                weight = np.minimum(hi, p + 0.5) - np.maximum(lo, p - 0.5)
+                mask = (weight > 0) & (p >= minorOrigin) & (p < minorOrigin + minorSize)
+            else:
+                mask = (p >= lo) & (p < hi) & (p >= minorOrigin) & (p < minorOrigin + minorSize)
+            minor = p[mask].astype(np.int64) - minorOrigin
+            if xMajor:
+                flat = minor * columns + major[mask]
+            else:
+                flat = major[mask] * columns + minor
+            if antialias:
+                np.add.at(pixels, flat, weight[mask].astype(np.float32))
+            else:
+                pixels[flat] = 1
+
+def lineWidths(depth, widths):
+    """Returns the line width of every segment, widths is a width or a list with a width per branch depth."""
+    if np.isscalar(widths):
+        return(np.full(len(depth), float(widths)))
+    widths = np.asarray(widths, dtype = float)
+    return(widths[np.minimum(depth, len(widths) - 1)])
+
+def drawSegments(coverage, segments, transformation, widths = 1, antialias = False):
+    """Draws the drawn Segments (see LSystems_geometry.py) into a coverage, see worldToPixels for the transformation.
+
+    widths is the line width in pixels, or a list with a width per branch depth (the last
+    width is used for all deeper branches), e.g. [4, 3, 2, 1].
+    """
+    drawn = segments.drawn()
+    start = toPixels(drawn.start, transformation)
+    end = toPixels(drawn.end, transformation)
+    if np.isscalar(widths):
+        return(drawLines(coverage, start, end, widths, antialias))
+    return(drawWidths(coverage, start, end, lineWidths(drawn.depth, widths), antialias))
+
+def drawWidths(coverage, start, end, widths, antialias = False, origin = (0, 0)):
+    """Draws lines with a width per line (an array), see drawLines."""
+    for width in np.unique(widths):
+        selected = widths == width
+        drawLines(coverage, start[selected], end[selected], width, antialias, origin)
+    return(coverage)
+
+def composite(coverage, color = (0, 0, 0), background = (255, 255, 255), rowsPerBlock = 512):
+    """Returns an RGB image with the color drawn over the background according to the coverage."""
+    rows, columns = coverage.shape
+    image = np.empty((rows, columns, 3), dtype = np.uint8)
+    color = np.asarray(color, dtype = np.float32)
+    background = np.asarray(background, dtype = np.float32)
+    for first in range(0, rows, rowsPerBlock):
+        alpha = np.clip(coverage[first:(first + rowsPerBlock)], 0, 1)[:, :, None]
+        image[first:(first + rowsPerBlock)] = background + alpha * (color - background) + 0.5
+    return(image)
+
+def rasterize(segments, size = 1000, widths = 1, antialias = True, color = (0, 0, 0), background = (255, 255, 255), margin = 0.02):
+    """Returns an RGB image of Segments, whose largest side gets size pixels (see worldToPixels)."""
+    (columns, rows), transformation = worldToPixels(segments.bounds, size, margin)
+    coverage = newCoverage(columns, rows)
+    drawSegments(coverage, segments, transformation, widths, antialias)
+    return(composite(coverage, color, background))
+
+########################################
+#                TILES                 #
+########################################
+def tileBins(start, end, widths, columns, rows, tileSize = TILE_SIZE):
+    """Bins lines (pixel coordinates) by tile, returns (lines, offsets): tile t draws lines[offsets[t]:offsets[t + 1]].
+
+    The tiles are numbered row by row. A line is put in every tile that its bounding box,
+    widened by its width, overlaps, lines outside the image are left out.
+    """
+    tilesX = -(-columns // tileSize)
+    tilesY = -(-rows // tileSize)
+    lo = np.minimum(start, end) - widths[:, None] - 1
+    hi = np.maximum(start, end) + widths[:, None] + 1
+    visible = (hi[:, 0] >= 0) & (lo[:, 0] < columns) & (hi[:, 1] >= 0) & (lo[:, 1] < rows)
+    x0 = np.clip(lo[:, 0] // tileSize, 0, tilesX - 1).astype(np.int64)
+    x1 = np.clip(hi[:, 0] // tileSize, 0, tilesX - 1).astype(np.int64)
+    y0 = np.clip(lo[:, 1] // tileSize, 0, tilesY - 1).astype(np.int64)
+    y1 = np.clip(hi[:, 1] // tileSize, 0, tilesY - 1).astype(np.int64)
+    across = x1 - x0 + 1
+    counts = np.where(visible, across * (y1 - y0 + 1), 0)
+    lines = np.repeat(np.arange(len(start)), counts)
+    k = np.arange(len(lines)) - np.repeat(np.cumsum(counts) - counts, counts)
+    tiles = (y0[lines] + k // across[lines]) * tilesX + x0[lines] + k % across[lines]
+    # a stable sort keeps the lines of a tile in drawing order
+    order = np.argsort(tiles, kind = "stable")
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(tiles, minlength = tilesX * tilesY))))
+    return(lines[order], offsets)
+
+def renderBands(start, end, widths, columns, rows, antialias = True, color = (0, 0, 0), background = (255, 255, 255),
+                tileSize = TILE_SIZE, processes = None):
+    """Renders lines (pixel coordinates, a width per line) tile by tile, yields the image in bands of tiles.
+
+    The lines are binned by tile (see tileBins) and put in shared memory, the tiles are drawn
+    and composited by a pool of processes (processes = None uses all cores). Yields (row, band)
+    for every row of tiles, band is an RGB image of tileSize rows (fewer for the last band) 
+    that starts at image row 'row'. The image itself is never stored as a whole.
+    """
+    yield from renderChunks([(start, end, widths)], len(start), columns, rows, antialias, color, background, tileSize, processes)
+
+def renderChunks(chunks, nrOfLines, columns, rows, antialias = True, color = (0, 0, 0), background = (255, 255, 255),
+                 tileSize = TILE_SIZE, processes = None):
+    """Like renderBands, for lines given as an iterable of (start, end, widths) chunks of at most nrOfLines lines in total.
+
+    The chunks are copied to shared memory one by one (see shareLines), so the lines never
+    have to be in the memory of this process as a whole.
+    """
+    tilesX = -(-columns // tileSize)
+    tilesY = -(-rows // tileSize)
+    buffers, shared, offsets = shareLines(chunks, nrOfLines, columns, rows, tileSize)
+    try:
+        tasks = []
+        for ty in range(tilesY):
+            for tx in range(tilesX):
+                t = ty * tilesX + tx
+                tile = (tx * tileSize, ty * tileSize, min(tileSize, columns - tx * tileSize), min(tileSize, rows - ty * tileSize))
+                tasks.append((shared, tile, int(offsets[t]), int(offsets[t + 1]), antialias, color, background))
+        if processes == 1:
+            images = map(renderTile, tasks)
+            for ty in range(tilesY):
+                yield(ty * tileSize, np.concatenate([next(images) for tx in range(tilesX)], axis = 1))
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                images = pool.imap(renderTile, tasks)
+                for ty in range(tilesY):
+                    yield(ty * tileSize, np.concatenate([next(images) for tx in range(tilesX)], axis = 1))
+    finally:
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+
+def shareLines(chunks, nrOfLines, columns, rows, tileSize = TILE_SIZE, chunkSize = 65536):
+    """Puts lines and their tile bins in shared memory, returns (buffers, shared, offsets) for renderTile.
+
+    chunks is an iterable of (start, end, widths) with at most nrOfLines lines in total. In a
+    first pass the chunks are copied to shared memory and the lines per tile are counted, in
+    a second pass (over the shared lines, chunkSize at a time) the bins are filled in, such
+    that tile t draws the lines bins[offsets[t]:offsets[t + 1]] in their original order.
+    The caller closes and unlinks the buffers.
+    """
+    tilesX = -(-columns // tileSize)
+    tilesY = -(-rows // tileSize)
+    buffers = [SharedMemory(create = True, size = max(1, 5 * 8 * nrOfLines))]
+    try:
+        data = np.ndarray((nrOfLines, 5), dtype = float, buffer = buffers[0].buf)
+        counts = np.zeros(tilesX * tilesY, dtype = np.int64)
+        nrOfLines = 0
+        chunk = None
+        for start, end, widths in chunks:
+            data[nrOfLines:(nrOfLines + len(start))] = np.column_stack((start, end, widths))
+            nrOfLines = nrOfLines + len(start)
+            counts = counts + np.diff(tileBins(start, end, widths, columns, rows, tileSize)[1])
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        buffers.append(SharedMemory(create = True, size = max(1, 8 * int(offsets[-1]))))
+        bins = np.ndarray((int(offsets[-1]),), dtype = np.int64, buffer = buffers[1].buf)
+        filled = offsets[:-1].copy()
+        for first in range(0, nrOfLines, chunkSize):
+            chunk = data[first:min(first + chunkSize, nrOfLines)]
+            lines, chunkOffsets = tileBins(chunk[:, 0:2], chunk[:, 2:4], chunk[:, 4], columns, rows, tileSize)
+            sizes = np.diff(chunkOffsets)
+            tiles = np.repeat(np.arange(len(sizes)), sizes)
+            bins[filled[tiles] + np.arange(len(lines)) - chunkOffsets[tiles]] = lines + first
+            filled = filled + sizes
+        # the views have to be released before the buffers can be closed
+        del data, chunk, bins
+        return(buffers, (buffers[0].name, nrOfLines, buffers[1].name, int(offsets[-1])), offsets)
+    except BaseException:
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+        raise
+
+def renderTile(task):
+    """Draws and composites one tile, see renderBands. Returns the RGB image of the tile."""
+    shared, (left, top, columns, rows), first, last, antialias, color, background = task
+    dataName, nrOfLines, linesName, nrOfEntries = shared
+    dataBuffer = SharedMemory(name = dataName)
+    linesBuffer = SharedMemory(name = linesName)
+    try:
+        lines = np.ndarray((nrOfEntries,), dtype = np.int64, buffer = linesBuffer.buf)[first:last]
+        data = np.ndarray((nrOfLines, 5), dtype = float, buffer = dataBuffer.buf)[lines]   # a copy
+        del lines
+    finally:
+        dataBuffer.close()
+        linesBuffer.close()
+    coverage = newCoverage(columns, rows)
+    drawWidths(coverage, data[:, 0:2], data[:, 2:4], data[:, 4], antialias, (left, top))
+    return(composite(coverage, color, background))
+
+def tiledLines(segments, size, widths, margin):
+    """Returns the image size and the drawn segments in pixel coordinates with their widths, for renderBands."""
+    (columns, rows), transformation = worldToPixels(segments.bounds, size, margin)
+    drawn = segments.drawn()
+    return(columns, rows, toPixels(drawn.start, transformation), toPixels(drawn.end, transformation), lineWidths(drawn.depth, widths))
+
+def rasterizeTiled(segments, size = 1000, widths = 1, antialias = True, color = (0, 0, 0), background = (255, 255, 255), margin = 0.02,
+                   tileSize = TILE_SIZE, processes = None):
+    """Returns the same image as rasterize, but draws it in tiles with a pool of processes (see renderBands)."""
+    columns, rows, start, end, lineWidths = tiledLines(segments, size, widths, margin)
+    image = np.empty((rows, columns, 3), dtype = np.uint8)
+    for row, band in renderBands(start, end, lineWidths, columns, rows, antialias, color, background, tileSize, processes):
+        image[row:(row + len(band))] = band
+    return(image)
+
+def saveTiledPNG(segments, file, size = 1000, widths = 1, antialias = True, color = (0, 0, 0), background = (255, 255, 255), margin = 0.02,
+                 tileSize = TILE_SIZE, processes = None, compression = 6):
+    """Draws Segments in tiles with a pool of processes (see renderBands) and writes them as PNG.
+
+    Only one row of tiles of the image is in memory at a time, so this is suitable for posters
+    that do not fit in memory as a whole.
+    """
+    columns, rows, start, end, lineWidths = tiledLines(segments, size, widths, margin)
+    bands = renderBands(start, end, lineWidths, columns, rows, antialias, color, background, tileSize, processes)
+    savePNGRows((band for row, band in bands), columns, rows, 3, file, compression)
+
+########################################
+#                 PNG                  #
+########################################
+def savePNG(image, file, compression = 6, rowsPerBlock = 256):
+    """Writes an image (a (height, width) or (height, width, 3 or 4) array of uint8) as PNG.
+
+    file is a filename or a binary file. The rows are compressed in blocks, such that no
+    compressed copy of the whole image is needed.
+    """
+    image = np.ascontiguousarray(image, dtype = np.uint8)
+    height, width = image.shape[0], image.shape[1]
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    blocks = (image[first:(first + rowsPerBlock)] for first in range(0, height, rowsPerBlock))
+    savePNGRows(blocks, width, height, channels, file, compression)
+
+def savePNGRows(blocks, width, height, channels, file, compression = 6):
+    """Writes an image given as blocks of rows (arrays of uint8, from top to bottom) as PNG, see savePNG."""
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            savePNGRows(blocks, width, height, channels, f, compression)
+        return
+    colorType = {1: 0, 3: 2, 4: 6}[channels]
+    file.write(b"\x89PNG\r\n\x1a\n")
+    writeChunk(file, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, colorType, 0, 0, 0))
+    compressor = zlib.compressobj(compression)
+    data = []
+    for rows in blocks:
+        rows = np.ascontiguousarray(rows, dtype = np.uint8).reshape(-1, width * channels)
+        # every row starts with its filter type (0, no filter)
+        block = np.zeros((rows.shape[0], width * channels + 1), dtype = np.uint8)
+        block[:, 1:] = rows
+        data.append(compressor.compress(block.tobytes()))
+        if sum([len(part) for part in data]) > (1 << 20):
+            writeChunk(file, b"IDAT", b"".join(data))
+            data = []
+    data.append(compressor.flush())
+    writeChunk(file, b"IDAT", b"".join(data))
+    writeChunk(file, b"IEND", b"")
+
+def writeChunk(file, kind, data):
+    """Writes a PNG chunk: length, kind, data and checksum."""
+    file.write(struct.pack(">I", len(data)))
+    file.write(kind)
+    file.write(data)
+    file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+
+if __name__ == "__main__":
+    print("For examples refer to: LSystems_examples.py")
@@ -19,7 +19,10 @@ DEPENDENCIES: 1) This module depends on the graphics module
               by John Zelle. Which can be downloaded from:
               https://mcsp.wartburg.edu/zelle/python/graphics.py
 
-              2) Further, we only need the turtle package
+              2) The batched turtle interpretation uses LSystems_geometry.py and
+                 LSystems_raster.py, which depend on NumPy, and LSystems_cache.py.
+
+              3) Further, we only need the turtle package
 
 OVERVIEW:     This module consists of a special class for the visualisation of 
               Anabaena Catenula and a function that interprets L-System output as 
@@ -27,7 +30,13 @@ OVERVIEW:     This module consists of a special class for the visualisation of
 """
 
 import turtle 
+import base64
+import io
+import tkinter
 from graphics import *
+from LSystems_geometry import turtle_segments, polylines, levelOfDetail
+from LSystems_raster import drawSegments, newCoverage, composite, savePNG
+from LSystems_cache import isCacheable
 
 class Anabaena:
     """Class to draw the development of Anabaena catenula. """
@@ -85,8 +94,32 @@ class Anabaena:
 
 
 
-def turtle_interpretation(instructions, delta = 90, initialAngle = 90, distance = 1, width = 1):
-    """Interprets a list of modules as a set of instructions for a turtle to draw a tree. """    
+def cached_segments(instructions, delta, initialAngle, distance, cache = None):
+    """Returns turtle_segments of instructions, looked up in or stored in cache (a GeometryCache) if given."""
+    if cache is None or not isCacheable(instructions):
+        return(turtle_segments(instructions, delta, initialAngle, distance))
+    key = cache.geometryKey(instructions, "2D", delta, initialAngle, distance)
+    segments = cache.lookup(key)
+    if segments is None:
+        segments = turtle_segments(instructions, delta, initialAngle, distance)
+        cache.store(key, segments, segments.nbytes())
+    return(segments)
+
+def turtle_interpretation(instructions, delta = 90, initialAngle = 90, distance = 1, width = 1, batched = True, rasterThreshold = 200000, resolution = None, cache = None, verbose = False):
+    """Interprets modules as a set of instructions for a turtle to draw a tree.
+
+    instructions can be any iterable of modules, e.g. a generation or LSystem.streamGeneration().
+    With batched = True the drawing is computed first (see LSystems_geometry.py) and every
+    unbroken path is drawn as a single line on the canvas, which is much faster for large words.
+    Drawings with more than rasterThreshold segments are rasterized (see LSystems_raster.py)
+    and shown as a single image. With batched = False the turtle draws the modules one by one.
+    If resolution (in pixels) is given, the paths are simplified within half a pixel before
+    drawing (see LSystems_geometry.levelOfDetail), with verbose = True the number of removed
+    segments is printed.
+    With a cache (a GeometryCache, see LSystems_cache.py) the segments of a word (not a stream)
+    are stored, such that drawing the same word with the same delta, initialAngle and distance
+    again (e.g. with another width) skips the turtle.
+    """    
     ############ INITIALIZATION #############
     turtle.TurtleScreen._RUNNING = True
     turtle.tracer(0,0) #only display the result
@@ -95,6 +128,21 @@ def turtle_interpretation(instructions, delta = 90, initialAngle = 90, distance
     turtle.mode("world")
     turtle.setheading(initialAngle)
     turtle.width(width)
+    if batched:
+        segments = cached_segments(instructions, delta, initialAngle, distance, cache)
+        if resolution is not None:
+            segments, report = levelOfDetail(segments, resolution)
+            if verbose:
+                print("Level of detail: removed", report["removed"], "of", report["segments"], "segments")
+        turtle.hideturtle()
+        world = fit_world(*segments.bounds)
+        if len(segments) > rasterThreshold:
+            image = draw_raster(segments, world, width)
+        else:
+            draw_polylines(polylines(segments), width)
+        turtle.update()
+        turtle.exitonclick()
+        return 0
     turtleXmax = 0
     turtleXmin = 0
     turtleYmax = 0
@@ -143,13 +191,7 @@ def turtle_interpretation(instructions, delta = 90, initialAngle = 90, distance
     # update screen and display size
     turtle.hideturtle()
     turtle.update() 
-    # make sure the ratio of the picture is 1:1
-    if (turtleXmax-turtleXmin) > (turtleYmax-turtleYmin):
-        turtleYmax = turtleYmin + (turtleXmax-turtleXmin)
-    else:
-        turtleXmax = turtleXmin + (turtleYmax-turtleYmin)  
-    margin = (turtleYmax-turtleYmin)*0.02 #margin is always 2 percent of picture width
-    turtle.setworldcoordinates(turtleXmin-margin, turtleYmin-margin, turtleXmax+margin, turtleYmax+margin)
+    fit_world(turtleXmin, turtleYmin, turtleXmax, turtleYmax)
 
     ####### CLEANUP ###########
     # print("Press a key to continue:")
@@ -158,6 +200,50 @@ def turtle_interpretation(instructions, delta = 90, initialAngle = 90, distance
     turtle.exitonclick()
     return 0
 
+def fit_world(turtleXmin, turtleYmin, turtleXmax, turtleYmax):
+    """Sets the world coordinates of the turtle screen such that the bounding box fits with a 1:1 ratio."""
+    # make sure the ratio of the picture is 1:1
+    if (turtleXmax-turtleXmin) > (turtleYmax-turtleYmin):
+        turtleYmax = turtleYmin + (turtleXmax-turtleXmin)
+    else:
+        turtleXmax = turtleXmin + (turtleYmax-turtleYmin)  
+    margin = (turtleYmax-turtleYmin)*0.02 #margin is always 2 percent of picture width
+    world = (turtleXmin-margin, turtleYmin-margin, turtleXmax+margin, turtleYmax+margin)
+    turtle.setworldcoordinates(*world)
+    return(world)
+
+def draw_polylines(lines, width = 1, color = "black"):
+    """Draws polylines (arrays with world coordinates, see LSystems_geometry.polylines) on the turtle screen.
+
+    Every polyline is a single canvas item, call this after the world coordinates are set.
+    """
+    screen = turtle.Screen()
+    canvas = screen.getcanvas()
+    for line in lines:
+        # world to canvas coordinates, in the same way as the turtle module draws its lines
+        coordinates = (line * (screen.xscale, -screen.yscale)).ravel().tolist()
+        canvas.create_line(coordinates, fill = color, width = width, capstyle = "round", joinstyle = "round")
+
+def draw_raster(segments, world, width = 1):
+    """Rasterizes the drawn segments (see LSystems_raster.py) and shows them as one image on the turtle screen.
+
+    world is the world window (llx, lly, urx, ury) returned by fit_world. Returns the image,
+    a reference to it has to be kept for as long as it is shown.
+    """
+    screen = turtle.Screen()
+    canvas = screen.getcanvas()
+    llx, lly, urx, ury = world
+    scale = screen.xscale
+    columns = int(round((urx - llx) * scale)) + 1
+    rows = int(round((ury - lly) * screen.yscale)) + 1
+    coverage = newCoverage(columns, rows)
+    drawSegments(coverage, segments, (scale, -llx * scale, ury * screen.yscale), width, antialias = True)
+    png = io.BytesIO()
+    savePNG(composite(coverage), png)
+    image = tkinter.PhotoImage(data = base64.b64encode(png.getvalue()))
+    canvas.create_image(llx * scale, -ury * screen.yscale, image = image, anchor = "nw")
+    canvas.image = image
+    return(image)
 
 
 if __name__ == "__main__":
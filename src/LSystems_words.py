@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 2019-04-01
+
+@author: R.H.J. Gerritsen
+
+LSystems_words.py contains alternative representations of the words (generations)
+of an L-system. By default LSystem stores a word as a list of modules, for large or
+repetitive words the representations in this module can be used instead, see
+LSystem.setRepresentation in LSystems.py.
+
+INSTALLATION: Put this file somewhere where Python can see it (e.g. in the
+              working directory.)
+
+DEPENDENCIES: None
+
+OVERVIEW:     Rope is an immutable sequence of modules stored as a balanced binary
+              tree with chunks (lists of modules) as leaves. Ropes are concatenated
+              without copying and successive generations can share chunks.
+              ropeFromChunks and ropeFromList build balanced ropes.
+
+              RunLengthWord stores a word as runs of equal modules (a module and
+              the number of times it is repeated), runLengthEncode builds one.
+              moduleKey determines which modules are equal.
+"""
+
+from bisect import bisect_right
+from itertools import chain, repeat
+
+ROPE_CHUNK_SIZE = 256   # default number of modules in a chunk of a rope
+
+########################################
+#            EQUAL MODULES             #
+########################################
+def moduleKey(mod):
+    """Returns a hashable key of a module, modules are equal if their keys are equal.
+
+    1 == 1.0 == True and 0.0 == -0.0, but they are printed differently, so the key includes 
+    the types and, if there is a zero, the exact representation of the parameters.
+    """
+    params = tuple(mod.param)
+    if 0 in params:
+        return((mod.symbol, tuple(map(repr, params))))
+    return((mod.symbol, params, tuple(map(type, params))))
+
+########################################
+#                ROPES                 #
+########################################
+class Rope:
+    """Rope is an immutable sequence of modules, stored as a balanced binary tree with chunks as leaves.
+
+    A leaf contains a chunk (a list of modules), a node a left and a right rope. Two ropes are
+    concatenated in O(1) and slices share the chunks of the original rope, only the chunks at
+    the ends of a slice are copied. Ropes may share chunks, so chunks should never be modified.
+    """
+    def __init__(self, left = None, right = None, chunk = None):
+        if chunk is not None:
+            self.chunk       = chunk
+            self.left        = None
+            self.right       = None
+            self.length      = len(chunk)
+            self.depth       = 0
+            self.nrOfChunks  = 1
+        else:
+            self.chunk       = None
+            self.left        = left
+            self.right       = right
+            self.length      = left.length + right.length
+            self.depth       = 1 + max(left.depth, right.depth)
+            self.nrOfChunks  = left.nrOfChunks + right.nrOfChunks
+        self.chunkList = None        # the chunks in order, see chunks()
+        self.offsets   = None        # the position of the first module of every chunk
+        self.lastChunk = (0, 0, [])  # (start, end, chunk) of the last lookup, successive lookups are mostly nearby
+
+    def __len__(self):
+        return(self.length)
+
+    def __iter__(self):
+        return(chain.from_iterable(self.chunks()))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                return([self[i] for i in range(start, stop, step)])
+            return(self.slice(start, stop))
+        if index < 0:
+            index = index + self.length
+        start, end, chunk = self.lastChunk
+        if start <= index < end:
+            return(chunk[index - start])
+        if index < 0 or index >= self.length:
+            raise IndexError("rope index out of range")
+        chunks = self.chunks()
+        k = bisect_right(self.offsets, index) - 1
+        start = self.offsets[k]
+        chunk = chunks[k]
+        self.lastChunk = (start, start + len(chunk), chunk)
+        return(chunk[index - start])
+
+    def __add__(self, other):
+        return(self.concat(other))
+
+    def __repr__(self):
+        return("Rope(" + str(self.length) + " modules in " + str(self.nrOfChunks) + " chunks)")
+
+    def chunks(self):
+        """Returns the list of chunks (lists of modules) of the rope, in order."""
+        if self.chunkList is None:
+            chunks = []
+            stack = [self]
+            while stack != []:
+                rope = stack.pop()
+                if rope.chunk is not None:
+                    chunks.append(rope.chunk)
+                else:
+                    stack.append(rope.right)
+                    stack.append(rope.left)
+            offsets = []
+            position = 0
+            for chunk in chunks:
+                offsets.append(position)
+                position = position + len(chunk)
+            self.chunkList = chunks
+            self.offsets = offsets
+        return(self.chunkList)
+
+    def concat(self, other):
+        """Returns the rope of this rope followed by other, without copying any chunk.
+
+        The result is rebalanced when it becomes too deep.
+        """
+        if other.length == 0:
+            return(self)
+        if self.length == 0:
+            return(other)
+        rope = Rope(self, other)
+        if rope.depth > 2 * rope.nrOfChunks.bit_length() + 2:
+            return(ropeFromChunks(rope.chunks()))
+        return(rope)
+
+    def slice(self, start, stop):
+        """Returns the modules from start up to stop as a rope that shares the chunks of this rope."""
+        chunks = self.chunks()
+        if start >= stop:
+            return(ropeFromChunks([]))
+        first = bisect_right(self.offsets, start) - 1
+        last = bisect_right(self.offsets, stop - 1) - 1
+        if first == last:
+            offset = self.offsets[first]
+            return(ropeFromChunks([chunks[first][(start - offset):(stop - offset)]]))
+        parts = [chunks[first][(start - self.offsets[first]):]]
+        parts.extend(chunks[(first + 1):last])
+        parts.append(chunks[last][:(stop - self.offsets[last])])
+        return(ropeFromChunks(parts))
+
+def ropeFromChunks(chunks):
+    """Returns a balanced rope with the chunks (lists of modules) as leaves, empty chunks are left out."""
+    nodes = [Rope(chunk = chunk) for chunk in chunks if chunk != []]
+    if nodes == []:
+        return(Rope(chunk = []))
+    while len(nodes) > 1:
+        pairs = [Rope(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+        if len(nodes) % 2 == 1:
+            pairs.append(nodes[-1])
+        nodes = pairs
+    return(nodes[0])
+
+def ropeFromList(modules, chunkSize = ROPE_CHUNK_SIZE):
+    """Returns a balanced rope with the modules of an iterable, in chunks of chunkSize modules."""
+    modules = list(modules)
+    return(ropeFromChunks([modules[start:(start + chunkSize)] for start in range(0, len(modules), chunkSize)]))
+
+########################################
+#          RUN-LENGTH ENCODING         #
+########################################
+class RunLengthWord:
+    """RunLengthWord stores a word as runs of equal modules (see moduleKey).
+
+    Run i consists of counts[i] times the module modules[i], all copies in a run are the same 
+    object, so modules should not be modified. Iterating a RunLengthWord gives the modules one 
+    by one, as if it were a list.
+    """
+    def __init__(self):
+        self.modules = []     # the module of every run
+        self.counts  = []     # the length of every run
+        self.length  = 0      # the total number of modules
+        self.offsets = None   # the position of the first module of every run, see __getitem__
+        self.lastRun = (0, 0, -1)    # (start, end, run) of the last lookup, successive lookups are mostly nearby
+
+    def __len__(self):
+        return(self.length)
+
+    def __iter__(self):
+        return(chain.from_iterable(map(repeat, self.modules, self.counts)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return([self[i] for i in range(*index.indices(self.length))])
+        if index < 0:
+            index = index + self.length
+        start, end, k = self.lastRun
+        if start <= index < end:
+            return(self.modules[k])
+        if index < 0 or index >= self.length:
+            raise IndexError("word index out of range")
+        if self.offsets is None:
+            offsets = []
+            position = 0
+            for count in self.counts:
+                offsets.append(position)
+                position = position + count
+            self.offsets = offsets
+        # the context search walks through the word, so first try the neighbouring runs
+        if index == end:
+            k = k + 1
+        elif index == start - 1:
+            k = k - 1
+        else:
+            k = bisect_right(self.offsets, index) - 1
+        self.lastRun = (self.offsets[k], self.offsets[k] + self.counts[k], k)
+        return(self.modules[k])
+
+    def __repr__(self):
+        return("RunLengthWord(" + str(self.length) + " modules in " + str(len(self.modules)) + " runs)")
+
+    def runs(self):
+        """Returns an iterator over the runs as (module, count) pairs."""
+        return(zip(self.modules, self.counts))
+
+    def append(self, mod, count = 1):
+        """Appends count times mod, the last run is extended if it consists of modules equal to mod."""
+        self.offsets = None
+        self.lastRun = (0, 0, -1)
+        self.length = self.length + count
+        if self.modules != []:
+            last = self.modules[-1]
+            if last is mod or (last.symbol == mod.symbol and last.param == mod.param and moduleKey(last) == moduleKey(mod)):
+                self.counts[-1] = self.counts[-1] + count
+                return
+        self.modules.append(mod)
+        self.counts.append(count)
+
+    def extend(self, other):
+        """Appends all runs of another RunLengthWord."""
+        for mod, count in other.runs():
+            self.append(mod, count)
+
+    def compressionRatio(self):
+        """Returns the number of modules per run."""
+        return(self.length / max(1, len(self.modules)))
+
+def runLengthEncode(modules):
+    """Returns a RunLengthWord with the modules of an iterable."""
+    word = RunLengthWord()
+    for mod in modules:
+        word.append(mod)
+    return(word)
+
+
+if __name__ == "__main__":
+    print("For examples refer to: LSystems_examples.py")
@@ -14,6 +14,7 @@ from __future__ import division
 
 import math
 import random
+import re
 
 TNUMBER = 0
 TOP1 = 1
@@ -21,6 +22,58 @@ TOP2 = 2
 TVAR = 3
 TFUNCALL = 4
 
+# Infix operators as (token, priority, index). The order matters: longer
+# operators that share a prefix with a shorter one must come first.
+OPERATORS = (
+    ('+', 2, '+'),
+    ('-', 2, '-'),
+    ('*', 3, '*'),
+    (u'\u2219', 3, '*'), # bullet operator
+    (u'\u2022', 3, '*'), # black small circle
+    ('/', 4, '/'),
+    ('%', 4, '%'),
+    ('^', 6, '^'),
+    ('||', 1, '||'),
+    ('==', 1, '=='),
+    ('!=', 1, '!='),
+    ('<=', 1, '<='),
+    ('>=', 1, '>='),
+    ('<', 1, '<'),
+    ('>', 1, '>'),
+    ('and', 0, 'and'),
+    ('or', 0, 'or'),
+)
+
+# Kinds of lexical tokens produced by Parser.nextToken
+LEX_OPERATOR = 0
+LEX_NUMBER = 1
+LEX_STRING = 2
+LEX_LPAREN = 3
+LEX_RPAREN = 4
+LEX_COMMA = 5
+LEX_CONST = 6
+LEX_OP2 = 7
+LEX_OP1 = 8
+LEX_VAR = 9
+LEX_WHITE = 10
+LEX_UNKNOWN = 11
+
+# Master regex covering the common (ASCII) tokens in a single match. The
+# alternatives are tried in the same order as the isXxx probes, so e.g.
+# 'or' in 'order' is still read as an operator. Anything it does not cover
+# (strings, quoted variables, non-ASCII names, errors) falls back to the
+# character probes, which keeps results and error columns identical.
+TOKEN_RE = re.compile(
+    '(?P<white>\\s+)'
+    '|(?P<op>' + '|'.join(re.escape(op[0]) for op in OPERATORS) + ')'
+    '|(?P<number>[0-9.]+)'
+    '|(?P<lparen>\\()'
+    '|(?P<rparen>\\))'
+    '|(?P<comma>,)'
+    '|(?P<word>[A-Za-z][A-Za-z0-9_]*)(?P<tail>[A-Za-z0-9_.]*)'
+)
+OPERATOR_TABLE = dict((op[0], (op[1], op[2])) for op in OPERATORS)
+
 
 class Token():
 
@@ -394,7 +447,8 @@ class Parser:
         self.pos = 0
 
         while self.pos < len(self.expression):
-            if self.isOperator():
+            kind = self.nextToken()
+            if kind == LEX_OPERATOR:
                 if self.isSign() and expected & self.SIGN:
                     if self.isNegativeSign():
                         self.tokenprio = 5
@@ -412,19 +466,19 @@ class Parser:
                     self.addfunc(tokenstack, operstack, TOP2)
                     expected = \
                         self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
-            elif self.isNumber():
+            elif kind == LEX_NUMBER:
                 if expected and self.PRIMARY == 0:
                     self.error_parsing(self.pos, 'unexpected number')
                 token = Token(TNUMBER, 0, 0, self.tokennumber)
                 tokenstack.append(token)
                 expected = self.OPERATOR | self.RPAREN | self.COMMA
-            elif self.isString():
+            elif kind == LEX_STRING:
                 if (expected & self.PRIMARY) == 0:
                     self.error_parsing(self.pos, 'unexpected string')
                 token = Token(TNUMBER, 0, 0, self.tokennumber)
                 tokenstack.append(token)
                 expected = self.OPERATOR | self.RPAREN | self.COMMA
-            elif self.isLeftParenth():
+            elif kind == LEX_LPAREN:
                 if (expected & self.LPAREN) == 0:
                     self.error_parsing(self.pos, 'unexpected \"(\"')
                 if expected & self.CALL:
@@ -435,7 +489,7 @@ class Parser:
                 expected = \
                     self.PRIMARY | self.LPAREN | self.FUNCTION | \
                     self.SIGN | self.NULLARY_CALL
-            elif self.isRightParenth():
+            elif kind == LEX_RPAREN:
                 if expected & self.NULLARY_CALL:
                     token = Token(TNUMBER, 0, 0, [])
                     tokenstack.append(token)
@@ -444,32 +498,32 @@ class Parser:
                 expected = \
                     self.OPERATOR | self.RPAREN | self.COMMA | \
                     self.LPAREN | self.CALL
-            elif self.isComma():
+            elif kind == LEX_COMMA:
                 if (expected & self.COMMA) == 0:
                     self.error_parsing(self.pos, 'unexpected \",\"')
                 self.addfunc(tokenstack, operstack, TOP2)
                 noperators += 2
                 expected = \
                     self.PRIMARY | self.LPAREN | self.FUNCTION | self.SIGN
-            elif self.isConst():
+            elif kind == LEX_CONST:
                 if (expected & self.PRIMARY) == 0:
                     self.error_parsing(self.pos, 'unexpected constant')
                 consttoken = Token(TNUMBER, 0, 0, self.tokennumber)
                 tokenstack.append(consttoken)
                 expected = self.OPERATOR | self.RPAREN | self.COMMA
-            elif self.isOp2():
+            elif kind == LEX_OP2:
                 if (expected & self.FUNCTION) == 0:
                     self.error_parsing(self.pos, 'unexpected function')
                 self.addfunc(tokenstack, operstack, TOP2)
                 noperators += 2
                 expected = self.LPAREN
-            elif self.isOp1():
+            elif kind == LEX_OP1:
                 if (expected & self.FUNCTION) == 0:
                     self.error_parsing(self.pos, 'unexpected function')
                 self.addfunc(tokenstack, operstack, TOP1)
                 noperators += 1
                 expected = self.LPAREN
-            elif self.isVar():
+            elif kind == LEX_VAR:
                 if (expected & self.PRIMARY) == 0:
                     self.error_parsing(self.pos, 'unexpected variable')
                 vartoken = Token(TVAR, self.tokenindex, 0, 0)
@@ -477,7 +531,7 @@ class Parser:
                 expected = \
                     self.OPERATOR | self.RPAREN | \
                     self.COMMA | self.LPAREN | self.CALL
-            elif self.isWhite():
+            elif kind == LEX_WHITE:
                 pass
             else:
                 if self.errormsg == '':
@@ -494,6 +548,99 @@ class Parser:
 
         return Expression(tokenstack, self.ops1, self.ops2, self.functions)
 
+    def nextToken(self):
+        """Reads the token at self.pos, advances past it and returns its kind.
+
+        Like the isXxx probes, this sets tokenindex, tokenprio and
+        tokennumber for the token that was read.
+        """
+        expr = self.expression
+        match = TOKEN_RE.match(expr, self.pos)
+        if match is not None:
+            group = match.lastgroup
+            end = match.end()
+            if group == 'white':
+                self.pos = end
+                return LEX_WHITE
+            elif group == 'op':
+                self.tokenprio, self.tokenindex = OPERATOR_TABLE[match.group()]
+                self.pos = end
+                return LEX_OPERATOR
+            elif group == 'number':
+                str = match.group()
+                if str[0] == '.':
+                    str = '0' + str
+                try:
+                    self.tokennumber = int(str)
+                except ValueError:
+                    try:
+                        self.tokennumber = float(str)
+                    except ValueError:
+                        return self.probeToken() # let isNumber raise
+                self.pos = end
+                return LEX_NUMBER
+            elif group == 'lparen':
+                self.pos = end
+                self.tmpprio += 10
+                return LEX_LPAREN
+            elif group == 'rparen':
+                self.pos = end
+                self.tmpprio -= 10
+                return LEX_RPAREN
+            elif group == 'comma':
+                self.pos = end
+                self.tokenprio = -1
+                self.tokenindex = ','
+                return LEX_COMMA
+            elif end == len(expr) or (expr[end] < u'\x80' and expr[end] != '"'):
+                # a plain ASCII name, otherwise the probes decide
+                word = match.group('word')
+                if word in self.consts:
+                    self.tokennumber = self.consts[word]
+                    self.pos = match.end('word')
+                    return LEX_CONST
+                if word in self.ops2:
+                    self.tokenindex = word
+                    self.tokenprio = 7
+                    self.pos = match.end('word')
+                    return LEX_OP2
+                if word in self.ops1:
+                    self.tokenindex = word
+                    self.tokenprio = 7
+                    self.pos = match.end('word')
+                    return LEX_OP1
+                self.tokenindex = match.group()
+                self.tokenprio = 4
+                self.pos = end
+                return LEX_VAR
+        return self.probeToken()
+
+    def probeToken(self):
+        """Reads the token at self.pos using the character probes."""
+        if self.isOperator():
+            return LEX_OPERATOR
+        elif self.isNumber():
+            return LEX_NUMBER
+        elif self.isString():
+            return LEX_STRING
+        elif self.isLeftParenth():
+            return LEX_LPAREN
+        elif self.isRightParenth():
+            return LEX_RPAREN
+        elif self.isComma():
+            return LEX_COMMA
+        elif self.isConst():
+            return LEX_CONST
+        elif self.isOp2():
+            return LEX_OP2
+        elif self.isOp1():
+            return LEX_OP1
+        elif self.isVar():
+            return LEX_VAR
+        elif self.isWhite():
+            return LEX_WHITE
+        return LEX_UNKNOWN
+
     def evaluate(self, expr, variables):
         return self.parse(expr).evaluate(variables)
 
@@ -622,26 +769,7 @@ class Parser:
         return False
 
     def isOperator(self):
-        ops = (
-            ('+', 2, '+'),
-            ('-', 2, '-'),
-            ('*', 3, '*'),
-            (u'\u2219', 3, '*'), # bullet operator
-            (u'\u2022', 3, '*'), # black small circle
-            ('/', 4, '/'),
-            ('%', 4, '%'),
-            ('^', 6, '^'),
-            ('||', 1, '||'),
-            ('==', 1, '=='),
-            ('!=', 1, '!='),
-            ('<=', 1, '<='),
-            ('>=', 1, '>='),
-            ('<', 1, '<'),
-            ('>', 1, '>'),
-            ('and', 0, 'and'),
-            ('or', 0, 'or'),
-        )
-        for token, priority, index in ops:
+        for token, priority, index in OPERATORS:
             if self.expression.startswith(token, self.pos):
                 self.tokenprio = priority
                 self.tokenindex = index
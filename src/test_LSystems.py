@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems.py, run with: python -m pytest
+"""
+
+import json
+import random
+import pytest
+import LSystems
+from LSystems import LSystem, BudgetExceeded, loadCheckpoint, stringToRule
+from LSystems_grammars import EXAMPLES_2D, EXAMPLES_3D, ANABAENA
+
+def test_budget_counts_current_word():
+    system = LSystem("F", ["F?F F"], maxBytes = 200000, onBudget = "stop")
+    for j in range(20):
+        system.nextGeneration()
+    assert system.budgetExceeded
+    # the last word that fits was built while its predecessor (half as long) was kept
+    moduleSize = system.estimateModuleSize()
+    assert (len(system.word) + len(system.word) // 2) * moduleSize <= 200000
+    assert (2 * len(system.word) + len(system.word)) * moduleSize > 200000
+
+def test_budget_abort():
+    system = LSystem("F", ["F?F F"], maxModules = 100)
+    with pytest.raises(BudgetExceeded):
+        for j in range(10):
+            system.nextGeneration()
+    assert len(system.word) == 64
+
+def modules(word):
+    return([(mod.symbol, list(mod.param)) for mod in word])
+
+def test_checkpoint_round_trip(tmp_path):
+    case = EXAMPLES_2D[8]
+    random.seed(3)
+    system = LSystem(case["axiom"], case["productions"], case["ignore"])
+    for j in range(3):
+        system.nextGeneration()
+    system.saveCheckpoint(str(tmp_path / "plant.ckpt"))
+    for j in range(2):
+        system.nextGeneration()
+    random.seed(4)    # the random state is restored from the checkpoint
+    restored = loadCheckpoint(str(tmp_path / "plant.ckpt"))
+    assert restored.generation == 3
+    for j in range(2):
+        restored.nextGeneration()
+    assert restored.generation == system.generation
+    assert modules(restored.word) == modules(system.word)
+
+def test_checkpoint_parametric(tmp_path):
+    system = LSystem(ANABAENA["axiom"], ANABAENA["productions"], ANABAENA["ignore"], ANABAENA["definitions"])
+    system.setCheckpointing(str(tmp_path / "anabaena_{generation}.ckpt"), 2)
+    for j in range(6):
+        system.nextGeneration()
+    restored = loadCheckpoint(str(tmp_path / "anabaena_6.ckpt"))
+    assert modules(restored.word) == modules(system.word)
+    restored.nextGeneration()
+    system.nextGeneration()
+    assert modules(restored.word) == modules(system.word)
+
+def test_memo_equals_plain():
+    for case in (EXAMPLES_2D[5], EXAMPLES_2D[6], ANABAENA):
+        plain = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"])
+        memo  = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], memoSize = 1000)
+        for j in range(8):
+            assert modules(memo.nextGeneration()) == modules(plain.nextGeneration())
+
+def test_interning_equals_plain():
+    case = ANABAENA
+    plain    = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"])
+    interned = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], intern = True)
+    for j in range(30):
+        assert modules(interned.nextGeneration()) == modules(plain.nextGeneration())
+
+def test_stream_generation_equals_next_generation():
+    for case in (EXAMPLES_2D[4], EXAMPLES_2D[7], ANABAENA):
+        plain    = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"])
+        streamed = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"])
+        for j in range(4):
+            plain.nextGeneration()
+        assert modules(streamed.streamGeneration(4)) == modules(plain.word)
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_produce_generations(mode):
+    case = ANABAENA
+    plain    = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"])
+    producer = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"])
+    expected = []
+    for j in range(12):
+        word = plain.nextGeneration()
+        if j % 3 == 0:
+            expected.append((plain.generation, modules(word)))
+    with producer.produceGenerations(12, every = 3, mode = mode) as generations:
+        produced = [(generation, modules(word)) for generation, word in generations]
+    assert produced == expected
+
+def test_grow_to_minimum_size():
+    case = EXAMPLES_2D[6]
+    system = LSystem(case["axiom"], case["productions"])
+    system.setMinimumSize(0.1, {"A": 0})
+    word = system.growToMinimumSize(20)
+    # 1.456**6 < 10 < 1.456**7, so every branch stops after 7 generations
+    assert system.generation == 7
+    apices = [mod for mod in word if mod.symbol == "A"]
+    assert len(apices) == 2**7
+    assert all(mod.param[0] < 0.1 for mod in apices)
+    assert modules(system.nextGeneration()) == modules(word)
+
+def test_clipping_prune():
+    system = LSystem("F", ["F?F F"])
+    system.setClipping((-1, -1, 1, 5.5), mode = "prune")
+    for j in range(8):
+        system.nextGeneration()
+    assert len(system.word) == 10
+    system.applyClipping()
+    assert len(system.word) == 5
+
+def test_clipping_stop():
+    system = LSystem("F", ["F?F F"])
+    system.setClipping((-1, -1, 1, 5.5), mode = "stop")
+    lengths = [len(system.nextGeneration()) for j in range(8)]
+    # once the stem leaves the region only the 5 modules inside are rewritten
+    assert lengths == [2, 4, 8, 13, 18, 23, 28, 33]
+    assert system.specification()["clipping"] == [(-1, -1, 1, 5.5), 90, 90, 1, "stop"]
+
+SHARED_RULES = {"axiom": "B(1,2) C(1,1) A(1,0)",
+                "productions": ["A(x,y):(x+y)*2<50?A((x+y)*2,y+1) B((x+y)*2,x+y)",
+                                "A(x,y):(x+y)*2>=50 and max(x*3,y*3)>0?A(x/2,y) C(x*3,y*3)",
+                                "B(u,v)<C(s,t)>A(x,y):s+x>0?C(s+x,(s+x)*t) [ B(sqrt(s+x),v*v) ]"],
+                "ignore": "[]", "definitions": [], "nrOfIterations": 8}
+
+def plainSystem(monkeypatch, case, **settings):
+    """Returns an L-system whose rules evaluate their expressions as parsed, without CSE."""
+    with monkeypatch.context() as patch:
+        patch.setattr(LSystems, "eliminateCommonSubexpressions", lambda expressions: (expressions, []))
+        return(LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], **settings))
+
+@pytest.mark.parametrize("settings", [{}, {"memoSize": 100}, {"intern": True}, {"memoSize": 100, "intern": True}])
+def test_cse_equals_plain(monkeypatch, settings):
+    cases = [EXAMPLES_2D[5], EXAMPLES_2D[6], ANABAENA, EXAMPLES_3D[1], EXAMPLES_3D[2], EXAMPLES_3D[3], SHARED_RULES]
+    for case in cases:
+        plain = plainSystem(monkeypatch, case, **settings)
+        cse   = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], **settings)
+        assert all(rule.temporaries == {} for rule in plain.productionRules)
+        for j in range(min(case["nrOfIterations"], 7)):
+            assert modules(cse.nextGeneration()) == modules(plain.nextGeneration())
+
+def test_cse_temporaries():
+    rule = stringToRule(SHARED_RULES["productions"][0])
+    # (x+y)*2 is computed by the condition and reused by the successor
+    assert rule.conditionTemporaries != []
+    assert set(rule.conditionTemporaries) <= set(rule.successorTemporaries)
+    rule = stringToRule(SHARED_RULES["productions"][2])
+    assert [rule.temporaries[name].toString() for name in rule.conditionTemporaries] == ["(s+x)"]
+
+def test_cse_exclusions():
+    # every call of random gives another value
+    assert stringToRule("R(x)?R(x+random(1)) S(x+random(1))").temporaries == {}
+    # argument lists are not shared, their arguments are
+    rule = stringToRule("A(x,y):max(x,y)>0 and min(x,y)<9?A(x,y)")
+    assert rule.temporaries == {}
+    rule = stringToRule("A(x,y):max(x*3,y)>0 and min(x*3,y)<9?A(x,y)")
+    assert [expr.toString() for expr in rule.temporaries.values()] == ["(x*3)"]
+
+def test_cse_malformed_postfix():
+    # the parser accepts these, they fail when the rule is applied, not when it is built
+    for production in ["A(y)?A(2^-y) B(2^-y)", "A(x)?A(--x)"]:
+        system = LSystem("A(1)", [production])
+        with pytest.raises(IndexError):
+            system.nextGeneration()
+
+@pytest.mark.parametrize("settings", [{}, {"memoSize": 100, "intern": True}])
+def test_profiled_equals_plain(settings):
+    for case in (EXAMPLES_2D[5], EXAMPLES_2D[7], ANABAENA, SHARED_RULES):
+        plain    = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], **settings)
+        profiled = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], **settings)
+        profile = profiled.enableProfiling()
+        for j in range(6):
+            assert modules(profiled.nextGeneration()) == modules(plain.nextGeneration())
+        assert [stats.generation for stats in profile.generations] == [1, 2, 3, 4, 5, 6]
+
+def test_profile_counters():
+    case = EXAMPLES_2D[5]   # F(x,t):t==0?... and F(x,t):t>0?F(x,t-1)
+    system = LSystem(case["axiom"], case["productions"])
+    profile = system.enableProfiling()
+    for j in range(6):
+        word = list(system.word)
+        system.nextGeneration()
+        stats = profile.generations[-1]
+        waiting = sum(1 for mod in word if mod.symbol == "F" and mod.param[1] > 0)
+        growing = sum(1 for mod in word if mod.symbol == "F" and mod.param[1] == 0)
+        # the first rule is tried (and fails) before the second one applies
+        assert stats.ruleHits == [growing, waiting]
+        assert stats.conditionFailures == [waiting, 0]
+        assert stats.unchanged == len(word) - growing - waiting
+        assert stats.moduleCounts == {symbol: sum(1 for mod in system.word if mod.symbol == symbol) for symbol in "F+-"}
+    assert [stats.ruleHits for stats in profile.generations[:4]] == [[1, 0], [1, 3], [3, 4], [6, 10]]
+    assert profile.generations[1].unchanged == 4
+
+def test_profile_json_and_disable(tmp_path):
+    system = LSystem(ANABAENA["axiom"], ANABAENA["productions"], ANABAENA["ignore"], ANABAENA["definitions"])
+    system.enableProfiling()
+    for j in range(3):
+        system.nextGeneration()
+    profile = system.disableProfiling()
+    assert system.profile is None
+    system.nextGeneration()
+    assert len(profile.generations) == 3
+    profile.save(str(tmp_path / "profile.json"))
+    with open(str(tmp_path / "profile.json")) as f:
+        saved = json.load(f)
+    assert saved == json.loads(profile.toJSON())
+    assert saved["rules"] == ANABAENA["productions"]
+    assert [gen["generation"] for gen in saved["generations"]] == [1, 2, 3]
+    assert set(saved["generations"][0]["times"]) == {"total", "context", "matching", "condition", "successor", "assembly"}
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems_3D.py, run with: python -m pytest
+
+VPython needs a browser or notebook, so the tests replace it by a small module that
+records what is drawn.
+"""
+
+import math
+import sys
+import types
+
+drawn = {"curves": [], "triangles": [], "boxes": []}
+
+class vector:
+    def __init__(self, x = 0, y = 0, z = 0):
+        self.x, self.y, self.z = x, y, z
+    def __add__(self, other):
+        return(vector(self.x + other.x, self.y + other.y, self.z + other.z))
+    def __sub__(self, other):
+        return(vector(self.x - other.x, self.y - other.y, self.z - other.z))
+    def __mul__(self, scalar):
+        return(vector(self.x * scalar, self.y * scalar, self.z * scalar))
+    __rmul__ = __mul__
+    def rotate(self, angle, axis):
+        if angle == 0:
+            return(vector(self.x, self.y, self.z))
+        k = norm(axis)
+        return(self * math.cos(angle) + cross(k, self) * math.sin(angle) + k * (dot(k, self) * (1 - math.cos(angle))))
+    def tuple(self):
+        return((self.x, self.y, self.z))
+
+def dot(a, b):
+    return(a.x * b.x + a.y * b.y + a.z * b.z)
+
+def cross(a, b):
+    return(vector(a.y * b.z - a.z * b.y, a.z * b.x - a.x * b.z, a.x * b.y - a.y * b.x))
+
+def mag(a):
+    return(math.sqrt(dot(a, a)))
+
+def norm(a):
+    return(vector(0, 0, 0) if mag(a) == 0 else a * (1 / mag(a)))
+
+class curve:
+    def __init__(self, point):
+        self.points = [point]
+        drawn["curves"].append(self)
+    def append(self, point):
+        self.points.append(point)
+
+class color:
+    @staticmethod
+    def gray(g):
+        return(vector(g, g, g))
+
+vpython = types.ModuleType("vpython")
+vpython.vector, vpython.cross, vpython.mag, vpython.norm, vpython.curve, vpython.color = vector, cross, mag, norm, curve, color
+vpython.radians = math.radians
+vpython.vertex = lambda pos, color: (pos, color)
+vpython.triangle = lambda vs: drawn["triangles"].append(vs)
+vpython.box = lambda **options: drawn["boxes"].append(options)
+vpython.distant_light = lambda **options: None
+vpython.canvas = lambda **options: types.SimpleNamespace()
+sys.modules["vpython"] = vpython
+
+from LSystems import LSystem
+from LSystems_grammars import EXAMPLES_3D
+from LSystems_cache import GeometryCache
+from LSystems_3D import turtle_geometry_3D, turtle_interpretation_3D
+
+def shrub(nrOfIterations = 4):
+    case = EXAMPLES_3D[0]
+    system = LSystem(case["axiom"], case["productions"], definitions = case["definitions"])
+    for j in range(nrOfIterations):
+        system.nextGeneration()
+    return(system.word)
+
+def recorded():
+    curves = [[(point["pos"].tuple(), point["color"].tuple(), point["radius"]) for point in c.points] for c in drawn["curves"]]
+    triangles = [[(pos.tuple(), rgb.tuple()) for pos, rgb in corners] for corners in drawn["triangles"]]
+    boxes = len(drawn["boxes"])
+    for objects in drawn.values():
+        objects.clear()
+    return(curves, triangles, boxes)
+
+def test_geometry():
+    word = shrub()
+    geometry = turtle_geometry_3D(word)
+    symbols = [mod.symbol for mod in word]
+    # a curve at the start, for every branch and after every move with the pen up
+    assert len(geometry.curves) == 1 + symbols.count("[") + symbols.count("f")
+    # every leaf has seven corners (the start and six moves), fanned into 5 triangles
+    assert len(geometry.triangles) == 5 * symbols.count("{")
+    # every F adds a point to the current curve
+    assert sum([len(points) - 1 for points in geometry.curves]) == symbols.count("F")
+    xmin, ymin, zmin, xmax, ymax, zmax = geometry.bounds
+    assert ymax > 0 and xmin <= 0 <= xmax
+    assert geometry.size() > 0
+
+def test_draw_and_cache():
+    word = shrub()
+    scene = types.SimpleNamespace()
+    turtle_interpretation_3D(scene, word)
+    direct = recorded()
+    cache = GeometryCache()
+    turtle_interpretation_3D(scene, word, cache = cache)
+    assert recorded() == direct
+    turtle_interpretation_3D(scene, word, cache = cache)
+    assert recorded() == direct
+    assert cache.statistics()["hits"] == 1
+    assert direct[2] == 1       # the ground
+    turtle_interpretation_3D(scene, word, delta = 30, cache = cache)
+    assert recorded() != direct
+    assert cache.statistics()["misses"] == 2
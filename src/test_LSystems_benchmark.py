@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems_benchmark.py, run with: python -m pytest
+"""
+
+from LSystems_benchmark import runBenchmarks, compareResults
+
+def test_compare_matching_generations():
+    four  = runBenchmarks(["2D-1"], repeat = 1, nrOfIterations = 4, verbose = False)
+    three = runBenchmarks(["2D-1"], repeat = 1, nrOfIterations = 3, verbose = False)
+    comparison = compareResults(four, three)
+    assert comparison["2D-1"]["generations"] == 3
+    oldTime = sum(gen["time"]["median"] for gen in four["cases"]["2D-1"]["generations"][:3])
+    assert comparison["2D-1"]["old"] == oldTime
+
+def test_compare_different_settings():
+    lists = runBenchmarks(["2D-1"], repeat = 1, nrOfIterations = 2, verbose = False)
+    ropes = runBenchmarks(["2D-1"], repeat = 1, nrOfIterations = 2, representation = "rope", verbose = False)
+    assert compareResults(lists, ropes) == {}
+    assert compareResults(lists, ropes, force = True)["2D-1"]["generations"] == 2
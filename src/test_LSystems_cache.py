@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems_cache.py, run with: python -m pytest
+"""
+
+import gc
+import LSystems_cache
+from LSystems import LSystem, Module
+from LSystems_grammars import EXAMPLES_2D
+from LSystems_cache import GeometryCache, wordDigest, isCacheable
+from LSystems_geometry import turtle_segments
+
+def generation(representation = "list", nrOfIterations = 3):
+    case = EXAMPLES_2D[3]
+    system = LSystem(case["axiom"], case["productions"], case["ignore"], representation = representation)
+    for j in range(nrOfIterations):
+        system.nextGeneration()
+    return(system.word)
+
+def test_hits_misses_and_eviction():
+    cache = GeometryCache(maxBytes = 100)
+    cache.store("a", "A", 40)
+    cache.store("b", "B", 40)
+    assert cache.lookup("a") == "A"
+    assert cache.lookup("c") is None
+    cache.store("c", "C", 40)     # evicts b, the least recently used
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") == "A" and cache.lookup("c") == "C"
+    cache.store("d", "D", 200)    # larger than the cache, not stored
+    assert cache.lookup("d") is None
+    statistics = cache.statistics()
+    assert (statistics["hits"], statistics["misses"], statistics["evictions"]) == (3, 3, 1)
+    assert (statistics["entries"], statistics["bytes"]) == (2, 80)
+
+def test_digest_collisions():
+    # hash(-1) == hash(-2) in Python, the digest distinguishes them
+    assert wordDigest([Module("F", [-1])]) != wordDigest([Module("F", [-2])])
+    assert wordDigest([Module("F", [1])]) == wordDigest([Module("F", [1.0])])
+    assert wordDigest([Module("AB", [])]) != wordDigest([Module("A", []), Module("B", [])])
+    assert wordDigest([Module("F", [1, 2]), Module("F", [])]) != wordDigest([Module("F", [1]), Module("F", [2])])
+    cache = GeometryCache()
+    assert cache.geometryKey([Module("F", [-1])], 90) != cache.geometryKey([Module("F", [-2])], 90)
+
+def test_representations():
+    word = generation()
+    assert wordDigest(generation("rope")) == wordDigest(word)
+    assert wordDigest(generation("rle")) == wordDigest(generation("rle"))
+    assert wordDigest(generation(nrOfIterations = 2)) != wordDigest(word)
+    assert isCacheable(word) and not isCacheable(iter(word))
+
+def test_memo_is_weak(monkeypatch):
+    digests = []
+    def countingDigest(word):
+        digests.append(word)
+        return(wordDigest(word))
+    monkeypatch.setattr(LSystems_cache, "wordDigest", countingDigest)
+    cache = GeometryCache()
+    rope = generation("rope")
+    assert cache.geometryKey(rope, 90) == cache.geometryKey(rope, 60)[:2] + (90,)
+    assert len(digests) == 1
+    digests.clear()
+    del rope
+    gc.collect()
+    assert cache.lastWord[0]() is None
+    # lists can not be referenced weakly: they are read every time and never kept
+    word = generation()
+    cache.geometryKey(word, 90)
+    cache.geometryKey(word, 90)
+    assert len(digests) == 2 and cache.lastWord == (None, None)
+
+def test_cached_segments():
+    word = generation()
+    cache = GeometryCache()
+    key = cache.geometryKey(word, "2D", 90, 90, 1)
+    assert cache.lookup(key) is None
+    segments = turtle_segments(word, 90, 90, 1)
+    cache.store(key, segments, segments.nbytes())
+    assert cache.lookup(cache.geometryKey(list(word), "2D", 90, 90, 1)) is segments
+    assert cache.statistics()["bytes"] == segments.nbytes() == sum([a.nbytes for a in (segments.start, segments.end, segments.pen, segments.depth)])
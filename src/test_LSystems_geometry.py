@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems_geometry.py, run with: python -m pytest
+"""
+
+from math import cos, sin, radians
+import numpy as np
+from LSystems import LSystem
+from LSystems_grammars import EXAMPLES_2D
+from LSystems_geometry import turtle_segments, TurtleStream, simplifySegments, levelOfDetail, pixelSize
+from LSystems_raster import rasterize
+
+def example(choice, extraIterations = 0):
+    case = EXAMPLES_2D[choice]
+    system = LSystem(case["axiom"], case["productions"], case["ignore"])
+    for j in range(case["nrOfIterations"] + extraIterations):
+        system.nextGeneration()
+    return(system.word, case["delta"], case["initial"])
+
+def scalarTurtle(word, delta, initialAngle, distance = 1):
+    """Interprets word one module at a time (like turtle_interpretation), returns start, end, pen and depth."""
+    x, y, heading = 0.0, 0.0, initialAngle
+    stack = []
+    moves = []
+    for mod in word:
+        if mod.symbol[0] == "F" or mod.symbol == "f":
+            length = distance if mod.param == [] else float(mod.param[0])
+            start = (x, y)
+            x, y = x + length * cos(radians(heading)), y + length * sin(radians(heading))
+            moves.append((start, (x, y), mod.symbol != "f", len(stack)))
+        elif mod.symbol == "+":
+            heading = heading + (delta if mod.param == [] else mod.param[0])
+        elif mod.symbol == "-":
+            heading = heading - (delta if mod.param == [] else mod.param[0])
+        elif mod.symbol == "[":
+            stack.append((x, y, heading))
+        elif mod.symbol == "]":
+            x, y, heading = stack.pop()
+    start, end, pen, depth = zip(*moves)
+    return(np.array(start), np.array(end), np.array(pen), np.array(depth))
+
+def dilate(mask):
+    """Returns the pixels within one pixel (including diagonals) of a pixel of mask."""
+    padded = np.pad(mask, 1)
+    rows, columns = mask.shape
+    return(np.any([padded[i:(i + rows), j:(j + columns)] for i in range(3) for j in range(3)], axis = 0))
+
+def test_level_of_detail_raster():
+    for choice in (1, 3, 7):
+        word, delta, initial = example(choice, 1)
+        segments = turtle_segments(word, delta, initial)
+        for resolution in (200, 500):
+            simplified, report = levelOfDetail(segments, resolution)
+            assert report["remaining"] == len(simplified) <= report["segments"]
+            full = rasterize(segments, resolution, antialias = False)[:, :, 0] < 128
+            reduced = rasterize(simplified, resolution, antialias = False)[:, :, 0] < 128
+            assert not np.any(reduced & ~dilate(full))
+            assert not np.any(full & ~dilate(reduced))
+
+def test_simplify_tolerance():
+    word, delta, initial = example(1, 2)
+    segments = turtle_segments(word, delta, initial)
+    tolerance = 0.5 * pixelSize(segments.bounds, 200)
+    simplified = simplifySegments(segments, tolerance)
+    assert len(simplified) < len(segments) / 10
+    # every corner of the full drawing lies within tolerance of the simplified drawing
+    points = segments.end[::7]
+    chord = simplified.end - simplified.start
+    for point in points:
+        relative = point - simplified.start
+        t = np.clip(np.sum(relative * chord, axis = 1) / np.maximum(np.sum(chord * chord, axis = 1), 1e-300), 0, 1)
+        assert np.min(np.hypot(*(relative - t[:, None] * chord).T)) <= tolerance * (1 + 1e-9)
+
+def test_simplify_small_tolerance():
+    word, delta, initial = example(2)
+    segments = turtle_segments(word, delta, initial)
+    simplified = simplifySegments(segments, 1e-9)
+    assert np.array_equal(simplified.start, segments.drawn().start)
+
+def test_lattice_only_for_planar_angles():
+    for choice in (1, 3, 8):
+        word, delta, initial = example(choice)
+        exact = turtle_segments(word, delta, initial)
+        floats = turtle_segments(word, delta, initial, lattice = False)
+        assert np.allclose(exact.end, floats.end, atol = 1e-9)
+        if delta % 60 != 0 and delta % 90 != 0:
+            # 23 degrees: the default falls back to the floating-point turtle
+            assert np.array_equal(exact.end, floats.end)
+            assert np.allclose(turtle_segments(word, delta, initial, lattice = "any").end, floats.end, atol = 1e-9)
+
+def test_lattice_closes_snowflake():
+    word, delta, initial = example(1, 4)
+    segments = turtle_segments(word, delta, initial)
+    assert np.array_equal(segments.end[-1], segments.start[0])
+
+def test_segments_equal_scalar_turtle():
+    for choice in EXAMPLES_2D:
+        word, delta, initial = example(choice)
+        start, end, pen, depth = scalarTurtle(word, delta, initial)
+        for lattice in (True, False):
+            segments = turtle_segments(word, delta, initial, lattice = lattice)
+            scale = max(1, np.abs(end).max())
+            assert np.allclose(segments.start, start, atol = 1e-9 * scale)
+            assert np.allclose(segments.end, end, atol = 1e-9 * scale)
+            assert np.array_equal(segments.pen, pen) and np.array_equal(segments.depth, depth)
+            assert np.allclose(segments.bounds, (min(0, end[:, 0].min()), min(0, end[:, 1].min()), max(0, end[:, 0].max()), max(0, end[:, 1].max())))
+
+def test_stream_equals_segments():
+    for choice in EXAMPLES_2D:
+        word, delta, initial = example(choice)
+        segments = turtle_segments(word, delta, initial)
+        stream = TurtleStream(iter(word), delta, initial, chunkSize = 97)
+        chunks = list(stream)
+        assert all([len(chunk) <= 97 for chunk in chunks])
+        assert np.allclose(np.concatenate([chunk.start for chunk in chunks]), segments.start, atol = 1e-9)
+        assert np.allclose(np.concatenate([chunk.end for chunk in chunks]), segments.end, atol = 1e-9)
+        assert np.array_equal(np.concatenate([chunk.depth for chunk in chunks]), segments.depth)
+        assert np.allclose(stream.bounds, segments.bounds)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems_io.py, run with: python -m pytest
+"""
+
+from LSystems import LSystem
+from LSystems_grammars import ANABAENA, EXAMPLES_2D
+from LSystems_io import writeGeneration, readGeneration, iterGeneration, parseModules, writeWord, readWord, GenerationCache
+
+def anabaena(nrOfIterations = 8):
+    system = LSystem(ANABAENA["axiom"], ANABAENA["productions"], ANABAENA["ignore"], ANABAENA["definitions"])
+    for j in range(nrOfIterations):
+        system.nextGeneration()
+    return(system)
+
+def modules(word):
+    return([(mod.symbol, mod.param) for mod in word])
+
+def test_text_round_trip(tmp_path):
+    word = anabaena().word
+    for name in ("word.txt", "word.txt.gz", "word.txt.xz"):
+        assert writeGeneration(word, tmp_path / name) == len(word)
+        assert modules(readGeneration(tmp_path / name)) == modules(word)
+
+def test_text_small_blocks(tmp_path):
+    word = anabaena().word
+    writeGeneration(word, tmp_path / "word.txt")
+    with open(tmp_path / "word.txt") as f:
+        assert modules(iterGeneration(f, bufferSize = 7)) == modules(word)
+
+def test_parse_modules():
+    parsed = parseModules(["F(1,2.5)", "a)", "(x)", "A(1)(2)", "C(1))", "+"])
+    assert modules(parsed) == [("F", [1.0, 2.5]), ("a)", []), ("(x)", []), ("A(1)(2)", []), ("C(1))", []), ("+", [])]
+
+def test_binary_round_trip(tmp_path):
+    word = anabaena().word
+    filename = str(tmp_path / "word.bin")
+    assert writeWord(filename, iter(word), chunkSize = 5) == len(word)
+    with readWord(filename) as stored:
+        assert len(stored) == len(word)
+        assert modules(stored) == modules(word)
+        assert modules(stored[3:9]) == modules(word[3:9])
+        assert (stored[-1].symbol, stored[-1].param) == (word[-1].symbol, word[-1].param)
+        assert [stored.symbolAt(i) for i in range(len(word))] == [mod.symbol for mod in word]
+
+def test_binary_continue(tmp_path):
+    system = anabaena(6)
+    filename = str(tmp_path / "word.bin")
+    writeWord(filename, system.word)
+    with readWord(filename) as stored:
+        restored = LSystem(ANABAENA["axiom"], ANABAENA["productions"], ANABAENA["ignore"], ANABAENA["definitions"])
+        restored.setWord(stored, 6)
+        restored.nextGeneration()
+    system.nextGeneration()
+    assert modules(restored.word) == modules(system.word)
+
+def test_generation_cache(tmp_path):
+    cache = GenerationCache(str(tmp_path / "cache"))
+    grammar = (ANABAENA["axiom"], ANABAENA["productions"], ANABAENA["ignore"], ANABAENA["definitions"])
+    computed = cache.computeGeneration(5, *grammar)
+    assert len(cache.entries()) == 5
+    assert modules(computed.word) == modules(anabaena(5).word)
+    # generation 7 continues from the cached generation 5
+    key = cache.key(*grammar)
+    assert cache.deepest(key, 7) == 5
+    assert modules(cache.computeGeneration(7, *grammar).word) == modules(anabaena(7).word)
+    assert cache.deepest(key, 7) == 7
+
+def test_generation_cache_stochastic(tmp_path):
+    cache = GenerationCache(str(tmp_path / "cache"))
+    case = EXAMPLES_2D[8]
+    grammar = (case["axiom"], case["productions"], case["ignore"])
+    first = cache.computeGeneration(4, *grammar, seed = 5)
+    again = cache.computeGeneration(4, *grammar, seed = 5)
+    assert modules(again.word) == modules(first.word)
+    longer = cache.computeGeneration(5, *grammar, seed = 5, store = False)
+    direct = GenerationCache(str(tmp_path / "other")).computeGeneration(5, *grammar, seed = 5, store = False)
+    assert modules(longer.word) == modules(direct.word)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems_raster.py and LSystems_export.py, run with: python -m pytest
+"""
+
+import io
+import numpy as np
+from LSystems import LSystem, Module
+from LSystems_grammars import EXAMPLES_2D
+from LSystems_geometry import Segments, turtle_segments
+from LSystems_raster import rasterize, rasterizeTiled, savePNG, saveTiledPNG
+from LSystems_export import writePNG, writeSVG
+
+def randomSegments(n = 20000):
+    rng = np.random.default_rng(2)
+    start = rng.uniform(-50, 50, (n, 2))
+    end = start + rng.normal(0, 2, (n, 2))
+    end[:20] = rng.uniform(-50, 50, (20, 2))     # a few long lines across many tiles
+    return(Segments(start, end, rng.random(n) < 0.9, rng.integers(0, 6, n), (-60, -60, 60, 60)))
+
+def test_tiled_equals_rasterize():
+    segments = randomSegments()
+    for antialias in (False, True):
+        image = rasterize(segments, 700, [5, 3, 2, 1], antialias)
+        for processes in (1, 2):
+            tiled = rasterizeTiled(segments, 700, [5, 3, 2, 1], antialias, tileSize = 128, processes = processes)
+            assert np.array_equal(tiled, image)
+
+def test_tiled_png_equals_png():
+    segments = randomSegments()
+    tiled = io.BytesIO()
+    saveTiledPNG(segments, tiled, 700, tileSize = 200, processes = 1)
+    whole = io.BytesIO()
+    savePNG(rasterize(segments, 700), whole)
+    assert tiled.getvalue() == whole.getvalue()
+
+def test_write_png_tiled():
+    case = EXAMPLES_2D[6]
+    system = LSystem(case["axiom"], case["productions"], case["ignore"])
+    for j in range(case["nrOfIterations"]):
+        system.nextGeneration()
+    for simplify in (False, True):
+        whole = io.BytesIO()
+        writePNG(system.word, whole, case["delta"], case["initial"], width = [3, 2, 1], size = 500, chunkSize = 1000, simplify = simplify)
+        tiled = io.BytesIO()
+        writePNG(system.word, tiled, case["delta"], case["initial"], width = [3, 2, 1], size = 500, chunkSize = 1000, simplify = simplify,
+                 processes = 2, tileSize = 128)
+        assert tiled.getvalue() == whole.getvalue()
+
+def test_write_png_equals_rasterize():
+    # on the lattice (90 degrees) the streamed and the batched turtle give exactly the same bounds
+    case = EXAMPLES_2D[3]
+    system = LSystem(case["axiom"], case["productions"], case["ignore"])
+    for j in range(case["nrOfIterations"] - 1):
+        system.nextGeneration()
+    streamed = io.BytesIO()
+    writePNG(system.streamGeneration(case["nrOfIterations"]), streamed, case["delta"], case["initial"], size = 400, chunkSize = 500)
+    system.nextGeneration()
+    whole = io.BytesIO()
+    savePNG(rasterize(turtle_segments(system.word, case["delta"], case["initial"]), 400), whole)
+    assert streamed.getvalue() == whole.getvalue()
+
+def test_write_svg():
+    word = [Module("F", []), Module("+", []), Module("F", []), Module("[", []), Module("-", []), Module("F", []), Module("]", []), Module("F", [])]
+    svg = io.StringIO()
+    bounds = writeSVG(word, svg, delta = 90, initialAngle = 0, size = 100, margin = 0)
+    assert np.allclose(bounds, (0, 0, 2, 2))
+    text = svg.getvalue()
+    assert text.count("<path") == 1 and 'viewBox="0 -2 2 2"' in text
+    # two polylines: the branch continues the path, after the ] a new one starts
+    assert text.count("M") == 2
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for LSystems_words.py (and the representations of LSystem), run with: python -m pytest
+"""
+
+import random
+from LSystems import LSystem
+from LSystems_grammars import EXAMPLES_2D, ANABAENA, EXAMPLES_3D
+from LSystems_words import Rope
+
+def cases():
+    for choice in EXAMPLES_2D:
+        yield(EXAMPLES_2D[choice], min(EXAMPLES_2D[choice]["nrOfIterations"], 5))
+    yield(ANABAENA, 10)
+    yield(EXAMPLES_3D[1], 6)
+
+def generations(case, nrOfIterations, representation):
+    random.seed(2)
+    system = LSystem(case["axiom"], case["productions"], case["ignore"], case["definitions"], representation = representation)
+    words = []
+    for j in range(nrOfIterations):
+        words.append([(mod.symbol, list(mod.param)) for mod in system.nextGeneration()])
+    return(words, system.word)
+
+def test_rope_equals_list():
+    for case, nrOfIterations in cases():
+        words, rope = generations(case, nrOfIterations, "rope")
+        assert isinstance(rope, Rope)
+        assert words == generations(case, nrOfIterations, "list")[0], case["name"]
+        assert [(mod.symbol, list(mod.param)) for mod in rope[3:40]] == words[-1][3:40]
+        assert (rope[-1].symbol, list(rope[-1].param)) == words[-1][-1]
+
+def test_rle_equals_list():
+    for case, nrOfIterations in cases():
+        words, rle = generations(case, nrOfIterations, "rle")
+        assert words == generations(case, nrOfIterations, "list")[0], case["name"]
+        assert len(rle) == len(words[-1])
+        assert sum([count for mod, count in rle.runs()]) == len(words[-1])
+        assert [(rle[i].symbol, list(rle[i].param)) for i in range(0, len(rle), 7)] == words[-1][::7]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the tokenizer of py_expression_eval.py, run with: python -m pytest
+"""
+
+import math
+import re
+import pytest
+from py_expression_eval import Parser
+
+VARIABLES = {"x": 2, "y": 3, "x2": 5, "a.b": 7}
+
+def evaluate(expr):
+    return(Parser().parse(expr).evaluate(VARIABLES))
+
+def tokens(expr, parser = None):
+    parser = Parser() if parser is None else parser
+    return([(token.type_, token.index_, token.number_) for token in parser.parse(expr).tokens])
+
+@pytest.mark.parametrize("expr, value", [
+    ("2+3*4", 14), ("(2+3)*4", 20), ("1-2-3", -4), ("8/4/2", 1), ("3 % 2", 1),
+    ("2^3^2", 64),                   # ^ is left associative
+    ("-2^2", -4), ("-x+y", 1), ("2*-3", -6), ("abs(-3)", 3),
+    ("x>1 and y<2", False), ("x==2 or y!=3", True),
+    ("max(1,2,3)", 3), ("min(x, y)", 2), ("pow(2,10)", 1024), ("atan2(1, 1)", math.pi/4),
+    ("if(x>1, 10, 20)", 10), ("sqrt(16)", 4), ("fac(5)", 120), ("sin(PI/2)", 1),
+    ("E", math.e), ("PI*2", 2*math.pi),
+    (".5", 0.5), ("5.", 5.0), ("0.25*4", 1),
+    ("x2+1", 6), ("a.b+1", 8)])
+def test_evaluate(expr, value):
+    assert evaluate(expr) == pytest.approx(value)
+
+def test_tokens():
+    assert tokens("2+3*4") == [(0, 0, 2), (0, 0, 3), (0, 0, 4), (2, "*", 0), (2, "+", 0)]
+    assert tokens("-x+y") == [(3, "x", 0), (1, "-", 0), (3, "y", 0), (2, "+", 0)]
+    assert tokens("min(x, y)") == [(3, "min", 0), (3, "x", 0), (3, "y", 0), (2, ",", 0), (4, -1, 0)]
+    assert tokens("sqrt(16)") == [(0, 0, 16), (1, "sqrt", 0)]
+    assert tokens("PI") == [(0, 0, math.pi)]
+    assert tokens("x>1 and y<2")[-1] == (2, "and", 0)
+    # operator names are not split from longer names
+    assert tokens("x2") == [(3, "x2", 0)]
+
+@pytest.mark.parametrize("expr, message", [
+    ("1e-3", "parse error [column 2]: unexpected variable"),   # no exponent notation
+    ("1e3", "parse error [column 3]: unexpected variable"),
+    ("(1+2", "parse error [column 4]: unmatched \"()\""),
+    ("1+2)", "parse error [column 4]: unmatched \"()\""),
+    ("1+", "parse error [column 2]: parity"),
+    ("*2", "parse error [column 2]: parity"),
+    ("1 2", "parse error [column 3]: parity"),
+    ("x y", "parse error [column 3]: unexpected variable"),
+    ("order+1", "parse error [column 7]: parity"),
+    ("$x", "parse error [column 0]: unknown character"),
+    ("", "parse error [column 0]: parity")])
+def test_errors(expr, message):
+    with pytest.raises(Exception, match = re.escape(message)):
+        Parser().parse(expr)
+
+def test_undefined_function():
+    with pytest.raises(Exception, match = "undefined variable: f"):
+        evaluate("f(1,2)")
+
+class ProbeParser(Parser):
+    """Reads every token with the character probes, as before the token regex."""
+    def nextToken(self):
+        return(self.probeToken())
+
+@pytest.mark.parametrize("expr", ["2+3*4", "(x+y)*2>=50 and max(x*3,y*3)>0", "-2^2 - -x", "s/1.456",
+                                  "if(t==0, .5, 5.)", "PI*E", "x2 or y", "é+x", "xé", "\"a\"", "1..2", "$x", "1e-3"])
+def test_regex_equals_probes(expr):
+    try:
+        expected = tokens(expr, ProbeParser())
+    except Exception as error:
+        with pytest.raises(Exception, match = re.escape(str(error))):
+            tokens(expr)
+        return
+    assert tokens(expr) == expected